@@ -1,4 +1,9 @@
-from .main import ConformityAnalysis
+def __getattr__(name):
+    # 延遲載入 GUI 入口，讓命令列工具（cli.py）在沒有 PyQt6 / 顯示環境的機器上也能匯入此套件
+    if name == 'ConformityAnalysis':
+        from .main import ConformityAnalysis
+        return ConformityAnalysis
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'ConformityAnalysis'
@@ -0,0 +1,199 @@
+# benchmarks/corpus_generator.py
+"""
+產生可重現的合成語料（docx / xlsx / pdf），供基準測試使用：
+python -m conformity_analysis_module.benchmarks.corpus_generator <輸出資料夾> [--files 200] [--seed 0]
+片段由條款文字的詞彙與一般填充詞組成；一定比例的片段直接摘錄條款文字的一段（會與該條款相似），
+另有一定比例的樣板片段（頁首、頁尾、版次表）在檔案間重複出現。
+"""
+import os
+import re
+import json
+import shutil
+import random
+import argparse
+import docx
+import openpyxl
+from conformity_analysis_module.core.requirements_loader import RequirementsLoader
+
+FILLER_WORDS = ("the system vendor shall document process network device account user patch backup "
+                "review report record approve update monitor control access remote site plant "
+                "procedure policy responsible manager team schedule evidence test result").split()
+
+BOILERPLATE = [
+    "Confidential - for internal use only",
+    "Copyright all rights reserved",
+    "Document revision history",
+    "Rev Date Author Description",
+    "Approved by quality assurance department",
+    "This document is uncontrolled when printed",
+]
+
+class CorpusSpec:
+    """合成語料的參數：檔案數、格式比例、每檔片段數與每片段詞數範圍、樣板片段與條款摘錄片段的比例"""
+    def __init__(self, files=200, mix=None, snippets_per_file=(20, 200), words_per_snippet=(5, 40),
+                 boilerplate_ratio=0.2, relevant_ratio=0.05, seed=0):
+        self.files = files
+        self.mix = mix or {"docx": 0.5, "xlsx": 0.3, "pdf": 0.2}
+        self.snippets_per_file = tuple(snippets_per_file)
+        self.words_per_snippet = tuple(words_per_snippet)
+        self.boilerplate_ratio = boilerplate_ratio
+        self.relevant_ratio = relevant_ratio
+        self.seed = seed
+
+    def to_dict(self):
+        return {
+            "files": self.files,
+            "mix": self.mix,
+            "snippets_per_file": list(self.snippets_per_file),
+            "words_per_snippet": list(self.words_per_snippet),
+            "boilerplate_ratio": self.boilerplate_ratio,
+            "relevant_ratio": self.relevant_ratio,
+            "seed": self.seed
+        }
+
+def requirement_texts():
+    return [" ".join(re.findall(r"[A-Za-z]+", text)) for text in RequirementsLoader.load().values()]
+
+def requirement_vocabulary(texts):
+    words = set()
+    for text in texts:
+        words.update(w for w in text.lower().split() if len(w) > 3)
+    return sorted(words) or FILLER_WORDS
+
+def make_snippets(rng, spec, vocabulary, texts):
+    count = rng.randint(*spec.snippets_per_file)
+    snippets = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < spec.boilerplate_ratio:
+            snippets.append(rng.choice(BOILERPLATE))
+            continue
+        if roll < spec.boilerplate_ratio + spec.relevant_ratio and texts:
+            words = rng.choice(texts).split()
+            length = min(len(words), rng.randint(8, 20))
+            start = rng.randint(0, len(words) - length)
+            snippets.append(" ".join(words[start:start + length]))
+            continue
+        n_words = rng.randint(*spec.words_per_snippet)
+        words = [rng.choice(vocabulary) if rng.random() < 0.6 else rng.choice(FILLER_WORDS) for _ in range(n_words)]
+        snippets.append(" ".join(words).capitalize())
+    return snippets
+
+def write_docx(path, snippets):
+    document = docx.Document()
+    for snippet in snippets:
+        document.add_paragraph(snippet)
+    document.save(path)
+
+def write_xlsx(path, snippets):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for snippet in snippets:
+        # 每列拆成數個儲存格，擷取時會以空白再接回
+        words = snippet.split()
+        cut = max(1, len(words) // 3)
+        ws.append([" ".join(words[:cut]), " ".join(words[cut:2 * cut]) or None, " ".join(words[2 * cut:]) or None])
+    wb.save(path)
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, snippets, lines_per_page=45):
+    """手寫最小的 PDF（Helvetica 文字，每行一個片段），不需額外的 PDF 產生套件"""
+    pages = [snippets[i:i + lines_per_page] for i in range(0, len(snippets), lines_per_page)] or [[]]
+    objects = []
+    page_ids = [3 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode('ascii'))
+    font_id = 3 + 2 * len(pages)
+    for pid, lines in zip(page_ids, pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {pid + 1} 0 R "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode('ascii'))
+        text = "".join(f"({_pdf_escape(line)}) Tj T* " for line in lines)
+        stream = f"BT /F1 9 Tf 12 TL 36 756 Td {text}ET".encode('latin-1', errors='replace')
+        objects.append(b"<< /Length " + str(len(stream)).encode('ascii') + b" >>\nstream\n" + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode('ascii') + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('ascii')
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode('ascii')
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('ascii')
+    with open(path, 'wb') as f:
+        f.write(out)
+
+WRITERS = {"docx": write_docx, "xlsx": write_xlsx, "pdf": write_pdf}
+
+def generate_corpus(output_dir, spec=None):
+    """
+    依 spec 產生合成語料並回傳說明（各格式檔案數與片段數）。
+    資料夾中已有相同參數產生的語料時直接沿用。
+    """
+    spec = spec or CorpusSpec()
+    info_path = os.path.join(output_dir, "corpus.json")
+    if os.path.exists(info_path):
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info.get("spec") == spec.to_dict():
+            return info
+        # 參數不同時先移除先前產生的檔案，避免新舊語料混在一起
+        for name in os.listdir(output_dir):
+            if name.startswith("set") and os.path.isdir(os.path.join(output_dir, name)):
+                shutil.rmtree(os.path.join(output_dir, name))
+
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(spec.seed)
+    texts = requirement_texts()
+    vocabulary = requirement_vocabulary(texts)
+    formats = list(spec.mix)
+    weights = [spec.mix[f] for f in formats]
+    counts = {f: 0 for f in formats}
+    total_snippets = 0
+    for i in range(spec.files):
+        ext = rng.choices(formats, weights)[0]
+        snippets = make_snippets(rng, spec, vocabulary, texts)
+        # 分散到子資料夾，模擬實際的證據資料夾結構
+        sub_dir = os.path.join(output_dir, f"set{i % 10:02d}")
+        os.makedirs(sub_dir, exist_ok=True)
+        WRITERS[ext](os.path.join(sub_dir, f"doc{i:05d}.{ext}"), snippets)
+        counts[ext] += 1
+        total_snippets += len(snippets)
+
+    info = {"spec": spec.to_dict(), "files": counts, "snippets": total_snippets}
+    with open(info_path, 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=4)
+    return info
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="產生合成 docx/xlsx/pdf 語料")
+    parser.add_argument("output_dir")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--mix", default="docx=0.5,xlsx=0.3,pdf=0.2", help="各格式比例")
+    parser.add_argument("--snippets", default="20-200", help="每個檔案的片段數範圍")
+    parser.add_argument("--words", default="5-40", help="每個片段的詞數範圍")
+    parser.add_argument("--boilerplate", type=float, default=0.2, help="樣板片段比例")
+    parser.add_argument("--relevant", type=float, default=0.05, help="摘錄條款文字的片段比例")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(json.dumps(generate_corpus(args.output_dir, spec_from_args(args)), ensure_ascii=False, indent=4))
+
+def parse_range(text):
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+def spec_from_args(args):
+    mix = {}
+    for part in args.mix.split(","):
+        ext, _, weight = part.partition("=")
+        mix[ext.strip()] = float(weight)
+    return CorpusSpec(args.files, mix, parse_range(args.snippets), parse_range(args.words), args.boilerplate,
+                      args.relevant, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/encoder_scaling.py
+"""
+量測多行程編碼池的吞吐量隨工作行程數的變化：
+python -m conformity_analysis_module.benchmarks.encoder_scaling [--folder 資料夾] [--workers 1,2,4] [--snippets 4000]
+未指定資料夾時使用合成句子。結果以 JSON 輸出（每個行程數的片段/秒與相對單行程的加速比）。
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from conformity_analysis_module.core.batch_encoder import BatchEncoder
+from conformity_analysis_module.core.encoder_pool import EncoderPool
+from conformity_analysis_module.core.quantization import sample_snippets
+
+WORDS = ("security patch account password audit vendor network remote access backup control "
+         "procedure policy personnel incident malware wireless configuration event log").split()
+
+def synthetic_snippets(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))) for _ in range(count)]
+
+def run_encoder(encoder, snippets, batch_size):
+    """以 BatchEncoder 編碼全部片段，回傳耗時（秒）"""
+    batch_encoder = BatchEncoder(encoder, batch_size, len(snippets))
+    for i in range(0, len(snippets), 50):
+        batch_encoder.add(i, snippets[i:i + 50])
+    start = time.perf_counter()
+    batch_encoder.flush()
+    return time.perf_counter() - start
+
+def benchmark(model_name, snippets, worker_counts, batch_size=64, quantize=False):
+    results = []
+    for workers in worker_counts:
+        if workers <= 1:
+            import torch
+            from sentence_transformers import SentenceTransformer
+            torch.set_num_threads(os.cpu_count() or 1)
+            model = SentenceTransformer(model_name, device='cpu')
+            if quantize:
+                from conformity_analysis_module.core.quantization import quantize_model
+                model = quantize_model(model)
+            seconds = run_encoder(model, snippets, batch_size)
+            threads = torch.get_num_threads()
+        else:
+            # 模型載入時間不計入
+            with EncoderPool(model_name, workers, quantize=quantize) as pool:
+                seconds = run_encoder(pool, snippets, batch_size)
+                threads = pool.threads_per_worker
+        results.append({
+            "workers": workers,
+            "threads_per_worker": threads,
+            "seconds": seconds,
+            "snippets_per_second": len(snippets) / seconds if seconds else None
+        })
+        print(f"workers={workers}: {results[-1]['snippets_per_second']:.1f} 片段/秒", file=sys.stderr)
+
+    base = results[0]["snippets_per_second"] if results else None
+    for result in results:
+        result["speedup"] = result["snippets_per_second"] / base if base else None
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多行程編碼池吞吐量量測")
+    parser.add_argument("--model", default='models/all-MiniLM-L12-v2')
+    parser.add_argument("--folder", help="由此資料夾擷取片段；未指定時使用合成句子")
+    parser.add_argument("--snippets", type=int, default=4000)
+    parser.add_argument("--workers", default="1,2,4", help="以逗號分隔的工作行程數")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--int8", action="store_true", help="使用動態 int8 量化模型")
+    parser.add_argument("--output", help="結果 JSON 輸出路徑（預設輸出到標準輸出）")
+    args = parser.parse_args(argv)
+
+    snippets = sample_snippets(args.folder, args.snippets) if args.folder else synthetic_snippets(args.snippets)
+    worker_counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    report = {
+        "model": args.model,
+        "snippets": len(snippets),
+        "cpu_count": os.cpu_count(),
+        "batch_size": args.batch_size,
+        "int8": args.int8,
+        "results": benchmark(args.model, snippets, worker_counts, args.batch_size, args.int8)
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
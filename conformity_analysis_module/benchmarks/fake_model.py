@@ -0,0 +1,32 @@
+# benchmarks/fake_model.py
+import hashlib
+import numpy as np
+
+class FakeEmbeddingModel:
+    """
+    不需下載權重的假嵌入模型，介面與 SentenceTransformer.encode 相容。
+    每個詞以其雜湊值決定一個固定的隨機向量，片段向量為詞向量的總和（再正規化），
+    用詞相近的片段相似度也較高，足以讓基準測試產生有意義的命中數，且速度遠快於真正的模型。
+    """
+    def __init__(self, dim=384, seed=0):
+        self.dim = dim
+        self.seed = seed
+        self._word_vectors = {}
+
+    def _word_vector(self, word):
+        vector = self._word_vectors.get(word)
+        if vector is None:
+            digest = hashlib.blake2b(f"{self.seed}\0{word}".encode('utf-8'), digest_size=8).digest()
+            rng = np.random.default_rng(int.from_bytes(digest, 'little'))
+            vector = self._word_vectors[word] = rng.standard_normal(self.dim).astype(np.float32)
+        return vector
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        vectors = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for i, sentence in enumerate(sentences):
+            for word in sentence.lower().split():
+                vectors[i] += self._word_vector(word)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
@@ -0,0 +1,236 @@
+# benchmarks/pipeline_benchmark.py
+"""
+分析流程的基準測試：產生（或沿用）合成語料，分別量測擷取、編碼、評分、結果寫入與完整分析的耗時，
+結果存成 JSON，可與先前 commit 的結果比較：
+python -m conformity_analysis_module.benchmarks.pipeline_benchmark [--files 200] [--model fake]
+    [--output result.json] [--compare baseline.json]
+預設使用假嵌入模型（--model fake），不需下載模型權重即可快速執行。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+from conformity_analysis_module.config import Config
+from conformity_analysis_module.core.analyzer import Analyzer
+from conformity_analysis_module.core.batch_encoder import BatchEncoder
+from conformity_analysis_module.core.file_processor import FileProcessor
+from conformity_analysis_module.core.requirement_bank import RequirementBank
+from conformity_analysis_module.core.requirements_loader import RequirementsLoader
+from conformity_analysis_module.core.results_store import ResultsWriter
+from conformity_analysis_module.core.similarity_scorer import SimilarityScorer
+from conformity_analysis_module.core.snippet_dedup import SnippetDeduper
+from conformity_analysis_module.benchmarks.corpus_generator import generate_corpus, spec_from_args
+from conformity_analysis_module.benchmarks.fake_model import FakeEmbeddingModel
+from text_extraction import ExtractionConfig
+
+# 基準測試期間改寫到暫存目錄的設定，避免影響正式的快取與索引（擷取文字快取另以 ExtractionConfig.CACHE_DIR 改寫）
+ISOLATED_SETTINGS = ("EMBEDDING_CACHE_DIR", "REQUIREMENT_BANK_FILE", "VECTOR_INDEX_FILE", "LEXICAL_INDEX_DIR",
+                     "TRACE_FILE")
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def timed(func, repeat):
+    """執行 repeat 次，回傳 (最短耗時, 各次耗時, 最後一次的回傳值)"""
+    runs = []
+    value = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        value = func()
+        runs.append(time.perf_counter() - start)
+    return min(runs), runs, value
+
+def stage(seconds, runs, **counts):
+    """整理單一階段的結果：耗時與每種處理量的每秒吞吐量"""
+    result = {"seconds": seconds, "runs": runs}
+    for name, count in counts.items():
+        result[name] = count
+        result[f"{name}_per_second"] = count / seconds if seconds > 0 else None
+    return result
+
+def run_benchmark(corpus_dir, model, model_name, requirements, threshold=0.5, repeat=3):
+    file_paths = sorted(Analyzer.iter_target_files(corpus_dir))
+    stages = {}
+    work_dir = tempfile.mkdtemp(prefix="conformity_bench_")
+    results_path = os.path.join(work_dir, "results.jsonl")
+    saved_extraction = (ExtractionConfig.CACHE_ENABLED, ExtractionConfig.CACHE_DIR)
+
+    def extract_all():
+        return [FileProcessor.extract_text_snippets(p) for p in file_paths]
+
+    # 擷取：不使用擷取快取的解析耗時，與擷取快取命中時的耗時
+    try:
+        ExtractionConfig.CACHE_ENABLED = False
+        seconds, runs, extracted = timed(extract_all, repeat)
+        n_snippets = sum(len(s) for s in extracted)
+        stages["extract"] = stage(seconds, runs, files=len(file_paths), snippets=n_snippets)
+        ExtractionConfig.CACHE_ENABLED = True
+        ExtractionConfig.CACHE_DIR = os.path.join(work_dir, "cache", "extracted_text")
+        extract_all()
+        seconds, runs, _ = timed(extract_all, repeat)
+        stages["extract_cached"] = stage(seconds, runs, files=len(file_paths), snippets=n_snippets)
+    finally:
+        ExtractionConfig.CACHE_ENABLED, ExtractionConfig.CACHE_DIR = saved_extraction
+
+    def encode(deduper_factory):
+        encoder = BatchEncoder(model, Config.ENCODE_BATCH_SIZE, Config.ENCODE_POOL_SIZE, deduper_factory())
+        encoded = []
+        for path, snippets in zip(file_paths, extracted):
+            if snippets:
+                encoder.add(path, snippets)
+            if encoder.is_full():
+                encoded.extend(encoder.flush())
+        encoded.extend(encoder.flush())
+        return encoded
+
+    seconds, runs, encoded = timed(lambda: encode(lambda: None), repeat)
+    stages["encode"] = stage(seconds, runs, snippets=n_snippets)
+    seconds, runs, _ = timed(lambda: encode(lambda: SnippetDeduper(Config.DEDUP_MEMO_SIZE)), repeat)
+    stages["encode_dedup"] = stage(seconds, runs, snippets=n_snippets)
+
+    req_keys = list(requirements.keys())
+    scorer = SimilarityScorer(req_keys, model.encode(list(requirements.values())), Config.SCORE_BLOCK_SIZE)
+
+    def score():
+        return [(path, snippets, scorer.hits(emb, threshold)) for path, snippets, emb in encoded if emb is not None]
+
+    seconds, runs, scored = timed(score, repeat)
+    n_hits = sum(len(hits[0]) for _, _, hits in scored)
+    stages["score"] = stage(seconds, runs, snippets=n_snippets, pairs=n_snippets * len(req_keys))
+
+    def write():
+        with ResultsWriter(results_path, compact=Config.COMPACT_RESULTS) as writer:
+            for path, snippets, (req_idx, snippet_idx, scores) in scored:
+                for r, i, score in zip(req_idx.tolist(), snippet_idx.tolist(), scores.tolist()):
+                    writer.write({"requirement": req_keys[r], "requirement_text": requirements[req_keys[r]],
+                                  "snippet": snippets[i], "similarity": score, "source_file": path})
+
+    seconds, runs, _ = timed(write, repeat)
+    stages["write"] = stage(seconds, runs, results=n_hits)
+    stages["write"]["bytes"] = os.path.getsize(results_path)
+
+    # 完整分析：冷啟動（空快取）與暖啟動（向量快取命中）
+    saved = {name: getattr(Config, name) for name in ISOLATED_SETTINGS}
+    try:
+        Config.EMBEDDING_CACHE_DIR = os.path.join(work_dir, "cache", "embeddings")
+        Config.REQUIREMENT_BANK_FILE = os.path.join(work_dir, "cache", "requirement_bank.npy")
+        Config.VECTOR_INDEX_FILE = os.path.join(work_dir, "analysis_index.npz")
+        Config.LEXICAL_INDEX_DIR = os.path.join(work_dir, "cache", "lexical")
+        Config.TRACE_FILE = os.path.join(work_dir, "conformity_trace.jsonl")
+        ExtractionConfig.CACHE_DIR = os.path.join(work_dir, "cache", "extracted_text_analyze")
+        for name in ("cold", "warm"):
+            analyzer = Analyzer(model_name, model=model)
+            try:
+                start = time.perf_counter()
+                results = analyzer.analyze(corpus_dir, requirements, threshold, output_path=results_path,
+                                           incremental=False)
+                seconds = time.perf_counter() - start
+            finally:
+                analyzer.close()
+            stages[f"analyze_{name}"] = stage(seconds, [seconds], files=len(file_paths), snippets=n_snippets)
+            stages[f"analyze_{name}"]["results"] = len(results)
+            stages[f"analyze_{name}"]["stage_stats"] = analyzer.last_stats
+    finally:
+        for name, value in saved.items():
+            setattr(Config, name, value)
+        ExtractionConfig.CACHE_DIR = saved_extraction[1]
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return stages
+
+def compare(report, baseline, tolerance):
+    """
+    與先前的結果比較每個階段的耗時，回傳 [(階段, 先前秒數, 目前秒數, 變化比例, 是否退步)]。
+    耗時增加超過 tolerance（例如 0.1 表示 10%）視為退步。
+    """
+    rows = []
+    for name, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if not previous or not previous.get("seconds"):
+            continue
+        change = current["seconds"] / previous["seconds"] - 1
+        rows.append((name, previous["seconds"], current["seconds"], change, change > tolerance))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分析流程基準測試")
+    parser.add_argument("--corpus", help="語料資料夾（預設為暫存目錄下依參數產生的合成語料）")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--mix", default="docx=0.5,xlsx=0.3,pdf=0.2", help="各格式比例")
+    parser.add_argument("--snippets", default="20-200", help="每個檔案的片段數範圍")
+    parser.add_argument("--words", default="5-40", help="每個片段的詞數範圍")
+    parser.add_argument("--boilerplate", type=float, default=0.2, help="樣板片段比例")
+    parser.add_argument("--relevant", type=float, default=0.05, help="摘錄條款文字的片段比例")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default="fake", help="'fake' 使用假嵌入模型，否則為 SentenceTransformer 模型路徑")
+    parser.add_argument("--fake-dim", type=int, default=384)
+    parser.add_argument("--requirements", type=int, default=50, help="使用前 N 個條款（0 表示全部）")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="結果 JSON 輸出路徑（預設輸出到標準輸出）")
+    parser.add_argument("--compare", help="與此 JSON 結果比較各階段耗時")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="耗時增加超過此比例視為退步")
+    args = parser.parse_args(argv)
+
+    spec = spec_from_args(args)
+    corpus_dir = args.corpus or os.path.join(tempfile.gettempdir(), f"conformity_corpus_{spec.files}_{spec.seed}")
+    corpus = generate_corpus(corpus_dir, spec)
+
+    if args.model == "fake":
+        model, model_name = FakeEmbeddingModel(args.fake_dim), f"fake-{args.fake_dim}"
+    else:
+        from sentence_transformers import SentenceTransformer
+        model, model_name = SentenceTransformer(args.model), args.model
+
+    requirements = {RequirementBank.normalize_key(k): v for k, v in RequirementsLoader.load().items()}
+    if args.requirements:
+        requirements = dict(list(requirements.items())[:args.requirements])
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "model": model_name,
+            "requirements": len(requirements),
+            "threshold": args.threshold,
+            "repeat": args.repeat
+        },
+        "corpus": dict(corpus, path=corpus_dir),
+        "stages": run_benchmark(corpus_dir, model, model_name, requirements, args.threshold, args.repeat)
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressed = False
+        print(f"與 {args.compare}（commit {baseline.get('meta', {}).get('commit')}）比較:", file=sys.stderr)
+        for name, previous, current, change, is_regression in compare(report, baseline, args.tolerance):
+            regressed |= is_regression
+            mark = "  << 退步" if is_regression else ""
+            print(f"  {name:<14} {previous:9.4f} 秒 -> {current:9.4f} 秒 ({change:+.1%}){mark}", file=sys.stderr)
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
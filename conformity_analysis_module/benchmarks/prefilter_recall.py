@@ -0,0 +1,42 @@
+# benchmarks/prefilter_recall.py
+"""
+比較兩階段檢索（BM25 候選 + 向量重排）與完整比對的召回率：
+python -m conformity_analysis_module.benchmarks.prefilter_recall <資料夾> [--sizes 50,200,1000] [--threshold 0.5]
+結果以 JSON 輸出（每個候選數的召回率、候選片段數與 BM25 耗時）。
+"""
+import json
+import argparse
+from conformity_analysis_module.core.analyzer import Analyzer
+from conformity_analysis_module.core.requirements_loader import RequirementsLoader
+from conformity_analysis_module.core.requirement_bank import RequirementBank
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="兩階段檢索召回率報告")
+    parser.add_argument("folder", help="要比對的文件資料夾")
+    parser.add_argument("--model", default='models/all-MiniLM-L12-v2')
+    parser.add_argument("--sizes", default="50,200,1000", help="以逗號分隔的每個條款候選片段數")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--requirements", help="只評估這些條款（以逗號分隔），預設為全部")
+    parser.add_argument("--output", help="結果 JSON 輸出路徑（預設輸出到標準輸出）")
+    args = parser.parse_args(argv)
+
+    requirements = RequirementsLoader.load()
+    if args.requirements:
+        wanted = {RequirementBank.normalize_key(key) for key in args.requirements.split(",") if key.strip()}
+        requirements = {k: v for k, v in requirements.items() if RequirementBank.normalize_key(k) in wanted}
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    analyzer = Analyzer(args.model)
+    try:
+        report = analyzer.prefilter_recall(args.folder, requirements, sizes, args.threshold)
+    finally:
+        analyzer.close()
+    text = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# conformity_analysis_module/cli.py
+"""
+無人值守的批次分析與 Worksheet 填寫（不需 GUI）：
+python -m conformity_analysis_module.cli <資料夾> [<資料夾> ...] --output-dir <輸出目錄> [選項]
+每個資料夾的結果寫到 <輸出目錄>/<資料夾名稱>/analysis_results.jsonl 與 IEC62443_2_4d_filled.xlsx，
+並輸出各階段的吞吐量（檔案/秒、片段/秒）。任一資料夾失敗時結束代碼為 1。
+指定 --service 時把分析交給常駐分析服務（python -m conformity_analysis_module.service），不在本機載入模型；
+模型與行程選項（--model、--int8、--encode-workers、--extract-workers）需在啟動服務時指定，不能與 --service 併用。
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from conformity_analysis_module.config import Config
+from conformity_analysis_module.core.analyzer import Analyzer
+from conformity_analysis_module.core.requirement_bank import RequirementBank
+from conformity_analysis_module.core.requirements_loader import RequirementsLoader
+from conformity_analysis_module.core.worksheet_updater import WorksheetUpdater
+from conformity_analysis_module.service.client import ServiceClient
+from conformity_analysis_module.utils.logger import logger
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IEC 62443-2-4 符合性批次分析")
+    parser.add_argument("folders", nargs="+", help="要分析的文件資料夾")
+    parser.add_argument("--output-dir", required=True, help="輸出目錄，每個資料夾各有一個子目錄")
+    parser.add_argument("--requirements", help="只分析這些條款（以逗號分隔），預設為全部")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--mode", choices=["threshold", "topk"], default=None)
+    parser.add_argument("--top-k", type=int, default=None)
+    parser.add_argument("--per-file-cap", type=int, default=None)
+    parser.add_argument("--model", default=None, help="模型路徑（預設 models/all-MiniLM-L12-v2）")
+    parser.add_argument("--int8", action="store_true", help="使用動態 int8 量化模型")
+    parser.add_argument("--encode-workers", type=int, default=None, help="多行程編碼的工作行程數")
+    parser.add_argument("--extract-workers", type=int, default=None, help="多行程擷取的工作行程數")
+    parser.add_argument("--full", action="store_true", help="不使用增量分析，重新分析所有檔案")
+    parser.add_argument("--no-worksheet", action="store_true", help="只分析，不填寫 Worksheet")
+    parser.add_argument("--template", default=None, help="Worksheet 模板（預設 Config.WORKSHEET_FILE）")
+    parser.add_argument("--stats", help="將各資料夾的處理統計寫成 JSON 檔")
+    parser.add_argument("--service", nargs="?", const="", default=None,
+                        help="交給常駐分析服務執行（可指定服務網址，預設為 Config.SERVICE_HOST:SERVICE_PORT）")
+    args = parser.parse_args(argv)
+    if args.service is not None:
+        # 服務以啟動時的模型與行程設定執行，這些選項在服務模式下不會生效
+        local_options = (("--model", args.model), ("--int8", args.int8 or None),
+                         ("--encode-workers", args.encode_workers), ("--extract-workers", args.extract_workers))
+        local_only = [option for option, value in local_options if value is not None]
+        if local_only:
+            parser.error(f"{', '.join(local_only)} 不能與 --service 一起使用（請在啟動分析服務時指定）")
+    return args
+
+def select_requirements(keys=None):
+    requirements = {RequirementBank.normalize_key(k): v for k, v in RequirementsLoader.load().items()}
+    if keys:
+        wanted = [RequirementBank.normalize_key(k) for k in keys.split(",") if k.strip()]
+        missing = [k for k in wanted if k not in requirements]
+        if missing:
+            logger.warning(f"找不到條款: {missing}")
+        requirements = {k: requirements[k] for k in wanted if k in requirements}
+    return requirements
+
+def output_dirs(folders, output_dir):
+    """每個資料夾對應一個輸出子目錄；資料夾名稱重複時加上序號"""
+    dirs = []
+    used = set()
+    for folder in folders:
+        name = os.path.basename(os.path.normpath(folder)) or "root"
+        candidate, n = name, 2
+        while candidate in used:
+            candidate, n = f"{name}_{n}", n + 1
+        used.add(candidate)
+        dirs.append(os.path.join(output_dir, candidate))
+    return dirs
+
+def rate(count, seconds):
+    return count / seconds if seconds > 0 else 0.0
+
+def print_stats(folder, stats):
+    print(f"[{folder}]")
+    print(f"  擷取: {stats.get('files', 0)} 個檔案（{stats.get('cached_files', 0)} 個命中快取），"
+          f"{stats.get('extract_seconds', 0.0):.2f} 秒，{rate(stats.get('files', 0), stats.get('extract_seconds', 0.0)):.1f} 檔案/秒")
+    print(f"  編碼: {stats.get('encoded_snippets', 0)} 個片段，{stats.get('encode_seconds', 0.0):.2f} 秒，"
+          f"{rate(stats.get('encoded_snippets', 0), stats.get('encode_seconds', 0.0)):.1f} 片段/秒")
+    print(f"  評分: {stats.get('snippets', 0)} 個片段，{stats.get('score_seconds', 0.0):.2f} 秒，"
+          f"{rate(stats.get('snippets', 0), stats.get('score_seconds', 0.0)):.1f} 片段/秒")
+    for item in stats.get("trace", {}).get("slowest_files", [])[:3]:
+        print(f"  耗時檔案: {item['file']}（{item['seconds']:.2f} 秒）")
+    if "worksheet_seconds" in stats:
+        print(f"  填表: {stats['worksheet_seconds']:.2f} 秒")
+    total = stats.get('total_seconds', 0.0)
+    print(f"  總計: {stats.get('results', 0)} 筆結果，{total:.2f} 秒，"
+          f"{rate(stats.get('files', 0), total):.1f} 檔案/秒，{rate(stats.get('snippets', 0), total):.1f} 片段/秒")
+    sys.stdout.flush()
+
+class ServiceAnalyzer:
+    """以常駐分析服務執行分析，介面與 Analyzer.analyze / last_stats 相同；服務只寫入自己的結果目錄，取回的結果寫入 output_path"""
+    def __init__(self, client):
+        self.client = client
+        self.last_stats = {}
+
+    def analyze(self, folder_path, requirements, threshold=0.5, mode=None, top_k=None, per_file_cap=None,
+                output_path=None, incremental=None):
+        job, results = self.client.analyze(os.path.abspath(folder_path), list(requirements), threshold=threshold,
+                                           mode=mode, top_k=top_k, per_file_cap=per_file_cap,
+                                           incremental=incremental)
+        Analyzer.write_results(output_path, results)
+        self.last_stats = job.get("stats") or {}
+        return results
+
+    def close(self):
+        pass
+
+def run(args):
+    if args.extract_workers is not None:
+        Config.EXTRACT_WORKERS = args.extract_workers
+    requirements = select_requirements(args.requirements)
+    if not requirements:
+        print("沒有可分析的條款", file=sys.stderr)
+        return 1
+
+    if args.service is not None:
+        client = ServiceClient(args.service or None)
+        if not client.is_available():
+            print(f"無法連線到分析服務 {client.url}", file=sys.stderr)
+            return 1
+        analyzer = ServiceAnalyzer(client)
+    else:
+        analyzer = Analyzer(args.model or 'models/all-MiniLM-L12-v2', quantize=args.int8 or None,
+                            encode_workers=args.encode_workers)
+    all_stats = {}
+    failed = False
+    try:
+        for folder, out_dir in zip(args.folders, output_dirs(args.folders, args.output_dir)):
+            if not os.path.isdir(folder):
+                print(f"[{folder}] 資料夾不存在", file=sys.stderr)
+                failed = True
+                continue
+            Config.ensure_dir(out_dir)
+            results_path = os.path.join(out_dir, "analysis_results.jsonl")
+            started = time.perf_counter()
+            try:
+                analyzer.analyze(folder, requirements, args.threshold, mode=args.mode, top_k=args.top_k,
+                                 per_file_cap=args.per_file_cap, output_path=results_path,
+                                 incremental=False if args.full else None)
+            except Exception as e:
+                logger.error(f"分析資料夾 {folder} 時發生錯誤: {e}")
+                print(f"[{folder}] 分析失敗: {e}", file=sys.stderr)
+                failed = True
+                continue
+            stats = dict(analyzer.last_stats, results_path=results_path)
+
+            if not args.no_worksheet:
+                worksheet_path = os.path.join(out_dir, "IEC62443_2_4d_filled.xlsx")
+                start = time.perf_counter()
+                success, message = WorksheetUpdater.update_worksheet(results_path, worksheet_path, args.template)
+                stats["worksheet_seconds"] = time.perf_counter() - start
+                stats["worksheet_path"] = worksheet_path if success else None
+                if not success:
+                    print(f"[{folder}] {message}", file=sys.stderr)
+                    failed = True
+
+            stats["total_seconds"] = time.perf_counter() - started
+            all_stats[folder] = stats
+            print_stats(folder, stats)
+    finally:
+        analyzer.close()
+
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump(all_stats, f, ensure_ascii=False, indent=4)
+    return 1 if failed else 0
+
+def main(argv=None):
+    return run(parse_args(argv))
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -18,9 +18,84 @@ class Config:
     
     # 使用 resource_path 處理需要打包的資源路徑
     REQUIREMENTS_FILE = resource_path(os.path.join("..", "requirements.json"))
-    ANALYSIS_OUTPUT = os.path.join(ROOT_DIR, "analysis_results.json")
+    ANALYSIS_OUTPUT = os.path.join(ROOT_DIR, "analysis_results.jsonl")
+    # 向量索引查詢的結果另存一檔，不覆寫完整分析的結果（與其檔案清單）
+    QUERY_OUTPUT = os.path.join(ROOT_DIR, "index_query_results.jsonl")
+    # 兩階段（BM25 預篩）分析的結果同樣另存，避免與完整分析的結果檔及檔案清單混用
+    PREFILTER_OUTPUT = os.path.join(ROOT_DIR, "prefiltered_results.jsonl")
     WORKSHEET_FILE = resource_path(os.path.join("..", "template", "IEC62443_2_4d_2024-worksheet.xlsx"))
     DOCX_CACHE_FILE = os.path.join(ROOT_DIR, "docx_contents.json")
+    VECTOR_INDEX_FILE = os.path.join(ROOT_DIR, "analysis_index.npz")
+
+    # CPU 推論時對模型 Linear 層做動態 int8 量化（可用 core/quantization.py 比對與 fp32 的差異）
+    QUANTIZE_INT8 = False
+
+    # 片段向量快取（以檔案內容雜湊 + 模型路徑為鍵）
+    EMBEDDING_CACHE_DIR = os.path.join(ROOT_DIR, "cache", "embeddings")
+    # 快取與索引中片段向量的儲存格式："float16"、"int8"（每列縮放）或 "float32"
+    EMBEDDING_DTYPE = "float16"
+    # 條款預先編碼向量庫（memory-map 載入，條款檔或模型變更時自動重建）
+    REQUIREMENT_BANK_FILE = os.path.join(ROOT_DIR, "cache", "requirement_bank.npy")
+
+    # 跨檔案批次編碼：每批片段數與累積多少片段後送出編碼
+    ENCODE_BATCH_SIZE = 64
+    ENCODE_POOL_SIZE = 4096
+    # 多行程編碼池：工作行程數（0 或 1 表示在主行程內編碼）與每個行程的 torch 執行緒數（None 表示平均分配 CPU 核心）
+    ENCODE_WORKERS = 0
+    ENCODE_THREADS_PER_WORKER = None
+    # 跨檔案片段去重：正規化後相同的片段只編碼、評分一次，LRU 最多保留的片段數
+    SNIPPET_DEDUP = True
+    DEDUP_MEMO_SIZE = 50000
+
+    # 多行程擷取：工作行程數（None 表示 CPU 核心數 - 1）與待消費結果佇列上限
+    EXTRACT_WORKERS = None
+    EXTRACT_QUEUE_SIZE = 64
+
+    # 相似度評分時每次矩陣乘法處理的片段數上限
+    SCORE_BLOCK_SIZE = 8192
+
+    # 結果選取方式："threshold" 保留所有超過門檻的組合；"topk" 每個條款只保留最相似的 TOP_K 筆
+    SELECTION_MODE = "threshold"
+    TOP_K_PER_REQUIREMENT = 20
+    # 同一檔案中每個條款最多保留的筆數（None 表示不限制）
+    MAX_HITS_PER_FILE = None
+
+    # 結果輸出：每寫入多少筆 flush 一次、每完成多少個檔案寫一次可續跑的檢查點
+    RESULTS_FLUSH_EVERY = 1000
+    CHECKPOINT_EVERY_FILES = 50
+    # 精簡輸出：片段與條款文字只寫一次，結果以 snippet_id 參照
+    COMPACT_RESULTS = True
+
+    # 增量分析：依結果檔旁的檔案清單（路徑、大小、修改時間、內容雜湊）只重新分析新增與變更的檔案
+    INCREMENTAL_ANALYSIS = True
+
+    # 語料向量索引：查詢時探訪的倒排清單數與每個條款回傳的片段數
+    INDEX_NPROBE = 8
+    INDEX_TOP_K = 10
+
+    # 兩階段檢索：BM25 關鍵字索引目錄、每個條款的候選片段數與 BM25 參數
+    LEXICAL_INDEX_DIR = os.path.join(ROOT_DIR, "cache", "lexical")
+    PREFILTER_SHORTLIST_SIZE = 200
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+
+    # 分析流程的計時追蹤：各區段（擷取、編碼批次、評分、寫入）以 JSON Lines 寫入此檔，分析結束時彙整最耗時的檔案數
+    TRACE_ENABLED = True
+    TRACE_FILE = os.path.join(LOG_DIR, "conformity_trace.jsonl")
+    TRACE_SLOWEST_FILES = 10
+
+    # 常駐分析服務（python -m conformity_analysis_module.service）：只監聽本機位址，
+    # 同時執行的工作數、等待中工作的上限、保留的已完成工作數與結果目錄（所有輸出都限制在此目錄之下）
+    SERVICE_HOST = "127.0.0.1"
+    SERVICE_PORT = 8765
+    SERVICE_WORKERS = 2
+    SERVICE_MAX_QUEUE = 32
+    SERVICE_JOB_HISTORY = 100
+    SERVICE_OUTPUT_DIR = os.path.join(ROOT_DIR, "service_results")
+    # 服務的存取權杖（服務第一次啟動時產生，只有目前使用者可讀），用戶端由此檔讀取
+    SERVICE_TOKEN_FILE = os.path.join(ROOT_DIR, "cache", "service_token")
+    # GUI 背景載入模型前先檢查服務，可以連線時改為把分析與查詢交給服務，不在本機載入模型
+    USE_ANALYSIS_SERVICE = True
 
     @staticmethod
     def ensure_dir(directory):
@@ -3,5 +3,25 @@ from .file_processor import FileProcessor
 from .analyzer import Analyzer
 from .worksheet_updater import WorksheetUpdater
 from .requirements_loader import RequirementsLoader
+from .embedding_cache import EmbeddingCache
+from .embedding_store import CompactEmbeddings
+from .batch_encoder import BatchEncoder
+from .encoder_pool import EncoderPool
+from .similarity_scorer import SimilarityScorer
+from .snippet_dedup import SnippetDeduper
+from .topk_collector import TopKCollector
+from .extraction_pool import ExtractionPool
+from .vector_index import VectorIndex
+from .lexical_index import LexicalIndex
+from .requirement_bank import RequirementBank
+from .folder_manifest import FolderManifest
+from .results_store import ResultsWriter, iter_analysis_results
+from .quantization import quantize_model, compare_quantized
 
-__all__ = ['FileProcessor', 'Analyzer', 'WorksheetUpdater', 'RequirementsLoader']
\ No newline at end of file
+__all__ = [
+    'FileProcessor', 'Analyzer', 'WorksheetUpdater', 'RequirementsLoader',
+    'EmbeddingCache', 'CompactEmbeddings', 'BatchEncoder', 'EncoderPool',
+    'SimilarityScorer', 'SnippetDeduper', 'TopKCollector',
+    'ExtractionPool', 'VectorIndex', 'LexicalIndex', 'RequirementBank', 'FolderManifest',
+    'ResultsWriter', 'iter_analysis_results', 'quantize_model', 'compare_quantized'
+]
\ No newline at end of file
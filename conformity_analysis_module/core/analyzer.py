@@ -1,59 +1,738 @@
 # core/analyzer.py
 import os
+import copy
 import json
-from sentence_transformers import SentenceTransformer, util
+import hashlib
+import time
+import threading
+import numpy as np
+from text_extraction import TextExtractor
 from conformity_analysis_module.core.file_processor import FileProcessor
+from conformity_analysis_module.core.embedding_cache import EmbeddingCache
+from conformity_analysis_module.core.embedding_store import CompactEmbeddings
+from conformity_analysis_module.core.batch_encoder import BatchEncoder
+from conformity_analysis_module.core.encoder_pool import EncoderPool
+from conformity_analysis_module.core.similarity_scorer import SimilarityScorer
+from conformity_analysis_module.core.snippet_dedup import SnippetDeduper
+from conformity_analysis_module.core.topk_collector import TopKCollector
+from conformity_analysis_module.core.extraction_pool import ExtractionPool
+from conformity_analysis_module.core.vector_index import VectorIndex
+from conformity_analysis_module.core.lexical_index import LexicalIndex
+from conformity_analysis_module.core.requirement_bank import RequirementBank
+from conformity_analysis_module.core.quantization import quantize_model
+from conformity_analysis_module.core.folder_manifest import FolderManifest
+from conformity_analysis_module.core.results_store import ResultsWriter, iter_analysis_results
 from conformity_analysis_module.utils.logger import logger
+from conformity_analysis_module.utils.tracer import Tracer
+from conformity_analysis_module.utils.file_lock import FileLock
 from conformity_analysis_module.config import Config
 
-class Analyzer:
-    def __init__(self, model_name='models/all-MiniLM-L12-v2'):
-        self.model = SentenceTransformer(model_name)
+# 語料向量索引的儲存依序進行：同一行程內的執行緒（常駐服務同時執行多個分析）以此鎖，
+# 不同行程（服務與同時執行的命令列分析）以索引檔旁的 FileLock
+_index_lock = threading.Lock()
 
-    def analyze(self, folder_path, requirements, threshold=0.5):
-        results = []
-        requirement_embeddings = {}
-        for req_key, req_text in requirements.items():
+class AnalysisRun:
+    """單次分析的狀態：條款評分器、top-k 收集器、向量索引、結果輸出與計時追蹤"""
+    def __init__(self, analyzer, requirements, req_vectors, threshold, mode, top_k, per_file_cap, writer, tracer):
+        self.analyzer = analyzer
+        self.tracer = tracer
+        self.requirements = requirements
+        self.req_keys = list(requirements.keys())
+        self.threshold = threshold
+        self.top_k = top_k
+        self.per_file_cap = per_file_cap
+        self.writer = writer
+        self.results = []
+        # 各階段的處理量與耗時（秒），供命令列工具輸出吞吐量
+        self.stats = {"files": 0, "cached_files": 0, "snippets": 0, "encoded_snippets": 0,
+                      "extract_seconds": 0.0, "encode_seconds": 0.0, "score_seconds": 0.0}
+        self.scorer = SimilarityScorer(self.req_keys, req_vectors, Config.SCORE_BLOCK_SIZE)
+        self.index_stamp = VectorIndex.file_stamp(Config.VECTOR_INDEX_FILE)
+        self.index = VectorIndex.load(Config.VECTOR_INDEX_FILE, analyzer.model_tag, Config.INDEX_NPROBE,
+                                      Config.EMBEDDING_DTYPE)
+        # 本次分析對索引的變更：("remove", 檔案) 或 ("add", 檔案, 內容雜湊, 片段, 向量)
+        self.index_changes = []
+        self.collector = TopKCollector(len(self.req_keys), top_k) if mode == "topk" else None
+        self.deduper = SnippetDeduper(Config.DEDUP_MEMO_SIZE) if Config.SNIPPET_DEDUP else None
+        self.write_seconds = 0.0
+        # 逐檔進度：progress(檔案, 已完成檔案數, 總檔案數, 已完成位元組, 總位元組)
+        self.progress = None
+        self.sizes = {}
+        self.done = self.total = self.done_bytes = self.total_bytes = 0
+        if self.collector is not None:
+            writer.state_provider = self.collector.dump
+
+    def make_result(self, req_key, snippet, score, file_path):
+        return {
+            "requirement": req_key,
+            "requirement_text": self.requirements[req_key],
+            "snippet": snippet,
+            "similarity": score,
+            "source_file": file_path
+        }
+
+    def score_file(self, file_path, content_hash, snippets, snippet_embeddings):
+        start = time.perf_counter()
+        write_seconds = 0.0
+        hits = 0
+        if self.index.add_file(file_path, content_hash, snippets, snippet_embeddings):
+            self.index_changes.append(("add", file_path, content_hash, snippets, snippet_embeddings))
+        try:
+            if self.collector is not None:
+                limit = min(self.top_k, self.per_file_cap) if self.per_file_cap else self.top_k
+                req_idx, snippet_idx, scores = self.file_hits(snippets, snippet_embeddings, limit)
+                hits = len(req_idx)
+                self.collector.offer(file_path, snippets, req_idx, snippet_idx, scores)
+            else:
+                req_idx, snippet_idx, scores = self.file_hits(snippets, snippet_embeddings, self.per_file_cap)
+                hits = len(req_idx)
+                write_start = time.perf_counter()
+                for r, i, score in zip(req_idx.tolist(), snippet_idx.tolist(), scores.tolist()):
+                    result = self.make_result(self.req_keys[r], snippets[i], score, file_path)
+                    self.results.append(result)
+                    self.writer.write(result)
+                write_seconds = time.perf_counter() - write_start
+        except Exception as e:
+            logger.error(f"計算相似度時發生錯誤: {e}")
+            return
+        finally:
+            seconds = time.perf_counter() - start
+            self.stats["score_seconds"] += seconds
+            self.write_seconds += write_seconds
+            self.tracer.record("score", seconds - write_seconds, file=file_path, snippets=len(snippets), hits=hits)
+        self.writer.mark_completed(file_path)
+
+    def file_hits(self, snippets, snippet_embeddings, limit):
+        """
+        回傳檔案中相似度 >= threshold、每個條款最多 limit 筆的 (條款索引, 片段索引, 相似度)。
+        啟用去重時，每個不重複的片段只評分一次，結果分送到它在各檔案中的每個出現位置。
+        """
+        if self.deduper is None or self.threshold is None:
+            if self.collector is not None:
+                return self.scorer.top_candidates(snippet_embeddings, limit, self.threshold)
+            return self.scorer.hits(snippet_embeddings, self.threshold, limit)
+
+        keys = self.deduper.keys(snippets)
+        known = {}
+        new = {}
+        for i, key in enumerate(keys):
+            if key in known or key in new:
+                continue
+            hits = self.deduper.get_hits(key)
+            if hits is None:
+                new[key] = i
+            else:
+                known[key] = hits
+
+        if new:
+            rows = list(new.values())
+            if isinstance(snippet_embeddings, CompactEmbeddings):
+                subset = snippet_embeddings.take(rows)
+            else:
+                subset = np.asarray(snippet_embeddings)[rows]
+            req_idx, row_idx, scores = self.scorer.hits(subset, self.threshold)
+            order = np.argsort(row_idx, kind='stable')
+            bounds = np.searchsorted(row_idx[order], np.arange(len(rows) + 1))
+            for j, key in enumerate(new):
+                selected = order[bounds[j]:bounds[j + 1]]
+                known[key] = (req_idx[selected], scores[selected])
+                self.deduper.put_hits(key, known[key])
+
+        counts = [len(known[key][0]) for key in keys]
+        req_idx = np.concatenate([known[key][0] for key in keys]).astype(np.int64, copy=False)
+        scores = np.concatenate([known[key][1] for key in keys])
+        snippet_idx = np.repeat(np.arange(len(keys)), counts)
+        return SimilarityScorer.limit_per_requirement(req_idx, snippet_idx, scores, limit)
+
+    def file_done(self, file_path):
+        """檔案處理完畢（完成評分、無片段或讀取失敗）時更新進度"""
+        self.done += 1
+        self.done_bytes += self.sizes.get(file_path) or 0
+        if self.progress is not None:
+            self.progress(file_path, self.done, self.total, self.done_bytes, self.total_bytes)
+
+    def drain(self, encoder):
+        files, pending = len(encoder.pending), encoder.pending_count
+        start = time.perf_counter()
+        encoded = encoder.flush()
+        seconds = time.perf_counter() - start
+        self.stats["encode_seconds"] += seconds
+        if files:
+            self.tracer.record("encode", seconds, files=files, snippets=pending)
+        for (file_path, content_hash), snippets, snippet_embeddings in encoded:
+            self.stats["encoded_snippets"] += len(snippets)
+            if snippet_embeddings is None:
+                logger.error(f"計算檔案 {file_path} 中片段向量時發生錯誤，略過此檔案")
+                self.file_done(file_path)
+                continue
+            # 轉為緊湊格式後再快取與評分，讓快取命中與首次分析的結果一致
+            snippet_embeddings = CompactEmbeddings.from_array(snippet_embeddings, self.analyzer.cache.dtype)
+            self.analyzer.cache.store(content_hash, snippets, snippet_embeddings)
+            self.score_file(file_path, content_hash, snippets, snippet_embeddings)
+            self.file_done(file_path)
+
+    def finish(self):
+        start = time.perf_counter()
+        if self.collector is not None:
+            self.results = [self.make_result(self.req_keys[r], snippet, score, file_path)
+                            for r, score, file_path, snippet in self.collector.items()]
+            for result in self.results:
+                self.writer.write(result)
+        self.writer.flush()
+        try:
+            size = os.path.getsize(self.writer.output_path)
+        except OSError:
+            size = None
+        # 逐檔寫入的時間在 score_file 中累計，與最後的寫入合併為一個 write 區段
+        self.tracer.record("write", self.write_seconds + time.perf_counter() - start,
+                           results=self.writer.count, bytes=size)
+        if self.collector is None and self.writer.resumed:
+            # 續跑時，先前已寫入的結果不在記憶體中，由輸出檔讀回
+            self.results = list(iter_analysis_results(self.writer.output_path))
+
+        with self.tracer.span("index_save", snippets=len(self.index)):
             try:
-                requirement_embeddings[req_key] = self.model.encode(req_text, convert_to_tensor=True)
+                self.save_index()
             except Exception as e:
-                logger.error(f"計算條款 {req_key} 向量時發生錯誤: {e}")
+                logger.error(f"儲存向量索引時發生錯誤: {e}")
+        return self.results
+
+    def prune_index(self, folder_path, current_files):
+        removed = self.index.prune_folder(folder_path, current_files)
+        self.index_changes.extend(("remove", file_path) for file_path in removed)
+        if removed:
+            logger.info(f"自向量索引移除 {len(removed)} 個已不存在的檔案")
+
+    def save_index(self):
+        """
+        儲存向量索引。索引在本次載入後若已被同時執行的其他分析（含其他行程）儲存過，
+        改為載入最新的索引再套用本次的變更，避免覆蓋其他分析加入或移除的檔案；
+        檢查、載入、合併到取代檔案都在跨行程的檔案鎖內完成。
+        """
+        path = Config.VECTOR_INDEX_FILE
+        with _index_lock, FileLock(path):
+            index = self.index
+            if VectorIndex.file_stamp(path) != self.index_stamp:
+                index = VectorIndex.load(path, self.analyzer.model_tag, Config.INDEX_NPROBE, Config.EMBEDDING_DTYPE)
+                for change in self.index_changes:
+                    if change[0] == "remove":
+                        index.remove_file(change[1])
+                    else:
+                        index.add_file(*change[1:])
+            index.save(path)
+            self.index = index
+
+class Analyzer:
+    SUPPORTED_EXTENSIONS = ('docx', 'xlsx', 'pdf')
+
+    def __init__(self, model_name='models/all-MiniLM-L12-v2', quantize=None, encode_workers=None, model=None):
+        """
+        model 可直接傳入已載入的模型（例如基準測試用的假模型），此時 model_name 只作為快取與索引的識別名稱，
+        且不使用量化與多行程編碼池。
+        """
+        self.model_name = model_name
+        self.quantize = False if model is not None else (Config.QUANTIZE_INT8 if quantize is None else quantize)
+        self.encode_workers = 0 if model is not None else (Config.ENCODE_WORKERS if encode_workers is None else encode_workers)
+        # int8 模型產生的向量與 fp32 不同，快取、索引與向量庫以 model_tag 區分
+        self.model_tag = f"{model_name}#int8" if self.quantize else model_name
+        self.cache = EmbeddingCache(self.model_tag)
+        # 模型與條款向量庫延遲到第一次使用（或 warm_up）時才載入，避免 import torch 拖慢啟動
+        self._model = model
+        self._encoder_pool = None
+        self._requirement_bank = None
+        self._load_lock = threading.Lock()
+        self.last_stats = {}  # 最近一次 analyze() 的各階段處理量與耗時
+        # 共用的擷取行程池（ExtractionPool.create_executor）；未設定時每次分析各自建立
+        self.extract_executor = None
 
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    logger.info(f"載入模型: {self.model_tag}")
+                    if self.quantize:
+                        # 動態量化只支援 CPU
+                        model = quantize_model(SentenceTransformer(self.model_name, device='cpu'))
+                    else:
+                        model = SentenceTransformer(self.model_name)
+                    self._model = model
+        return self._model
+
+    @property
+    def encoder(self):
+        """編碼後端：encode_workers > 1 時為多行程 EncoderPool，否則為行程內模型"""
+        if self.encode_workers and self.encode_workers > 1:
+            if self._encoder_pool is None:
+                with self._load_lock:
+                    if self._encoder_pool is None:
+                        self._encoder_pool = EncoderPool(self.model_name, self.encode_workers,
+                                                         Config.ENCODE_THREADS_PER_WORKER, self.quantize).start()
+            return self._encoder_pool
+        return self.model
+
+    @property
+    def requirement_bank(self):
+        if self._requirement_bank is None:
+            bank = RequirementBank(self.model_name, self.encode_texts,
+                                   variant="int8" if self.quantize else None).load()
+            with self._load_lock:
+                if self._requirement_bank is None:
+                    self._requirement_bank = bank
+        return self._requirement_bank
+
+    @property
+    def is_ready(self):
+        return (self._model is not None or self._encoder_pool is not None) and self._requirement_bank is not None
+
+    def warm_up(self):
+        """預先載入模型與條款向量庫，供背景執行緒呼叫"""
+        _ = self.encoder
+        _ = self.requirement_bank
+
+    def encode_texts(self, texts):
+        return self.encoder.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+
+    def share(self):
+        """
+        回傳共用已載入的模型、編碼池與條款向量庫的 Analyzer，各自保有 last_stats，
+        供常駐服務讓多個工作同時分析而只載入一份模型。只需對原本的 Analyzer 呼叫 close()。
+        """
+        other = copy.copy(self)
+        other.last_stats = {}
+        return other
+
+    def close(self):
+        """結束多行程編碼池（若有啟動）"""
+        if self._encoder_pool is not None:
+            self._encoder_pool.shutdown()
+            self._encoder_pool = None
+
+    @classmethod
+    def iter_target_files(cls, folder_path):
         for root, _, files in os.walk(folder_path):
             for file in files:
-                file_path = os.path.join(root, file)
                 ext = file.lower().split('.')[-1]
-                if ext not in ['docx', 'xlsx', 'pdf']:
-                    continue
-                logger.info(f"處理檔案: {file_path}")
-                snippets = FileProcessor.extract_text_snippets(file_path)
-                if not snippets:
-                    continue
+                if ext in cls.SUPPORTED_EXTENSIONS:
+                    yield os.path.join(root, file)
+
+    def run_key(self, folder_path, requirements, threshold, mode, top_k, per_file_cap):
+        """相同參數（含擷取器版本）的分析才能由檢查點續跑或沿用檔案清單"""
+        key = json.dumps([self.model_tag, TextExtractor.VERSION, os.path.abspath(folder_path), requirements,
+                          threshold, mode, top_k, per_file_cap], ensure_ascii=False)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def analyze(self, folder_path, requirements, threshold=0.5, mode=None, top_k=None, per_file_cap=None,
+                output_path=None, incremental=None, progress=None, cancel=None):
+        """
+        分析資料夾中的文件與條款的相似度，結果以 JSON Lines 逐筆寫入 output_path（預設 Config.ANALYSIS_OUTPUT）。
+        mode 為 "threshold" 時保留所有相似度 >= threshold 的組合；
+        為 "topk" 時每個條款只保留相似度最高的 top_k 筆（仍需 >= threshold），記憶體用量與語料大小無關。
+        per_file_cap 限制同一檔案中每個條款最多保留的筆數。未指定的參數使用 Config 的設定。
+        分析中斷後以相同參數再次執行，會由最後的檢查點繼續。
+        incremental 為 True 時（預設 Config.INCREMENTAL_ANALYSIS），依結果檔旁的檔案清單只分析新增與變更的檔案，
+        移除已刪除檔案的結果，再與既有結果合併。
+        各階段的計時區段寫入 Config.TRACE_FILE，彙整存於 last_stats["trace"]。
+        progress(檔案, 已完成檔案數, 總檔案數, 已完成位元組, 總位元組) 在每個檔案處理完畢後呼叫；
+        cancel() 回傳 True 時停止處理後續檔案，已完成檔案的結果照常寫入並回傳（last_stats["cancelled"] 為 True），
+        下次增量分析只會處理尚未完成的檔案。
+        """
+        with Tracer(Config.TRACE_FILE if Config.TRACE_ENABLED else None, Config.TRACE_SLOWEST_FILES) as tracer:
+            try:
+                return self._analyze(folder_path, requirements, threshold, mode, top_k, per_file_cap,
+                                     output_path, incremental, tracer, progress, cancel)
+            finally:
+                self.last_stats["trace"] = tracer.finish()
+
+    def _analyze(self, folder_path, requirements, threshold, mode, top_k, per_file_cap, output_path, incremental,
+                 tracer, progress=None, cancel=None):
+        mode = mode or Config.SELECTION_MODE
+        top_k = top_k or Config.TOP_K_PER_REQUIREMENT
+        per_file_cap = per_file_cap if per_file_cap is not None else Config.MAX_HITS_PER_FILE
+        output_path = output_path or Config.ANALYSIS_OUTPUT
+        incremental = Config.INCREMENTAL_ANALYSIS if incremental is None else incremental
+        started = time.perf_counter()
+        self.last_stats = {"files": 0, "snippets": 0, "results": 0, "cancelled": False}
+        try:
+            req_vectors = self.requirement_bank.vectors_for(requirements)
+        except Exception as e:
+            logger.error(f"計算條款向量時發生錯誤: {e}")
+            return []
+
+        params_key = self.run_key(folder_path, requirements, threshold, mode, top_k, per_file_cap)
+        manifest_path = f"{output_path}.manifest"
+        manifest = FolderManifest.load(manifest_path, params_key) if incremental else FolderManifest(manifest_path, params_key)
+        with tracer.span("discover", folder=folder_path) as span:
+            diff = manifest.diff(self.iter_target_files(folder_path))
+            span.update(files=len(diff.entries), added=len(diff.added), changed=len(diff.changed),
+                        deleted=len(diff.deleted))
 
+        delta = bool(manifest.entries) and os.path.exists(output_path)
+        if delta and mode == "topk" and diff.dropped:
+            # 移除舊結果後，未變更檔案中原本落選的片段可能遞補，無法只靠合併得到正確的 top-k
+            logger.info("top-k 模式下有檔案變更或刪除，改為完整分析（未變更的檔案使用向量快取）")
+            delta = False
+        if delta and not diff.has_changes:
+            logger.info("資料夾內容未變更，沿用既有分析結果")
+            manifest.save({p: e for p, e in diff.entries.items() if p in manifest.entries})
+            results = list(iter_analysis_results(output_path))
+            self.last_stats.update(results=len(results), total_seconds=time.perf_counter() - started)
+            return results
+
+        if delta:
+            logger.info(f"增量分析: 新增 {len(diff.added)} 個、變更 {len(diff.changed)} 個、刪除 {len(diff.deleted)} 個檔案")
+            file_paths = diff.added + diff.changed
+            run_output = f"{output_path}.delta"
+            run_key = hashlib.sha256(json.dumps([params_key, sorted(file_paths), sorted(diff.dropped)],
+                                                ensure_ascii=False).encode('utf-8')).hexdigest()
+        else:
+            manifest.remove()
+            file_paths = list(diff.entries)
+            run_output = output_path
+            run_key = params_key
+
+        seed_path = output_path if delta and mode == "topk" else None
+        sizes = {p: diff.entries[p]["size"] for p in file_paths}
+        results, completed, hashes = self._run(file_paths, requirements, req_vectors, threshold, mode, top_k,
+                                               per_file_cap, run_output, run_key, tracer,
+                                               (folder_path, list(diff.entries)), seed_path, sizes, progress, cancel)
+        if delta:
+            with tracer.span("merge") as span:
+                results = self._merge_delta(output_path, run_output, diff.dropped, replace=mode == "topk")
+                span["results"] = len(results)
+
+        processed = completed | (set(diff.unchanged) if delta else set())
+        try:
+            manifest.save({p: e for p, e in diff.entries.items() if p in processed}, hashes)
+        except Exception as e:
+            logger.error(f"儲存檔案清單時發生錯誤: {e}")
+
+        self.last_stats.update(results=len(results), total_seconds=time.perf_counter() - started)
+        if self.last_stats["cancelled"]:
+            logger.info(f"分析已取消，已完成 {len(completed)}/{len(file_paths)} 個檔案，保留 {len(results)} 筆結果")
+        else:
+            logger.info(f"分析完成，共找到 {len(results)} 筆符合結果")
+        return results
+
+    def _run(self, file_paths, requirements, req_vectors, threshold, mode, top_k, per_file_cap,
+             output_path, run_key, tracer, folder_files=None, seed_path=None, sizes=None, progress=None,
+             cancel=None):
+        """
+        分析指定的檔案並寫入 output_path，回傳 (結果, 已完成的檔案, {檔案: 內容雜湊})。
+        folder_files 為 (資料夾, 資料夾目前的檔案)，向量索引中該資料夾下已不存在的檔案會被移除
+        （不論是否為增量分析，完整重跑也不會留下已刪除檔案的片段）。
+        seed_path 為 top-k 增量分析時的既有結果，先放入收集器再與新檔案比較。
+        sizes 為 {檔案: 大小}，供進度回報估算剩餘位元組。
+        """
+        writer = ResultsWriter(output_path, run_key, Config.RESULTS_FLUSH_EVERY, Config.CHECKPOINT_EVERY_FILES,
+                               compact=Config.COMPACT_RESULTS)
+        hashes = {}
+        with writer:
+            run = AnalysisRun(self, requirements, req_vectors, threshold, mode, top_k, per_file_cap, writer, tracer)
+            if folder_files is not None:
+                run.prune_index(*folder_files)
+            if run.collector is not None:
+                if writer.state:
+                    run.collector.load(writer.state)
+                elif seed_path:
+                    rows = {key: r for r, key in enumerate(run.req_keys)}
+                    run.collector.load([[rows[item["requirement"]], item["similarity"], item["source_file"], item["snippet"]]
+                                        for item in iter_analysis_results(seed_path) if item["requirement"] in rows])
+
+            run.progress = progress
+            run.sizes = sizes or {}
+            run.total = len(file_paths)
+            run.total_bytes = sum(run.sizes.get(p) or 0 for p in file_paths)
+            for file_path in file_paths:
+                if file_path in writer.completed_files:
+                    run.done += 1
+                    run.done_bytes += run.sizes.get(file_path) or 0
+            if progress is not None:
+                # 開始處理前先回報一次，檔案路徑為空字串
+                progress("", run.done, run.total, run.done_bytes, run.total_bytes)
+
+            file_paths = (p for p in file_paths if p not in writer.completed_files)
+            encoder = BatchEncoder(self.encoder, Config.ENCODE_BATCH_SIZE, Config.ENCODE_POOL_SIZE, run.deduper, tracer)
+            pool = ExtractionPool(self.cache, Config.EXTRACT_WORKERS, Config.EXTRACT_QUEUE_SIZE, self.extract_executor)
+            items = pool.imap(file_paths)
+            while True:
+                if cancel is not None and cancel():
+                    # 尚未編碼的檔案不標記為完成，下次分析時重新處理
+                    logger.info(f"收到取消要求，捨棄 {len(encoder.pending)} 個待編碼的檔案")
+                    encoder.discard()
+                    self.last_stats["cancelled"] = True
+                    break
+                # 等待擷取結果的時間（單行程時即為擷取本身的耗時）
+                wait = time.perf_counter()
+                item = next(items, None)
+                run.stats["extract_seconds"] += time.perf_counter() - wait
+                if item is None:
+                    break
+                file_path, content_hash, snippets, cached, error, seconds = item
+                logger.info(f"處理檔案: {file_path}")
                 try:
-                    snippet_embeddings = self.model.encode(snippets, convert_to_tensor=True)
-                except Exception as e:
-                    logger.error(f"計算檔案 {file_path} 中片段向量時發生錯誤: {e}")
+                    size = os.path.getsize(file_path)
+                except OSError:
+                    size = None
+                if error:
+                    logger.error(f"讀取檔案 {file_path} 時發生錯誤: {error}")
+                    tracer.record("extract", seconds, file=file_path, bytes=size, error=error)
+                    run.file_done(file_path)
                     continue
+                hashes[file_path] = content_hash
+                run.stats["files"] += 1
 
-                for req_key, req_embedding in requirement_embeddings.items():
-                    try:
-                        cosine_scores = util.cos_sim(req_embedding, snippet_embeddings)[0].cpu().numpy()
-                    except Exception as e:
-                        logger.error(f"計算相似度時發生錯誤: {e}")
+                if cached:
+                    entry = self.cache.load(content_hash)
+                    if entry is not None:
+                        snippets, snippet_embeddings = entry
+                        tracer.record("extract", seconds, file=file_path, bytes=size, snippets=len(snippets),
+                                      cached=True)
+                        run.stats["cached_files"] += 1
+                        run.stats["snippets"] += len(snippets)
+                        if snippets:
+                            run.score_file(file_path, content_hash, snippets, snippet_embeddings)
+                        else:
+                            writer.mark_completed(file_path)
+                        run.file_done(file_path)
                         continue
+                    # 快取項目損毀時改為在此重新擷取
+                    start = time.perf_counter()
+                    snippets = FileProcessor.extract_text_snippets(file_path, content_hash)
+                    seconds += time.perf_counter() - start
+
+                tracer.record("extract", seconds, file=file_path, bytes=size, snippets=len(snippets), cached=False)
+                run.stats["snippets"] += len(snippets)
+                if not snippets:
+                    self.cache.store(content_hash, [], np.zeros((0, 0), dtype=np.float32))
+                    writer.mark_completed(file_path)
+                    run.file_done(file_path)
+                    continue
+
+                encoder.add((file_path, content_hash), snippets)
+                if encoder.is_full():
+                    run.drain(encoder)
+            # 取消時提早結束擷取管線（停止生產者與行程池）
+            items.close()
+            run.drain(encoder)
+            results = run.finish()
+        if run.deduper is not None and run.deduper.total:
+            logger.info(f"片段去重: 共 {run.deduper.total} 個待編碼片段，實際編碼 {run.deduper.encoded} 個"
+                        f"（節省 {run.deduper.saved_ratio:.1%}）")
+        self.last_stats.update(run.stats)
+        return results, set(writer.completed_files), hashes
+
+    @staticmethod
+    def _merge_delta(output_path, delta_path, dropped, replace=False):
+        """
+        將增量分析的結果併入既有結果檔：移除 dropped 檔案的舊結果後附加新結果；
+        replace 為 True 時（top-k 模式）增量結果已是完整結果，直接取代。
+        """
+        if replace:
+            os.replace(delta_path, output_path)
+        else:
+            tmp_path = f"{output_path}.tmp"
+            with ResultsWriter(tmp_path, flush_every=Config.RESULTS_FLUSH_EVERY, compact=Config.COMPACT_RESULTS) as writer:
+                for result in iter_analysis_results(output_path):
+                    if result.get("source_file") not in dropped:
+                        writer.write(result)
+                for result in iter_analysis_results(delta_path):
+                    writer.write(result)
+            os.replace(tmp_path, output_path)
+            os.remove(delta_path)
+        return list(iter_analysis_results(output_path))
+
+    @staticmethod
+    def write_results(output_path, results):
+        """
+        寫入不是由 analyze() 產生的結果（索引查詢、兩階段分析）。輸出檔旁若有完整分析的檔案清單或檢查點則一併移除，
+        否則下次以相同參數分析時會把這些結果當成完整結果沿用，或由不相符的檢查點續跑。
+        """
+        for suffix in (".manifest", ".checkpoint"):
+            if os.path.exists(f"{output_path}{suffix}"):
+                logger.info(f"{output_path} 將被覆寫，移除其{'檔案清單' if suffix == '.manifest' else '檢查點'}")
+                os.remove(f"{output_path}{suffix}")
+        with ResultsWriter(output_path, compact=Config.COMPACT_RESULTS) as writer:
+            for result in results:
+                writer.write(result)
+
+    def lexical_index(self, folder_path):
+        """載入（必要時更新）資料夾的關鍵字索引；只重新擷取新增、大小或修改時間有變動、或由其他版本擷取器擷取的檔案"""
+        folder_key = hashlib.sha256(os.path.abspath(folder_path).encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(Config.LEXICAL_INDEX_DIR, f"{folder_key}.npz")
+        index = LexicalIndex.load(path, Config.BM25_K1, Config.BM25_B)
+
+        current = {}
+        for file_path in self.iter_target_files(folder_path):
+            try:
+                current[file_path] = dict(FolderManifest.stat_entry(file_path), extractor=TextExtractor.VERSION)
+            except OSError as e:
+                logger.error(f"無法讀取檔案資訊 {file_path}: {e}")
+        unchanged = [p for p, entry in current.items() if p in index.files
+                     and all(index.files[p].get(k) == entry[k] for k in ("size", "mtime_ns", "extractor"))]
+        if len(unchanged) == len(current) == len(index.files):
+            return index
 
-                    for idx, score in enumerate(cosine_scores):
-                        if score >= threshold:
-                            results.append({
-                                "requirement": req_key,
-                                "requirement_text": requirements[req_key],
-                                "snippet": snippets[idx],
-                                "similarity": float(score),
-                                "source_file": file_path
-                            })
-
-        with open(Config.ANALYSIS_OUTPUT, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=4)
-        logger.info(f"分析完成，共找到 {len(results)} 筆符合結果")
-        return results
\ No newline at end of file
+        entries = [(p, {k: index.files[p][k] for k in ("size", "mtime_ns", "hash", "extractor")},
+                    index.snippets[index.files[p]["start"]:index.files[p]["end"]]) for p in unchanged]
+        kept = set(unchanged)
+        pool = ExtractionPool(self.cache, Config.EXTRACT_WORKERS, Config.EXTRACT_QUEUE_SIZE, self.extract_executor)
+        for file_path, content_hash, snippets, cached, error, _ in pool.imap(p for p in current if p not in kept):
+            if error:
+                logger.error(f"讀取檔案 {file_path} 時發生錯誤: {error}")
+                continue
+            if cached:
+                entry = self.cache.load(content_hash)
+                snippets = entry[0] if entry is not None else FileProcessor.extract_text_snippets(file_path, content_hash)
+            entries.append((file_path, dict(current[file_path], hash=content_hash), snippets))
+
+        index = LexicalIndex.build(entries, Config.BM25_K1, Config.BM25_B)
+        try:
+            Config.ensure_dir(Config.LEXICAL_INDEX_DIR)
+            index.save(path)
+        except Exception as e:
+            logger.error(f"儲存關鍵字索引時發生錯誤: {e}")
+        return index
+
+    def _snippet_vectors(self, index, rows):
+        """回傳 {片段列: 向量}；所屬檔案已在向量快取中者直接讀取，其餘片段才送去編碼"""
+        vectors = {}
+        by_file = {}
+        for row in rows:
+            by_file.setdefault(index.source_file(row), []).append(row)
+
+        missing = []
+        for file_path, file_rows in by_file.items():
+            info = index.files[file_path]
+            entry = self.cache.load(info["hash"]) if info.get("hash") else None
+            if entry is not None and entry[0] == index.snippets[info["start"]:info["end"]]:
+                vectors.update(zip(file_rows, entry[1].take([row - info["start"] for row in file_rows])))
+            else:
+                missing.extend(file_rows)
+
+        if missing:
+            deduper = SnippetDeduper(Config.DEDUP_MEMO_SIZE) if Config.SNIPPET_DEDUP else None
+            encoder = BatchEncoder(self.encoder, Config.ENCODE_BATCH_SIZE, Config.ENCODE_POOL_SIZE, deduper)
+            for start in range(0, len(missing), Config.ENCODE_POOL_SIZE):
+                chunk = missing[start:start + Config.ENCODE_POOL_SIZE]
+                encoder.add(None, [index.snippets[row] for row in chunk])
+                for _, _, embeddings in encoder.flush():
+                    if embeddings is None:
+                        logger.error(f"編碼 {len(chunk)} 個候選片段時發生錯誤，已略過")
+                    else:
+                        vectors.update(zip(chunk, embeddings))
+        return vectors
+
+    def analyze_prefiltered(self, folder_path, requirements, threshold=0.5, shortlist_size=None, top_k=None,
+                            output_path=None):
+        """
+        兩階段分析：先以 BM25 關鍵字索引為每個條款挑出 shortlist_size 個候選片段
+        （預設 Config.PREFILTER_SHORTLIST_SIZE），再只對候選片段計算向量相似度，
+        保留相似度 >= threshold 者（指定 top_k 時每個條款最多 top_k 筆），結果寫入 output_path（預設 Config.PREFILTER_OUTPUT）。
+        適合以少數條款查詢大型資料庫；召回率可用 prefilter_recall() 與完整比對比較。
+        """
+        shortlist_size = shortlist_size or Config.PREFILTER_SHORTLIST_SIZE
+        req_keys = list(requirements.keys())
+        try:
+            req_vectors = SimilarityScorer.normalize(self.requirement_bank.vectors_for(requirements))
+        except Exception as e:
+            logger.error(f"計算條款向量時發生錯誤: {e}")
+            return []
+
+        index = self.lexical_index(folder_path)
+        start = time.perf_counter()
+        shortlists = [index.shortlist(requirements[key], shortlist_size) for key in req_keys]
+        candidates = sorted(set(np.concatenate(shortlists).tolist())) if shortlists else []
+        vectors = self._snippet_vectors(index, candidates)
+
+        results = []
+        for r, (req_key, rows) in enumerate(zip(req_keys, shortlists)):
+            rows = [row for row in rows.tolist() if row in vectors]
+            if not rows:
+                continue
+            scores = SimilarityScorer.normalize(np.stack([vectors[row] for row in rows])) @ req_vectors[r]
+            order = [i for i in np.argsort(-scores, kind='stable') if scores[i] >= threshold][:top_k]
+            for i in order:
+                results.append({
+                    "requirement": req_key,
+                    "requirement_text": requirements[req_key],
+                    "snippet": index.snippets[rows[i]],
+                    "similarity": float(scores[i]),
+                    "source_file": index.source_file(rows[i])
+                })
+
+        self.write_results(output_path or Config.PREFILTER_OUTPUT, results)
+        logger.info(f"兩階段分析完成: {len(index)} 個片段中比對 {len(candidates)} 個候選，"
+                    f"共找到 {len(results)} 筆結果，耗時 {time.perf_counter() - start:.3f} 秒")
+        return results
+
+    def prefilter_recall(self, folder_path, requirements, shortlist_sizes=None, threshold=0.5):
+        """
+        以完整比對（對所有片段計算相似度）為基準，回傳各候選數下兩階段檢索的召回率報告：
+        召回率 = 候選名單涵蓋的完整比對命中數 / 完整比對命中數（相似度 >= threshold）。
+        """
+        shortlist_sizes = shortlist_sizes or [Config.PREFILTER_SHORTLIST_SIZE]
+        req_keys = list(requirements.keys())
+        req_vectors = self.requirement_bank.vectors_for(requirements)
+        index = self.lexical_index(folder_path)
+
+        start = time.perf_counter()
+        vectors = self._snippet_vectors(index, range(len(index)))
+        rows = np.array(sorted(vectors), dtype=np.int64)
+        scores = SimilarityScorer(req_keys, req_vectors).score(np.stack([vectors[row] for row in rows])) \
+            if len(rows) else np.zeros((len(req_keys), 0), dtype=np.float32)
+        hits = [set(rows[scores[r] >= threshold].tolist()) for r in range(len(req_keys))]
+        total = sum(len(h) for h in hits)
+        report = {
+            "snippets": len(index),
+            "requirements": len(req_keys),
+            "threshold": threshold,
+            "brute_force_hits": total,
+            "brute_force_seconds": time.perf_counter() - start,
+            "shortlists": []
+        }
+
+        for size in shortlist_sizes:
+            start = time.perf_counter()
+            shortlists = [set(index.shortlist(requirements[key], size).tolist()) for key in req_keys]
+            seconds = time.perf_counter() - start
+            per_requirement = [len(h & s) / len(h) for h, s in zip(hits, shortlists) if h]
+            report["shortlists"].append({
+                "shortlist_size": size,
+                "candidates": sum(len(s) for s in shortlists),
+                "recall": sum(len(h & s) for h, s in zip(hits, shortlists)) / total if total else None,
+                "mean_recall": float(np.mean(per_requirement)) if per_requirement else None,
+                "min_recall": min(per_requirement) if per_requirement else None,
+                "bm25_seconds": seconds
+            })
+        logger.info(f"兩階段檢索召回率: {report['shortlists']}")
+        return report
+
+    def query_index(self, requirements, folder_path=None, top_k=None, output_path=None):
+        """
+        以已建立的語料向量索引回答條款查詢（每個條款取前 top_k 個片段），不重新掃描資料夾。
+        folder_path 可限制只回傳該資料夾下的檔案。結果寫入 output_path（預設 Config.QUERY_OUTPUT）。
+        """
+        index = VectorIndex.load(Config.VECTOR_INDEX_FILE, self.model_tag, Config.INDEX_NPROBE)
+        if len(index) == 0:
+            logger.warning("向量索引為空，請先執行完整分析")
+            return []
+
+        req_keys = list(requirements.keys())
+        req_vectors = self.requirement_bank.vectors_for(requirements)
+        hits = index.search(req_vectors, top_k or Config.INDEX_TOP_K, folder_path=folder_path)
+
+        results = []
+        for req_key, req_hits in zip(req_keys, hits):
+            for score, meta in req_hits:
+                results.append({
+                    "requirement": req_key,
+                    "requirement_text": requirements[req_key],
+                    "snippet": meta["snippet"],
+                    "similarity": score,
+                    "source_file": meta["source_file"]
+                })
+        self.write_results(output_path or Config.QUERY_OUTPUT, results)
+        logger.info(f"索引查詢完成，共找到 {len(results)} 筆結果，查詢耗時 {index.stats['query_seconds']:.4f} 秒")
+        return results
@@ -0,0 +1,127 @@
+# core/batch_encoder.py
+import time
+import numpy as np
+from conformity_analysis_module.utils.logger import logger
+
+class BatchEncoder:
+    """
+    跨檔案的批次編碼器。
+    先累積多個檔案的片段，依長度排序後切成固定大小的批次送入模型，
+    讓長度相近的片段共用一批（減少 padding），最後再把向量分回各來源檔案。
+    model 為 EncoderPool 時，所有批次會先一起分派給工作行程再依序收回。
+    指定 deduper（SnippetDeduper）時，重複的片段只編碼一次，向量再複製到每個出現位置。
+    指定 tracer（Tracer）時，每個批次記錄一個 encode_batch 區段（多行程時為等待該批次結果的時間）。
+    """
+    def __init__(self, model, batch_size=64, pool_size=4096, deduper=None, tracer=None):
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.pool_size = max(1, pool_size)
+        self.deduper = deduper
+        self.tracer = tracer
+        self.pending = []
+        self.pending_count = 0
+
+    def add(self, key, snippets):
+        self.pending.append((key, snippets))
+        self.pending_count += len(snippets)
+
+    def is_full(self):
+        return self.pending_count >= self.pool_size
+
+    def discard(self):
+        """捨棄尚未編碼的片段（例如分析取消時）"""
+        self.pending, self.pending_count = [], 0
+
+    def flush(self):
+        """編碼所有暫存片段，回傳 [(key, snippets, embeddings)]；編碼失敗的檔案 embeddings 為 None"""
+        if not self.pending:
+            return []
+        pending, self.pending, self.pending_count = self.pending, [], 0
+
+        texts = [snippet for _, snippets in pending for snippet in snippets]
+        embeddings = None
+        failed = np.zeros(len(texts), dtype=bool)
+
+        # 去重：每個正規化後相同的片段只編碼第一次出現者，先前已編碼過的直接取用
+        keys = None
+        first = {}
+        known = {}
+        if self.deduper is not None:
+            keys = self.deduper.keys(texts)
+            for i, key in enumerate(keys):
+                if key in first or key in known:
+                    continue
+                vector = self.deduper.get_embedding(key)
+                if vector is not None:
+                    known[key] = vector
+                else:
+                    first[key] = i
+            to_encode = list(first.values())
+            self.deduper.total += len(texts)
+            self.deduper.encoded += len(to_encode)
+        else:
+            to_encode = range(len(texts))
+
+        order = sorted(to_encode, key=lambda i: len(texts[i]))
+        # 成功編碼的批次才清除失敗標記（批次未能送出時整批視為失敗）
+        failed[order] = True
+        batches = [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+        for batch_idx, result in zip(batches, self._encode_batches([[texts[i] for i in b] for b in batches])):
+            start = time.perf_counter()
+            try:
+                vectors = result()
+            except Exception as e:
+                logger.error(f"批次編碼 {len(batch_idx)} 個片段時發生錯誤: {e}")
+                continue
+            finally:
+                if self.tracer is not None:
+                    self.tracer.record("encode_batch", time.perf_counter() - start, snippets=len(batch_idx),
+                                       chars=sum(len(texts[i]) for i in batch_idx))
+            if embeddings is None:
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            embeddings[batch_idx] = vectors
+            failed[batch_idx] = False
+
+        if keys is not None:
+            if embeddings is None and known:
+                embeddings = np.empty((len(texts), len(next(iter(known.values())))), dtype=np.float32)
+            for key, i in first.items():
+                if not failed[i] and embeddings is not None:
+                    self.deduper.put_embedding(key, embeddings[i].copy())
+            if embeddings is not None:
+                for i, key in enumerate(keys):
+                    src = first.get(key)
+                    if src is None:
+                        embeddings[i] = known[key]
+                    elif src != i:
+                        embeddings[i] = embeddings[src]
+                        failed[i] = failed[src]
+
+        encoded = []
+        offset = 0
+        for key, snippets in pending:
+            end = offset + len(snippets)
+            if embeddings is None or failed[offset:end].any():
+                encoded.append((key, snippets, None))
+            else:
+                encoded.append((key, snippets, embeddings[offset:end]))
+            offset = end
+        return encoded
+
+    def _encode_batches(self, batches):
+        """依序回傳每個批次的取值函式；多行程編碼池先一次送出全部批次"""
+        if hasattr(self.model, 'submit'):
+            futures = []
+            try:
+                for batch in batches:
+                    futures.append(self.model.submit(batch, len(batch)))
+            except Exception as e:
+                # 未送出的批次沒有向量，整批視為失敗
+                logger.error(f"分派編碼批次時發生錯誤: {e}")
+                for future in futures:
+                    future.cancel()
+                return []
+            return [future.result for future in futures]
+        return [lambda batch=batch: self.model.encode(batch, batch_size=len(batch), convert_to_numpy=True,
+                                                      show_progress_bar=False)
+                for batch in batches]
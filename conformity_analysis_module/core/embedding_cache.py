@@ -0,0 +1,74 @@
+# core/embedding_cache.py
+import os
+import threading
+import json
+import hashlib
+import numpy as np
+from text_extraction import TextExtractor, file_hash
+from conformity_analysis_module.core.embedding_store import CompactEmbeddings
+from conformity_analysis_module.utils.logger import logger
+from conformity_analysis_module.config import Config
+
+class EmbeddingCache:
+    """
+    片段向量的磁碟快取。
+    鍵為 (檔案內容雜湊, 片段索引, 模型路徑, 擷取器版本)：每個檔案內容 + 模型對應一筆 .npz，擷取器輸出改變（版本遞增）後舊項目不再命中；
+    其中第 i 列向量即為第 i 個片段，未變更的檔案可直接略過擷取與編碼。
+    向量以 Config.EMBEDDING_DTYPE 的緊湊格式儲存，讀取時回傳 CompactEmbeddings。
+    """
+    def __init__(self, model_name, cache_dir=None, dtype=None):
+        self.model_name = model_name
+        self.cache_dir = cache_dir or Config.EMBEDDING_CACHE_DIR
+        self.dtype = dtype or Config.EMBEDDING_DTYPE
+        Config.ensure_dir(self.cache_dir)
+
+    @staticmethod
+    def file_hash(file_path, chunk_size=1 << 20):
+        # 與擷取文字快取使用相同的雜湊，擷取時可直接沿用
+        return file_hash(file_path, chunk_size)
+
+    def _entry_path(self, content_hash):
+        key = hashlib.sha256(f"{self.model_name}\0{TextExtractor.VERSION}\0{content_hash}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npz")
+
+    def contains(self, content_hash):
+        return os.path.exists(self._entry_path(content_hash))
+
+    def load(self, content_hash):
+        """回傳 (snippets, CompactEmbeddings)，未命中時回傳 None"""
+        path = self._entry_path(content_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if str(data['model']) != self.model_name or str(data['content_hash']) != content_hash:
+                    return None
+                snippets = json.loads(data['snippets'].tobytes().decode('utf-8'))
+                embeddings = CompactEmbeddings.from_arrays(data)
+        except Exception as e:
+            logger.warning(f"讀取向量快取 {path} 失敗，將重新計算: {e}")
+            return None
+        if len(snippets) != len(embeddings):
+            return None
+        return snippets, embeddings
+
+    def store(self, content_hash, snippets, embeddings):
+        if not isinstance(embeddings, CompactEmbeddings):
+            embeddings = CompactEmbeddings.from_array(embeddings, self.dtype)
+        path = self._entry_path(content_hash)
+        Config.ensure_dir(os.path.dirname(path))
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    model=np.array(self.model_name),
+                    content_hash=np.array(content_hash),
+                    snippets=np.frombuffer(json.dumps(snippets, ensure_ascii=False).encode('utf-8'), dtype=np.uint8),
+                    **embeddings.to_arrays()
+                )
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"寫入向量快取 {path} 失敗: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,159 @@
+# core/embedding_store.py
+import json
+import numpy as np
+
+def iter_blocks(embeddings, block_size):
+    """依序回傳 (起始列, float32 區塊)；可接受 CompactEmbeddings 或一般陣列"""
+    if isinstance(embeddings, CompactEmbeddings):
+        yield from embeddings.iter_blocks(block_size)
+        return
+    for start in range(0, len(embeddings), block_size):
+        yield start, np.asarray(embeddings[start:start + block_size], dtype=np.float32)
+
+class CompactEmbeddings:
+    """
+    以緊湊格式保存的片段向量：連續的 float16 陣列，或 int8 陣列加上每列的縮放係數。
+    另以偏移表記錄每個鍵（例如來源檔案）對應的列範圍 [start, end)。
+    只有在取用或逐區塊評分時才轉回 float32，向量佔用的記憶體約為 float32 的 1/2（float16）或 1/4（int8）。
+    """
+    DTYPES = ('float32', 'float16', 'int8')
+
+    def __init__(self, dtype='float16', dim=0):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"不支援的向量格式: {dtype}")
+        self.dtype = dtype
+        self.size = 0
+        self._data = np.zeros((0, dim), dtype=np.int8 if dtype == 'int8' else dtype)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self.offsets = {}  # key -> (start, end)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def dim(self):
+        return self._data.shape[1]
+
+    @property
+    def data(self):
+        return self._data[:self.size]
+
+    @property
+    def scales(self):
+        return self._scales[:self.size]
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (self.scales.nbytes if self.dtype == 'int8' else 0)
+
+    def _quantize(self, embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.dtype != 'int8':
+            return embeddings.astype(self.dtype), None
+        scales = np.abs(embeddings).max(axis=1) / 127.0 if embeddings.size else np.zeros(len(embeddings), dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        data = np.clip(np.rint(embeddings / scales[:, np.newaxis]), -127, 127).astype(np.int8)
+        return data, scales
+
+    def _reserve(self, rows, dim):
+        """以倍增方式擴充緩衝區，讓逐檔附加的總成本維持線性"""
+        needed = self.size + rows
+        if needed <= len(self._data) and self._data.shape[1] == dim:
+            return
+        capacity = max(needed, 2 * len(self._data), 256)
+        data = np.empty((capacity, dim), dtype=self._data.dtype)
+        scales = np.ones(capacity, dtype=np.float32)
+        if self.size:
+            data[:self.size] = self.data
+            scales[:self.size] = self.scales
+        self._data, self._scales = data, scales
+
+    def append(self, embeddings, key=None):
+        """附加一組向量並回傳其列範圍；指定 key 時記錄於偏移表"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings[np.newaxis, :]
+        start = self.size
+        if len(embeddings):
+            data, scales = self._quantize(embeddings)
+            self._reserve(len(data), data.shape[1])
+            self._data[start:start + len(data)] = data
+            if scales is not None:
+                self._scales[start:start + len(data)] = scales
+            self.size += len(data)
+        if key is not None:
+            self.offsets[key] = (start, self.size)
+        return start, self.size
+
+    @classmethod
+    def from_array(cls, embeddings, dtype='float16'):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        store = cls(dtype, embeddings.shape[1] if embeddings.ndim == 2 else 0)
+        store.append(embeddings)
+        return store
+
+    def _upcast(self, data, scales):
+        block = data.astype(np.float32)
+        if self.dtype == 'int8':
+            block *= scales[:, np.newaxis]
+        return block
+
+    def rows(self, start, end):
+        """回傳 [start, end) 列的 float32 向量"""
+        return self._upcast(self._data[start:end], self._scales[start:end])
+
+    def take(self, indices):
+        """回傳指定列的 float32 向量"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return self._upcast(self._data[indices], self._scales[indices])
+
+    def segment(self, key):
+        start, end = self.offsets[key]
+        return self.rows(start, end)
+
+    def to_float32(self):
+        return self.rows(0, self.size)
+
+    def iter_blocks(self, block_size):
+        for start in range(0, self.size, block_size):
+            yield start, self.rows(start, min(start + block_size, self.size))
+
+    def subset(self, indices):
+        """只保留指定列（不重新量化），偏移表依新位置調整，範圍內已無列的鍵會被移除"""
+        indices = np.sort(np.asarray(indices, dtype=np.int64))
+        store = CompactEmbeddings(self.dtype, self.dim)
+        store._data = self._data[indices]
+        store._scales = self._scales[indices]
+        store.size = len(indices)
+        for key, (start, end) in self.offsets.items():
+            new_start, new_end = np.searchsorted(indices, [start, end])
+            if new_end > new_start:
+                store.offsets[key] = (int(new_start), int(new_end))
+        return store
+
+    def to_arrays(self, prefix='embeddings'):
+        """轉為可用 np.savez 儲存的陣列字典"""
+        keys = list(self.offsets)
+        return {
+            prefix: self.data,
+            f"{prefix}_dtype": np.array(self.dtype),
+            f"{prefix}_scales": self.scales if self.dtype == 'int8' else np.zeros(0, dtype=np.float32),
+            f"{prefix}_offset_keys": np.frombuffer(json.dumps(keys, ensure_ascii=False).encode('utf-8'), dtype=np.uint8),
+            f"{prefix}_offsets": np.array([self.offsets[k] for k in keys], dtype=np.int64).reshape(-1, 2)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix='embeddings'):
+        """由 to_arrays() 的結果（或 np.load 的 NpzFile）還原；舊版只存 float32 陣列時亦可讀取"""
+        names = arrays.files if hasattr(arrays, 'files') else arrays.keys()
+        data = np.asarray(arrays[prefix])
+        dtype = str(arrays[f"{prefix}_dtype"]) if f"{prefix}_dtype" in names else 'float32'
+        store = cls(dtype, data.shape[1] if data.ndim == 2 else 0)
+        store._data = data.astype(store._data.dtype, copy=False)
+        store.size = len(data)
+        store._scales = (np.asarray(arrays[f"{prefix}_scales"], dtype=np.float32) if dtype == 'int8'
+                         else np.ones(len(data), dtype=np.float32))
+        if f"{prefix}_offset_keys" in names:
+            keys = json.loads(arrays[f"{prefix}_offset_keys"].tobytes().decode('utf-8'))
+            store.offsets = {k: (int(s), int(e)) for k, (s, e) in zip(keys, arrays[f"{prefix}_offsets"])}
+        return store
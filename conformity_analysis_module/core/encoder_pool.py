@@ -0,0 +1,84 @@
+# core/encoder_pool.py
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from conformity_analysis_module.utils.logger import logger
+
+# 工作行程內的模型（每個行程各載入一份）
+_worker_model = None
+
+def _init_worker(model_name, threads, quantize):
+    """工作行程初始化：固定 torch 執行緒數後載入模型"""
+    global _worker_model
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    from sentence_transformers import SentenceTransformer
+    if quantize:
+        from conformity_analysis_module.core.quantization import quantize_model
+        _worker_model = quantize_model(SentenceTransformer(model_name, device='cpu'))
+    else:
+        _worker_model = SentenceTransformer(model_name, device='cpu')
+
+def _ping():
+    return os.getpid()
+
+def _encode(texts, batch_size):
+    return np.asarray(_worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                                           show_progress_bar=False), dtype=np.float32)
+
+class EncoderPool:
+    """
+    多行程編碼池：啟動 workers 個工作行程，各自持有一份模型，
+    並把每個行程的 torch 執行緒數固定為 threads_per_worker，避免行程間搶核心。
+    encode() 與 SentenceTransformer.encode 介面相容；submit() 回傳 Future，供 BatchEncoder 同時分派多個批次。
+    """
+    def __init__(self, model_name, workers, threads_per_worker=None, quantize=False):
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.quantize = quantize
+        self._executor = None
+
+    def start(self):
+        """啟動工作行程並等待每個行程載入模型"""
+        if self._executor is None:
+            logger.info(f"啟動編碼池: {self.workers} 個行程，每行程 {self.threads_per_worker} 個執行緒")
+            # torch 在 fork 後的子行程可能死結，一律以 spawn 啟動
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.threads_per_worker, self.quantize)
+            )
+            for future in [self._executor.submit(_ping) for _ in range(self.workers)]:
+                future.result()
+        return self
+
+    def submit(self, texts, batch_size=64):
+        return self.start()._executor.submit(_encode, list(texts), batch_size)
+
+    def encode(self, texts, batch_size=64, **kwargs):
+        """把 texts 切成批次分派給各工作行程，依原順序回傳 float32 向量"""
+        texts = list(texts)
+        futures = [self.submit(texts[i:i + batch_size], batch_size) for i in range(0, len(texts), batch_size)]
+        if not futures:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack([future.result() for future in futures])
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
@@ -0,0 +1,105 @@
+# core/extraction_pool.py
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from conformity_analysis_module.core.file_processor import FileProcessor
+from conformity_analysis_module.core.embedding_cache import EmbeddingCache
+from text_extraction import ExtractionConfig
+
+def _init_worker(cache_enabled, cache_dir):
+    """子行程沿用主行程執行時的擷取快取設定"""
+    ExtractionConfig.CACHE_ENABLED = cache_enabled
+    ExtractionConfig.CACHE_DIR = cache_dir
+
+def extract_file(file_path, cache):
+    """
+    計算檔案內容雜湊；若向量快取已有此內容則不擷取，否則擷取文字片段。
+    回傳 (file_path, content_hash, snippets, cached, error, seconds)，seconds 為在執行行程中量測的雜湊與擷取耗時。
+    此函式需位於模組層級，子行程才能以 pickle 呼叫。
+    """
+    start = time.perf_counter()
+    try:
+        content_hash = EmbeddingCache.file_hash(file_path)
+    except OSError as e:
+        return file_path, None, [], False, str(e), time.perf_counter() - start
+    if cache.contains(content_hash):
+        return file_path, content_hash, None, True, None, time.perf_counter() - start
+    snippets = FileProcessor.extract_text_snippets(file_path, content_hash)
+    return file_path, content_hash, snippets, False, None, time.perf_counter() - start
+
+class ExtractionPool:
+    """
+    生產者/消費者擷取管線。
+    生產者執行緒把檔案依序送入行程池，並將 future 放入有界佇列；
+    消費端（編碼所在的執行緒）依送出順序取出結果，佇列滿時生產者會暫停（back-pressure），
+    讓 PyPDF2/python-docx 的解析與模型編碼能同時進行。
+    workers <= 1 時直接在目前執行緒依序擷取。
+    executor 為共用的行程池（create_executor 建立，例如常駐服務的所有工作共用一個），由建立者負責關閉；
+    未指定時每次 imap 各自建立行程池，結束時關閉。
+    """
+    _DONE = object()
+
+    def __init__(self, cache, workers=None, queue_size=64, executor=None):
+        self.cache = cache
+        self.workers = workers if workers is not None else max(1, (os.cpu_count() or 1) - 1)
+        self.queue_size = max(1, queue_size)
+        self.executor = executor
+
+    @staticmethod
+    def create_executor(workers=None):
+        workers = workers if workers is not None else max(1, (os.cpu_count() or 1) - 1)
+        return ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_worker,
+                                   initargs=(ExtractionConfig.CACHE_ENABLED, ExtractionConfig.CACHE_DIR))
+
+    def imap(self, file_paths):
+        if self.executor is None and self.workers <= 1:
+            for file_path in file_paths:
+                yield extract_file(file_path, self.cache)
+            return
+
+        futures = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        executor = self.executor or self.create_executor(self.workers)
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    futures.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for file_path in file_paths:
+                    if stop.is_set():
+                        return
+                    future = executor.submit(extract_file, file_path, self.cache)
+                    if not put(future):
+                        future.cancel()
+                        return
+            finally:
+                put(self._DONE)
+
+        producer = threading.Thread(target=produce, name="ExtractionProducer", daemon=True)
+        producer.start()
+        try:
+            while True:
+                future = futures.get()
+                if future is self._DONE:
+                    break
+                yield future.result()
+        finally:
+            # 先等生產者停止送出工作再關閉行程池，否則 submit 會在已關閉的行程池上拋出 RuntimeError
+            stop.set()
+            producer.join()
+            # 取消本次尚未開始的工作（共用的行程池不關閉）
+            while not futures.empty():
+                future = futures.get_nowait()
+                if future is not self._DONE:
+                    future.cancel()
+            if self.executor is None:
+                executor.shutdown(wait=False, cancel_futures=True)
@@ -1,63 +1,38 @@
 # core/file_processor.py
-import os
-import docx
-import openpyxl
-import PyPDF2
+from text_extraction import TextExtractor
 from conformity_analysis_module.utils.logger import logger
 
 class FileProcessor:
+    """以共用的 TextExtractor 擷取文件文字（結果快取於 text_extraction 的擷取快取），轉為分析用的片段"""
     @staticmethod
-    def extract_text_from_docx(file_path):
-        snippets = []
+    def _snippets(file_path, label, content_hash=None):
         try:
-            doc = docx.Document(file_path)
-            for para in doc.paragraphs:
-                text = para.text.strip()
-                if text:
-                    snippets.append(text)
+            return [line.strip() for line in TextExtractor.lines(file_path, content_hash) if line.strip()]
         except Exception as e:
-            logger.error(f"處理 DOCX 檔案 {file_path} 時發生錯誤: {e}")
-        return snippets
+            logger.error(f"處理 {label} 檔案 {file_path} 時發生錯誤: {e}")
+            return []
 
     @staticmethod
-    def extract_text_from_xlsx(file_path):
-        snippets = []
-        try:
-            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
-            for sheet in wb:
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = " ".join(str(cell) for cell in row if cell is not None).strip()
-                    if row_text:
-                        snippets.append(row_text)
-        except Exception as e:
-            logger.error(f"處理 XLSX 檔案 {file_path} 時發生錯誤: {e}")
-        return snippets
+    def extract_text_from_docx(file_path, content_hash=None):
+        return FileProcessor._snippets(file_path, "DOCX", content_hash)
 
     @staticmethod
-    def extract_text_from_pdf(file_path):
-        snippets = []
-        try:
-            with open(file_path, "rb") as f:
-                reader = PyPDF2.PdfReader(f)
-                for page in reader.pages:
-                    text = page.extract_text()
-                    if text:
-                        for line in text.split('\n'):
-                            line = line.strip()
-                            if line:
-                                snippets.append(line)
-        except Exception as e:
-            logger.error(f"處理 PDF 檔案 {file_path} 時發生錯誤: {e}")
-        return snippets
+    def extract_text_from_xlsx(file_path, content_hash=None):
+        return FileProcessor._snippets(file_path, "XLSX", content_hash)
+
+    @staticmethod
+    def extract_text_from_pdf(file_path, content_hash=None):
+        return FileProcessor._snippets(file_path, "PDF", content_hash)
 
     @staticmethod
-    def extract_text_snippets(file_path):
+    def extract_text_snippets(file_path, content_hash=None):
+        """content_hash 為已算好的檔案內容雜湊，可讓擷取快取省去重新讀檔"""
         ext = file_path.lower().split('.')[-1]
         if ext == 'docx':
-            return FileProcessor.extract_text_from_docx(file_path)
+            return FileProcessor.extract_text_from_docx(file_path, content_hash)
         elif ext == 'xlsx':
-            return FileProcessor.extract_text_from_xlsx(file_path)
+            return FileProcessor.extract_text_from_xlsx(file_path, content_hash)
         elif ext == 'pdf':
-            return FileProcessor.extract_text_from_pdf(file_path)
+            return FileProcessor.extract_text_from_pdf(file_path, content_hash)
         else:
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,113 @@
+# core/folder_manifest.py
+import os
+import json
+from conformity_analysis_module.core.embedding_cache import EmbeddingCache
+from conformity_analysis_module.utils.logger import logger
+
+class ManifestDiff:
+    """資料夾與上次分析時的差異：新增、變更、刪除與未變更的檔案"""
+    def __init__(self, added, changed, deleted, unchanged, entries):
+        self.added = added
+        self.changed = changed
+        self.deleted = deleted
+        self.unchanged = unchanged
+        self.entries = entries  # 目前資料夾的 {path: {"size", "mtime_ns", "hash"}}，未計算雜湊者 hash 為 None
+
+    @property
+    def has_changes(self):
+        return bool(self.added or self.changed or self.deleted)
+
+    @property
+    def dropped(self):
+        """舊結果中需要移除的檔案"""
+        return set(self.changed) | set(self.deleted)
+
+class FolderManifest:
+    """
+    分析資料夾的檔案清單：每個檔案的 (路徑, 大小, 修改時間, 內容雜湊)，
+    與產生結果時的分析參數鍵一起存於結果檔旁。
+    再次分析時只需 stat 每個檔案；大小與修改時間相同者視為未變更，
+    不同者才計算雜湊確認內容是否真的變更。
+    """
+    def __init__(self, path, params_key, entries=None):
+        self.path = path
+        self.params_key = params_key
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path, params_key):
+        """載入清單；檔案不存在、損毀或分析參數不同時回傳空清單"""
+        manifest = cls(path, params_key)
+        if not os.path.exists(path):
+            return manifest
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"讀取檔案清單 {path} 失敗，將完整分析: {e}")
+            return manifest
+        if data.get("params_key") == params_key:
+            manifest.entries = data.get("files", {})
+        return manifest
+
+    @staticmethod
+    def stat_entry(file_path):
+        stat = os.stat(file_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": None}
+
+    def diff(self, file_paths):
+        added, changed, unchanged = [], [], []
+        entries = {}
+        for file_path in file_paths:
+            try:
+                entry = self.stat_entry(file_path)
+            except OSError as e:
+                logger.error(f"無法讀取檔案資訊 {file_path}: {e}")
+                continue
+            old = self.entries.get(file_path)
+            if old is None:
+                added.append(file_path)
+            elif old["size"] == entry["size"] and old["mtime_ns"] == entry["mtime_ns"]:
+                entry["hash"] = old["hash"]
+                unchanged.append(file_path)
+            else:
+                # 只有修改時間變動（例如重新儲存）時，以內容雜湊判斷
+                try:
+                    entry["hash"] = EmbeddingCache.file_hash(file_path)
+                except OSError as e:
+                    logger.error(f"計算檔案雜湊失敗 {file_path}: {e}")
+                if entry["hash"] is not None and entry["hash"] == old["hash"]:
+                    unchanged.append(file_path)
+                else:
+                    changed.append(file_path)
+            entries[file_path] = entry
+        deleted = [p for p in self.entries if p not in entries]
+        return ManifestDiff(added, changed, deleted, unchanged, entries)
+
+    def save(self, entries, hashes=None):
+        """
+        以本次分析的檔案資訊更新清單。hashes 為分析過程中已取得的 {path: 內容雜湊}，
+        仍缺少雜湊的檔案（例如由檢查點續跑而略過的檔案）會在此補算。
+        """
+        hashes = hashes or {}
+        files = {}
+        for file_path, entry in entries.items():
+            entry = dict(entry)
+            entry["hash"] = hashes.get(file_path) or entry["hash"]
+            if entry["hash"] is None:
+                try:
+                    entry["hash"] = EmbeddingCache.file_hash(file_path)
+                except OSError as e:
+                    logger.error(f"計算檔案雜湊失敗 {file_path}: {e}")
+                    continue
+            files[file_path] = entry
+        self.entries = files
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"params_key": self.params_key, "files": files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        self.entries = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
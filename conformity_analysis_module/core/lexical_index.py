@@ -0,0 +1,159 @@
+# core/lexical_index.py
+import os
+import threading
+import re
+import json
+import time
+import numpy as np
+from conformity_analysis_module.utils.logger import logger
+
+class LexicalIndex:
+    """
+    以片段文字建立的 BM25 倒排索引，作為兩階段檢索的第一階段：
+    先以關鍵字為每個條款挑出候選片段，再只對候選片段計算向量相似度。
+    英文以單字、中文以相鄰兩字為詞；倒排清單以 CSR 陣列（indptr、片段列、詞頻）保存。
+    """
+    FORMAT_VERSION = 1
+    WORD_PATTERN = re.compile(r"[a-z0-9]+|[一-鿿]+")
+    STOPWORDS = frozenset(
+        "a an and are as at be by for from has have in is it its of on or shall that the to which with "
+        "this these those been being will all any such other".split()
+    )
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.snippets = []
+        self.doc_files = np.zeros(0, dtype=np.int32)  # 每個片段所屬檔案在 file_list 中的索引
+        self.file_list = []
+        self.files = {}  # path -> {"size", "mtime_ns", "hash", "extractor", "start", "end"}，extractor 為擷取器版本
+        self.vocab = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.postings = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.float32)
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self.idf = np.zeros(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.snippets)
+
+    @classmethod
+    def tokenize(cls, text):
+        tokens = []
+        for word in cls.WORD_PATTERN.findall(text.lower()):
+            if word[0] >= '一':
+                tokens.extend(word[i:i + 2] for i in range(max(1, len(word) - 1)))
+            elif word not in cls.STOPWORDS:
+                tokens.append(word)
+        return tokens
+
+    @classmethod
+    def build(cls, entries, k1=1.5, b=0.75):
+        """entries 為 (檔案路徑, {"size", "mtime_ns", "hash", "extractor"}, 片段清單) 的序列"""
+        start_time = time.perf_counter()
+        index = cls(k1, b)
+        term_ids, doc_ids, counts = [], [], []
+        doc_lengths = []
+        doc_files = []
+        for file_path, info, snippets in entries:
+            start = len(index.snippets)
+            file_no = len(index.file_list)
+            index.file_list.append(file_path)
+            for snippet in snippets:
+                doc = len(index.snippets)
+                index.snippets.append(snippet)
+                doc_files.append(file_no)
+                tokens = cls.tokenize(snippet)
+                doc_lengths.append(len(tokens))
+                tf = {}
+                for token in tokens:
+                    tf[token] = tf.get(token, 0) + 1
+                for token, count in tf.items():
+                    term_ids.append(index.vocab.setdefault(token, len(index.vocab)))
+                    doc_ids.append(doc)
+                    counts.append(count)
+            index.files[file_path] = dict(info, start=start, end=len(index.snippets))
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind='stable')
+        index.postings = np.asarray(doc_ids, dtype=np.int32)[order]
+        index.tfs = np.asarray(counts, dtype=np.float32)[order]
+        index.indptr = np.searchsorted(term_ids[order], np.arange(len(index.vocab) + 1)).astype(np.int64)
+        index.doc_files = np.asarray(doc_files, dtype=np.int32)
+        index.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        index._compute_idf()
+        logger.info(f"關鍵字索引建立完成: {len(index)} 個片段、{len(index.vocab)} 個詞，"
+                    f"耗時 {time.perf_counter() - start_time:.3f} 秒")
+        return index
+
+    def _compute_idf(self):
+        df = np.diff(self.indptr).astype(np.float32)
+        n = max(len(self.snippets), 1)
+        self.idf = np.log(1 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def scores(self, query):
+        """回傳查詢對所有片段的 BM25 分數"""
+        scores = np.zeros(len(self.snippets), dtype=np.float32)
+        if not len(self.snippets):
+            return scores
+        avg_length = max(float(self.doc_lengths.mean()), 1e-6)
+        for token in set(self.tokenize(query)):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            docs = self.postings[self.indptr[term]:self.indptr[term + 1]]
+            tf = self.tfs[self.indptr[term]:self.indptr[term + 1]]
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / avg_length)
+            scores[docs] += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def shortlist(self, query, size):
+        """回傳 BM25 分數最高（且大於 0）的最多 size 個片段列，依分數由高到低排列"""
+        scores = self.scores(query)
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > size:
+            candidates = candidates[np.argpartition(-scores[candidates], size - 1)[:size]]
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def source_file(self, row):
+        return self.file_list[self.doc_files[row]]
+
+    def save(self, path):
+        meta = json.dumps({
+            "version": self.FORMAT_VERSION,
+            "snippets": self.snippets,
+            "file_list": self.file_list,
+            "files": self.files,
+            "vocab": list(self.vocab)
+        }, ensure_ascii=False)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, indptr=self.indptr, postings=self.postings, tfs=self.tfs, doc_files=self.doc_files,
+                     doc_lengths=self.doc_lengths, meta=np.frombuffer(meta.encode('utf-8'), dtype=np.uint8))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, k1=1.5, b=0.75):
+        """載入索引（k1、b 為查詢時的 BM25 參數）；檔案不存在或損毀時回傳空索引"""
+        if not os.path.exists(path):
+            return cls(k1, b)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+                if meta.get("version") != cls.FORMAT_VERSION:
+                    return cls(k1, b)
+                index = cls(k1, b)
+                index.indptr = data['indptr']
+                index.postings = data['postings']
+                index.tfs = data['tfs']
+                index.doc_files = data['doc_files']
+                index.doc_lengths = data['doc_lengths']
+        except Exception as e:
+            logger.error(f"載入關鍵字索引 {path} 失敗，將重新建立: {e}")
+            return cls(k1, b)
+        index.snippets = meta["snippets"]
+        index.file_list = meta["file_list"]
+        index.files = meta["files"]
+        index.vocab = {token: i for i, token in enumerate(meta["vocab"])}
+        index._compute_idf()
+        return index
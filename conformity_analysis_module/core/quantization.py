@@ -0,0 +1,79 @@
+# core/quantization.py
+"""
+動態 int8 量化，以及以樣本語料比較 fp32 與 int8 模型：
+python -m conformity_analysis_module.core.quantization <資料夾> [模型] [最多片段數] [--threshold 0.5]
+"""
+import copy
+import json
+import time
+import argparse
+import numpy as np
+from conformity_analysis_module.core.file_processor import FileProcessor
+from conformity_analysis_module.core.similarity_scorer import SimilarityScorer
+from conformity_analysis_module.utils.logger import logger
+
+def quantize_model(model, inplace=True):
+    """對模型中的 Linear 層做動態 int8 量化（僅適用 CPU 推論）"""
+    import torch
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=inplace)
+
+def sample_snippets(folder_path, max_snippets=2000):
+    """由資料夾中的文件擷取最多 max_snippets 個片段作為比對樣本"""
+    from conformity_analysis_module.core.analyzer import Analyzer
+    snippets = []
+    for file_path in Analyzer.iter_target_files(folder_path):
+        snippets.extend(FileProcessor.extract_text_snippets(file_path))
+        if len(snippets) >= max_snippets:
+            break
+    return snippets[:max_snippets]
+
+def compare_quantized(model_name, requirements, snippets, threshold=0.5, batch_size=64):
+    """
+    以同一批樣本比較 fp32 與 int8 模型：
+    回傳門檻判定改變的 (條款, 片段) 組合數、相似度最大差異與兩者的編碼時間。
+    """
+    from sentence_transformers import SentenceTransformer
+    fp32_model = SentenceTransformer(model_name, device='cpu')
+    int8_model = quantize_model(copy.deepcopy(fp32_model), inplace=True)
+    req_texts = list(requirements.values())
+
+    def encode(model):
+        start = time.perf_counter()
+        vectors = model.encode(snippets, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        seconds = time.perf_counter() - start
+        req_vectors = model.encode(req_texts, convert_to_numpy=True, show_progress_bar=False)
+        return SimilarityScorer(requirements.keys(), req_vectors).score(vectors), seconds
+
+    fp32_scores, fp32_seconds = encode(fp32_model)
+    int8_scores, int8_seconds = encode(int8_model)
+    fp32_hits = fp32_scores >= threshold
+    int8_hits = int8_scores >= threshold
+
+    report = {
+        "pairs": int(fp32_scores.size),
+        "fp32_hits": int(fp32_hits.sum()),
+        "int8_hits": int(int8_hits.sum()),
+        "changed_decisions": int((fp32_hits != int8_hits).sum()),
+        "max_abs_score_diff": float(np.abs(fp32_scores - int8_scores).max()) if fp32_scores.size else 0.0,
+        "fp32_encode_seconds": fp32_seconds,
+        "int8_encode_seconds": int8_seconds,
+        "speedup": fp32_seconds / int8_seconds if int8_seconds else None
+    }
+    logger.info(f"int8 量化比對結果: {report}")
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="以樣本語料比較 fp32 與 int8 模型的相似度判定與編碼時間")
+    parser.add_argument("folder", help="擷取樣本片段的資料夾")
+    parser.add_argument("model", nargs="?", default='models/all-MiniLM-L12-v2', help="模型路徑或名稱")
+    parser.add_argument("max_snippets", nargs="?", type=int, default=2000, help="最多使用的樣本片段數")
+    parser.add_argument("--threshold", type=float, default=0.5, help="相似度門檻")
+    args = parser.parse_args(argv)
+
+    from conformity_analysis_module.core.requirements_loader import RequirementsLoader
+    result = compare_quantized(args.model, RequirementsLoader.load(), sample_snippets(args.folder, args.max_snippets),
+                               args.threshold)
+    print(json.dumps(result, ensure_ascii=False, indent=4))
+
+if __name__ == "__main__":
+    main()
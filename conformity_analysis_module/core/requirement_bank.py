@@ -0,0 +1,154 @@
+# core/requirement_bank.py
+import os
+import re
+import json
+import hashlib
+import threading
+import numpy as np
+from conformity_analysis_module.utils.logger import logger
+from conformity_analysis_module.config import Config
+
+class RequirementBank:
+    """
+    requirements.json 全部條款的預先編碼向量庫。
+    向量存成 .npy 並以 memory-map 載入，另以 .json 記錄指紋（條款檔內容 + 模型）、條款順序與向量的雜湊；
+    條款檔或模型變更時指紋不符，會自動重新編碼，讓條款編碼不再是每次分析的成本。
+    檔名含模型指紋，輪流使用不同模型（或 fp32 與 int8）時各自保有向量庫，不會互相覆寫而每次重建。
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, model_name, encode, requirements_file=None, bank_file=None, variant=None):
+        self.model_name = model_name
+        self.encode = encode
+        self.variant = variant
+        self.requirements_file = requirements_file or Config.REQUIREMENTS_FILE
+        if bank_file is None:
+            base, ext = os.path.splitext(Config.REQUIREMENT_BANK_FILE)
+            suffix = f"_{variant}" if variant else ""
+            bank_file = f"{base}_{self.model_fingerprint(model_name)[:16]}{suffix}{ext}"
+        self.bank_file = bank_file
+        self.meta_file = os.path.splitext(self.bank_file)[0] + ".json"
+        self.vectors = None
+        self.rows = {}
+        self.texts = {}
+
+    @staticmethod
+    def normalize_key(key):
+        return re.sub(r"\s+", "", str(key).upper())
+
+    @staticmethod
+    def model_fingerprint(model_name):
+        """本機模型資料夾以檔案大小與修改時間計算指紋，其他情況以名稱為準"""
+        sha = hashlib.sha256(str(model_name).encode('utf-8'))
+        if os.path.isdir(model_name):
+            for root, _, files in sorted(os.walk(model_name)):
+                for file in sorted(files):
+                    stat = os.stat(os.path.join(root, file))
+                    sha.update(f"{os.path.relpath(os.path.join(root, file), model_name)}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+        return sha.hexdigest()
+
+    def fingerprint(self):
+        sha = hashlib.sha256(f"v{self.FORMAT_VERSION}\0{self.model_fingerprint(self.model_name)}\0{self.variant}\0".encode('utf-8'))
+        with open(self.requirements_file, 'rb') as f:
+            sha.update(f.read())
+        return sha.hexdigest()
+
+    def load(self):
+        """載入向量庫，指紋不符或檔案不存在時重新建立"""
+        try:
+            fingerprint = self.fingerprint()
+        except OSError as e:
+            logger.error(f"無法讀取條款要求檔案，略過條款向量庫: {e}")
+            return self
+
+        meta = None
+        if os.path.exists(self.meta_file) and os.path.exists(self.bank_file):
+            try:
+                with open(self.meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except Exception as e:
+                logger.warning(f"讀取條款向量庫資訊失敗，將重新建立: {e}")
+
+        if meta and meta.get("fingerprint") == fingerprint:
+            try:
+                vectors = np.load(self.bank_file, mmap_mode='r')
+                # 向量檔與資訊檔分開寫入，以雜湊確認兩者出自同一次建立
+                if meta.get("vectors_sha") == self.vectors_hash(vectors):
+                    self.vectors = vectors
+                    self._set_keys(meta["keys"], meta["texts"])
+                    return self
+                logger.warning("條款向量庫的向量與資訊不相符，將重新建立")
+            except Exception as e:
+                logger.warning(f"載入條款向量庫失敗，將重新建立: {e}")
+
+        self.build(fingerprint)
+        return self
+
+    def build(self, fingerprint):
+        with open(self.requirements_file, 'r', encoding='utf-8') as f:
+            requirements = json.load(f)
+        keys = list(requirements.keys())
+        texts = [requirements[k] for k in keys]
+        logger.info(f"建立條款向量庫，共 {len(keys)} 條")
+        vectors = np.asarray(self.encode(texts), dtype=np.float32)
+
+        self._set_keys(keys, texts)
+        Config.ensure_dir(os.path.dirname(self.bank_file))
+        suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path, meta_tmp_path = f"{self.bank_file}.{suffix}", f"{self.meta_file}.{suffix}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, vectors)
+            with open(meta_tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"fingerprint": fingerprint, "model": self.model_name, "keys": keys, "texts": texts,
+                           "vectors_sha": self.vectors_hash(vectors)}, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.bank_file)
+            os.replace(meta_tmp_path, self.meta_file)
+        except OSError as e:
+            # Windows 上其他 Analyzer 以 memory-map 開啟中的向量檔無法被取代：本次直接使用記憶體中的向量，
+            # 磁碟上的舊檔保留給下次載入（指紋或雜湊不符時會再重建）
+            logger.warning(f"無法寫入條款向量庫 {self.bank_file}，本次使用記憶體中的向量: {e}")
+            for path in (tmp_path, meta_tmp_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.vectors = vectors
+            return
+
+        self.vectors = np.load(self.bank_file, mmap_mode='r')
+
+    @staticmethod
+    def vectors_hash(vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        return hashlib.sha256(f"{vectors.shape}".encode('utf-8') + vectors.tobytes()).hexdigest()
+
+    def _set_keys(self, keys, texts):
+        self.rows = {self.normalize_key(k): i for i, k in enumerate(keys)}
+        self.texts = {self.normalize_key(k): t for k, t in zip(keys, texts)}
+
+    def vectors_for(self, requirements):
+        """
+        依 requirements 的順序回傳條款向量矩陣。
+        鍵可為原始或正規化後的條款編號；不在向量庫或文字不同的條款會即時編碼。
+        """
+        keys = list(requirements.keys())
+        rows = []
+        missing = []
+        for i, key in enumerate(keys):
+            norm = self.normalize_key(key)
+            if self.vectors is not None and norm in self.rows and self.texts[norm] == requirements[key]:
+                rows.append(self.rows[norm])
+            else:
+                rows.append(None)
+                missing.append(i)
+
+        if not missing:
+            return np.asarray(self.vectors[rows], dtype=np.float32)
+
+        encoded = np.asarray(self.encode([requirements[keys[i]] for i in missing]), dtype=np.float32)
+        dim = encoded.shape[1]
+        result = np.empty((len(keys), dim), dtype=np.float32)
+        present = [i for i, row in enumerate(rows) if row is not None]
+        if present:
+            result[present] = self.vectors[[rows[i] for i in present]]
+        result[missing] = encoded
+        return result
@@ -0,0 +1,191 @@
+# core/results_store.py
+import os
+import json
+import hashlib
+from conformity_analysis_module.utils.logger import logger
+
+def iter_analysis_results(path):
+    """
+    逐筆讀取分析結果。
+    支援 JSON Lines（每行一筆）與舊版的 JSON 陣列格式；JSONL 最後一行若因中斷而不完整會被略過。
+    精簡格式中以 snippet_id 參照的片段與條款文字會在此還原，回傳的每筆結果格式都相同。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        if first == '[':
+            f.seek(0)
+            yield from json.load(f)
+            return
+        f.seek(0)
+        snippets = {}
+        requirement_texts = {}
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"{path} 第 {line_no} 行格式不完整，已略過")
+                continue
+            if item.get("type") == "snippet":
+                snippets[item["id"]] = item["text"]
+            elif item.get("type") == "requirement":
+                requirement_texts[item["id"]] = item["text"]
+            elif "snippet_id" in item:
+                snippet = snippets.get(item.pop("snippet_id"))
+                if snippet is None:
+                    logger.warning(f"{path} 第 {line_no} 行參照的片段不存在，已略過")
+                    continue
+                yield {"requirement": item["requirement"],
+                       "requirement_text": requirement_texts.get(item["requirement"]),
+                       "snippet": snippet, **item}
+            else:
+                yield item
+
+class ResultsWriter:
+    """
+    以 JSON Lines 逐筆附加分析結果。
+    每 flush_every 筆寫入磁碟，每完成 checkpoint_every 個檔案寫一次檢查點
+    （輸出檔位移、已完成檔案與額外狀態）。相同 run_key 的分析中斷後再次執行時，
+    會截掉檢查點之後不完整的輸出並略過已完成的檔案，從中斷處繼續。
+    compact 為 True 時，片段與條款文字只在第一次出現時寫一行定義，之後的結果以 snippet_id 參照，
+    重複的樣板片段不會在輸出檔中重複出現。
+    """
+    def __init__(self, output_path, run_key=None, flush_every=1000, checkpoint_every=50, state_provider=None,
+                 compact=False):
+        self.output_path = output_path
+        self.checkpoint_path = f"{output_path}.checkpoint"
+        self.run_key = run_key
+        self.flush_every = max(1, flush_every)
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.state_provider = state_provider
+        self.compact = compact
+        self._snippet_ids = {}
+        self._requirements = set()
+        self.completed_files = set()
+        self.state = None
+        self.count = 0
+        self.resumed = False
+        self._file = None
+        self._unflushed = 0
+        self._files_since_checkpoint = 0
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        # 發生例外時保留檢查點，下次執行可續跑
+        self.close(completed=exc_type is None)
+
+    def open(self):
+        checkpoint = self._load_checkpoint() if self.run_key else None
+        if checkpoint and os.path.exists(self.output_path):
+            self._file = open(self.output_path, 'r+b')
+            self._file.truncate(checkpoint["offset"])
+            self._file.seek(0, os.SEEK_END)
+            self.completed_files = set(checkpoint["completed_files"])
+            self.count = checkpoint["count"]
+            self.state = checkpoint.get("state")
+            self.resumed = True
+            if self.compact:
+                self._load_definitions()
+            logger.info(f"由檢查點續跑分析：已完成 {len(self.completed_files)} 個檔案、{self.count} 筆結果")
+        else:
+            self._file = open(self.output_path, 'wb')
+        return self
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except Exception as e:
+            logger.warning(f"讀取檢查點 {self.checkpoint_path} 失敗，將重新分析: {e}")
+            return None
+        if checkpoint.get("run_key") != self.run_key:
+            return None
+        return checkpoint
+
+    def _load_definitions(self):
+        """續跑時由已保留的輸出重建片段與條款定義，後續結果才能沿用相同的參照"""
+        with open(self.output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '"type"' not in line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if item.get("type") == "snippet":
+                    self._snippet_ids[self._snippet_key(item["text"])] = item["id"]
+                elif item.get("type") == "requirement":
+                    self._requirements.add(item["id"])
+
+    @staticmethod
+    def _snippet_key(snippet):
+        return hashlib.sha1(snippet.encode('utf-8')).digest()
+
+    def _write_line(self, item):
+        self._file.write((json.dumps(item, ensure_ascii=False) + "\n").encode('utf-8'))
+
+    def _compact(self, result):
+        snippet_key = self._snippet_key(result["snippet"])
+        snippet_id = self._snippet_ids.get(snippet_key)
+        if snippet_id is None:
+            snippet_id = self._snippet_ids[snippet_key] = len(self._snippet_ids)
+            self._write_line({"type": "snippet", "id": snippet_id, "text": result["snippet"]})
+        if result["requirement"] not in self._requirements:
+            self._requirements.add(result["requirement"])
+            self._write_line({"type": "requirement", "id": result["requirement"], "text": result["requirement_text"]})
+        compact = {k: v for k, v in result.items() if k not in ("requirement_text", "snippet")}
+        compact["snippet_id"] = snippet_id
+        return compact
+
+    def write(self, result):
+        if self.compact and "snippet" in result and "requirement_text" in result:
+            result = self._compact(result)
+        self._write_line(result)
+        self.count += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._unflushed = 0
+
+    def mark_completed(self, file_path):
+        self.completed_files.add(file_path)
+        self._files_since_checkpoint += 1
+        if self.run_key and self._files_since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.flush()
+        os.fsync(self._file.fileno())
+        checkpoint = {
+            "run_key": self.run_key,
+            "offset": self._file.tell(),
+            "count": self.count,
+            "completed_files": sorted(self.completed_files),
+            "state": self.state_provider() if self.state_provider else None
+        }
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
+        self._files_since_checkpoint = 0
+
+    def close(self, completed=True):
+        if self._file is None:
+            return
+        if not completed and self.run_key:
+            self.checkpoint()
+        self._file.close()
+        self._file = None
+        if completed and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
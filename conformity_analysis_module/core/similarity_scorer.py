@@ -0,0 +1,77 @@
+# core/similarity_scorer.py
+import numpy as np
+from conformity_analysis_module.core.embedding_store import iter_blocks
+
+class SimilarityScorer:
+    """
+    將所有條款向量堆疊成一個已正規化的矩陣，
+    每個片段區塊只需一次矩陣乘法即可得到全部條款的餘弦相似度，
+    再以 NumPy 遮罩挑出超過門檻的組合。
+    片段向量可為 CompactEmbeddings，逐區塊轉回 float32 後評分，不會一次展開整個矩陣。
+    """
+    def __init__(self, requirement_keys, requirement_embeddings, block_size=8192):
+        self.requirement_keys = list(requirement_keys)
+        self.matrix = self.normalize(requirement_embeddings)
+        self.block_size = max(1, block_size)
+
+    @staticmethod
+    def normalize(embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings[np.newaxis, :]
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def score(self, snippet_embeddings):
+        """回傳 (條款數, 片段數) 的餘弦相似度矩陣"""
+        return self.matrix @ self.normalize(snippet_embeddings).T
+
+    @staticmethod
+    def limit_per_requirement(req_idx, snippet_idx, scores, limit):
+        """每個條款只保留相似度最高的 limit 筆，結果依條款、片段順序排列"""
+        order = np.lexsort((-scores, req_idx))
+        if limit is not None and len(order):
+            grouped = req_idx[order]
+            starts = np.r_[0, np.flatnonzero(np.diff(grouped)) + 1]
+            ranks = np.arange(len(grouped)) - np.repeat(starts, np.diff(np.r_[starts, len(grouped)]))
+            order = order[ranks < limit]
+        order = order[np.lexsort((snippet_idx[order], req_idx[order]))]
+        return req_idx[order], snippet_idx[order], scores[order]
+
+    def _collect(self, snippet_embeddings, select):
+        req_parts, snippet_parts, score_parts = [], [], []
+        for start, block in iter_blocks(snippet_embeddings, self.block_size):
+            scores = self.score(block)
+            req_idx, snippet_idx = select(scores)
+            req_parts.append(req_idx)
+            snippet_parts.append(snippet_idx + start)
+            score_parts.append(scores[req_idx, snippet_idx])
+
+        if not req_parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        return np.concatenate(req_parts), np.concatenate(snippet_parts), np.concatenate(score_parts)
+
+    def hits(self, snippet_embeddings, threshold, per_file_cap=None):
+        """
+        回傳 (條款索引, 片段索引, 相似度) 三個陣列，
+        依條款、片段順序排列（與逐條款逐片段掃描的順序相同）。
+        per_file_cap 限制同一檔案中每個條款最多保留幾筆（取相似度最高者）。
+        """
+        req_idx, snippet_idx, scores = self._collect(snippet_embeddings, lambda block: np.nonzero(block >= threshold))
+        return self.limit_per_requirement(req_idx, snippet_idx, scores, per_file_cap)
+
+    def top_candidates(self, snippet_embeddings, k, threshold=None):
+        """每個條款在此區塊中相似度最高的 k 筆（可再以 threshold 過濾），格式同 hits()"""
+        def select(block):
+            k_eff = min(k, block.shape[1])
+            top = np.argpartition(-block, k_eff - 1, axis=1)[:, :k_eff]
+            req_idx = np.repeat(np.arange(block.shape[0]), k_eff)
+            snippet_idx = top.ravel()
+            if threshold is not None:
+                keep = block[req_idx, snippet_idx] >= threshold
+                req_idx, snippet_idx = req_idx[keep], snippet_idx[keep]
+            return req_idx, snippet_idx
+
+        req_idx, snippet_idx, scores = self._collect(snippet_embeddings, select)
+        return self.limit_per_requirement(req_idx, snippet_idx, scores, k)
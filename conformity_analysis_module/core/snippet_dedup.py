@@ -0,0 +1,57 @@
+# core/snippet_dedup.py
+import hashlib
+from collections import OrderedDict
+
+class SnippetDeduper:
+    """
+    跨檔案的片段去重。
+    片段先正規化（合併連續空白、去除首尾空白）再取雜湊，
+    頁首、頁尾、版次表等重複出現的字串只需編碼與評分一次，結果再分送到每個出現位置。
+    每種記錄以 LRU 方式最多保留 max_entries 筆，記憶體不隨語料無限成長。
+    """
+    def __init__(self, max_entries=50000):
+        self.max_entries = max(1, max_entries)
+        self.embeddings = OrderedDict()  # 片段鍵 -> float32 向量
+        self.hits = OrderedDict()  # 片段鍵 -> (條款索引, 相似度)
+        self.total = 0
+        self.encoded = 0
+
+    @staticmethod
+    def normalize(snippet):
+        return " ".join(snippet.split())
+
+    @classmethod
+    def key(cls, snippet):
+        return hashlib.sha1(cls.normalize(snippet).encode('utf-8')).digest()
+
+    @classmethod
+    def keys(cls, snippets):
+        return [cls.key(snippet) for snippet in snippets]
+
+    def _get(self, memo, key):
+        value = memo.get(key)
+        if value is not None:
+            memo.move_to_end(key)
+        return value
+
+    def _put(self, memo, key, value):
+        memo[key] = value
+        memo.move_to_end(key)
+        while len(memo) > self.max_entries:
+            memo.popitem(last=False)
+
+    def get_embedding(self, key):
+        return self._get(self.embeddings, key)
+
+    def put_embedding(self, key, vector):
+        self._put(self.embeddings, key, vector)
+
+    def get_hits(self, key):
+        return self._get(self.hits, key)
+
+    def put_hits(self, key, hits):
+        self._put(self.hits, key, hits)
+
+    @property
+    def saved_ratio(self):
+        return 1 - self.encoded / self.total if self.total else 0.0
@@ -0,0 +1,44 @@
+# core/topk_collector.py
+import heapq
+import numpy as np
+
+class TopKCollector:
+    """
+    串流式 top-k 選取：每個條款維持一個大小為 k 的最小堆積，
+    掃描過程中只保留目前最相似的 k 筆，記憶體為 O(條款數 × k)，與語料大小無關。
+    """
+    def __init__(self, n_requirements, k):
+        self.k = max(1, k)
+        self.heaps = [[] for _ in range(n_requirements)]
+        # 各條款堆積已滿時的最低分，用來以向量化方式先排除不可能入選的候選
+        self.floor = np.full(n_requirements, -np.inf, dtype=np.float32)
+        self._seq = 0
+
+    def offer(self, file_path, snippets, req_idx, snippet_idx, scores):
+        mask = scores > self.floor[req_idx]
+        for r, i, score in zip(req_idx[mask].tolist(), snippet_idx[mask].tolist(), scores[mask].tolist()):
+            heap = self.heaps[r]
+            item = (score, self._seq, file_path, snippets[i])
+            self._seq += 1
+            if len(heap) < self.k:
+                heapq.heappush(heap, item)
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, item)
+            else:
+                continue
+            if len(heap) == self.k:
+                self.floor[r] = heap[0][0]
+
+    def items(self):
+        """依條款順序、相似度由高到低回傳 (條款索引, 相似度, 來源檔案, 片段)"""
+        for r, heap in enumerate(self.heaps):
+            for score, _, file_path, snippet in sorted(heap, key=lambda item: (-item[0], item[1])):
+                yield r, score, file_path, snippet
+
+    def dump(self):
+        """檢查點用：以可序列化的清單保存目前的堆積內容"""
+        return [[r, score, file_path, snippet] for r, score, file_path, snippet in self.items()]
+
+    def load(self, state):
+        for r, score, file_path, snippet in state:
+            self.offer(file_path, [snippet], np.array([r]), np.array([0]), np.array([score], dtype=np.float32))
@@ -0,0 +1,265 @@
+# core/vector_index.py
+import os
+import threading
+import json
+import time
+import numpy as np
+from text_extraction import TextExtractor
+from conformity_analysis_module.core.embedding_store import CompactEmbeddings
+from conformity_analysis_module.utils.logger import logger
+
+class VectorIndex:
+    """
+    以純 NumPy 實作的 IVF 近似最近鄰索引。
+    以球面 k-means 將片段向量分成多個倒排清單，查詢時只比對最接近的 nprobe 個清單，
+    讓新增條款的查詢不必重新掃描整個語料。
+    每個來源檔案記錄其內容雜湊，內容未變時重複加入會直接略過，內容變更時舊向量會被標記刪除。
+    向量以 CompactEmbeddings（float16 或 int8）保存，偏移表記錄每個檔案的列範圍，比對時才轉回 float32。
+    """
+    MIN_TRAIN_SIZE = 1024
+    RETRAIN_FACTOR = 4
+    KMEANS_ITERATIONS = 10
+    KMEANS_SAMPLE_SIZE = 20000
+    BLOCK_SIZE = 8192
+
+    def __init__(self, model_name=None, nprobe=8, dtype='float16'):
+        self.model_name = model_name
+        self.nprobe = max(1, nprobe)
+        self.size = 0
+        self.live_count = 0
+        self.embeddings = CompactEmbeddings(dtype)
+        self._assignments = np.zeros(0, dtype=np.int64)
+        self._alive = np.zeros(0, dtype=bool)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.metadata = []  # 每列向量對應 {"snippet", "source_file"}
+        self.files = {}  # source_file -> content_hash
+        self.trained_size = 0
+        self.stats = {}
+        self._list_order = None
+        self._list_bounds = None
+
+    def __len__(self):
+        return self.live_count
+
+    @property
+    def assignments(self):
+        return self._assignments[:self.size]
+
+    @property
+    def alive(self):
+        return self._alive[:self.size]
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[np.newaxis, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    @staticmethod
+    def _normalize_path(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _reserve(self, rows):
+        """以倍增方式擴充群集與存活標記緩衝區，讓逐檔加入的總成本維持線性"""
+        needed = self.size + rows
+        if needed <= len(self._alive):
+            return
+        capacity = max(needed, 2 * len(self._alive), 256)
+        assignments = np.zeros(capacity, dtype=np.int64)
+        alive = np.zeros(capacity, dtype=bool)
+        assignments[:self.size] = self.assignments
+        alive[:self.size] = self.alive
+        self._assignments, self._alive = assignments, alive
+
+    def train(self):
+        """以目前存活的向量重新訓練群心並重新分配所有清單"""
+        start = time.perf_counter()
+        live = np.flatnonzero(self.alive)
+        n_lists = 1 if len(live) < self.MIN_TRAIN_SIZE else int(4 * np.sqrt(len(live)))
+        rng = np.random.default_rng(0)
+
+        if n_lists == 1:
+            if len(live):
+                total = np.zeros(self.embeddings.dim, dtype=np.float64)
+                for row, block in self.embeddings.iter_blocks(self.BLOCK_SIZE):
+                    total += block[self.alive[row:row + len(block)]].sum(axis=0)
+                self.centroids = self._normalize(total)
+        else:
+            sample = self.embeddings.take(np.sort(rng.choice(live, size=min(len(live), self.KMEANS_SAMPLE_SIZE), replace=False)))
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+            for _ in range(self.KMEANS_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = np.bincount(labels, minlength=n_lists) == 0
+                sums[empty] = centroids[empty]
+                centroids = self._normalize(sums)
+            self.centroids = centroids
+
+        for row, block in self.embeddings.iter_blocks(self.BLOCK_SIZE):
+            self._assignments[row:row + len(block)] = self._assign(block)
+        self.trained_size = len(live)
+        self._invalidate_lists()
+        self.stats["build_seconds"] = time.perf_counter() - start
+        logger.info(f"向量索引建立完成: {len(live)} 筆向量, {len(self.centroids)} 個清單, "
+                    f"耗時 {self.stats['build_seconds']:.3f} 秒")
+
+    def _assign(self, vectors):
+        if len(vectors) == 0 or len(self.centroids) == 0:
+            return np.zeros(len(vectors), dtype=np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int64)
+
+    def _invalidate_lists(self):
+        self._list_order = None
+        self._list_bounds = None
+
+    def _ensure_lists(self):
+        if self._list_order is None:
+            self._list_order = np.argsort(self.assignments, kind='stable')
+            self._list_bounds = np.searchsorted(self.assignments[self._list_order],
+                                                np.arange(len(self.centroids) + 1))
+
+    def add_file(self, source_file, content_hash, snippets, embeddings):
+        """加入（或更新）一個檔案的片段向量，回傳索引是否有變更；內容未變更時直接略過"""
+        if self.files.get(source_file) == content_hash:
+            return False
+        start = time.perf_counter()
+        self.remove_file(source_file)
+        self.files[source_file] = content_hash
+        if not snippets:
+            return True
+
+        if isinstance(embeddings, CompactEmbeddings):
+            embeddings = embeddings.to_float32()
+        vectors = self._normalize(embeddings)
+        self._reserve(len(vectors))
+        self.embeddings.append(vectors, key=source_file)
+        end = self.size + len(vectors)
+        self._assignments[self.size:end] = self._assign(vectors)
+        self._alive[self.size:end] = True
+        self.size = end
+        self.live_count += len(vectors)
+        self.metadata.extend({"snippet": s, "source_file": source_file} for s in snippets)
+        self._invalidate_lists()
+
+        if len(self.centroids) == 0 or self.live_count > self.RETRAIN_FACTOR * max(self.trained_size, self.MIN_TRAIN_SIZE // 4):
+            self.train()
+        self.stats["insert_seconds"] = self.stats.get("insert_seconds", 0.0) + time.perf_counter() - start
+        return True
+
+    def remove_file(self, source_file):
+        if self.files.pop(source_file, None) is None:
+            return
+        start, end = self.embeddings.offsets.pop(source_file, (0, 0))
+        self.live_count -= int(self._alive[start:end].sum())
+        self._alive[start:end] = False
+
+    def prune_folder(self, folder_path, current_files):
+        """移除 folder_path 底下、已不在 current_files（資料夾目前的檔案）中的檔案，回傳移除的檔案"""
+        prefix = os.path.join(self._normalize_path(folder_path), "")
+        current = {self._normalize_path(f) for f in current_files}
+        stale = [f for f in self.files
+                 if self._normalize_path(f).startswith(prefix) and self._normalize_path(f) not in current]
+        for source_file in stale:
+            self.remove_file(source_file)
+        return stale
+
+    def search(self, query_embeddings, top_k=10, folder_path=None):
+        """
+        回傳每個查詢向量的 [(similarity, metadata)]，依相似度由高到低排列。
+        folder_path 可限制只回傳該資料夾下的檔案。
+        """
+        start = time.perf_counter()
+        queries = self._normalize(query_embeddings)
+        if len(self) == 0:
+            return [[] for _ in range(len(queries))]
+        self._ensure_lists()
+
+        allowed_files = None
+        if folder_path:
+            prefix = os.path.join(self._normalize_path(folder_path), "")
+            allowed_files = {f for f in self.files if self._normalize_path(f).startswith(prefix)}
+
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :nprobe]
+        all_hits = []
+        for query, lists in zip(queries, probes):
+            rows = np.concatenate([self._list_order[self._list_bounds[l]:self._list_bounds[l + 1]] for l in lists])
+            rows = rows[self.alive[rows]]
+            if allowed_files is not None:
+                rows = rows[[self.metadata[r]["source_file"] in allowed_files for r in rows]]
+            if len(rows) == 0:
+                all_hits.append([])
+                continue
+            scores = self.embeddings.take(rows) @ query
+            k = min(top_k, len(rows))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            all_hits.append([(float(scores[i]), self.metadata[rows[i]]) for i in best])
+
+        self.stats["query_seconds"] = time.perf_counter() - start
+        logger.info(f"向量索引查詢 {len(queries)} 筆，耗時 {self.stats['query_seconds']:.4f} 秒")
+        return all_hits
+
+    def save(self, path):
+        """儲存索引（已刪除的向量不會寫入）"""
+        live = np.flatnonzero(self.alive)
+        embeddings = self.embeddings.subset(live)
+        meta = json.dumps({
+            "model": self.model_name,
+            "extractor": TextExtractor.VERSION,
+            "metadata": [self.metadata[i] for i in live],
+            "files": self.files,
+            "trained_size": self.trained_size
+        }, ensure_ascii=False)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, assignments=self.assignments[live], centroids=self.centroids,
+                     meta=np.frombuffer(meta.encode('utf-8'), dtype=np.uint8), **embeddings.to_arrays())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def file_stamp(path):
+        """索引檔的 (inode, 大小, 修改時間 ns)，用來判斷載入後是否已被其他分析更新（save 以 os.replace 換檔）；檔案不存在時為 None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    @classmethod
+    def load(cls, path, model_name=None, nprobe=8, dtype='float16'):
+        """
+        載入索引；檔案不存在、損毀、由其他模型或其他版本的擷取器建立時回傳空索引。
+        dtype 只影響新建立的索引，既有索引沿用檔案中的儲存格式。
+        """
+        index = cls(model_name, nprobe, dtype)
+        if not os.path.exists(path):
+            return index
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+                embeddings = CompactEmbeddings.from_arrays(data)
+                assignments = data['assignments']
+                centroids = data['centroids']
+        except Exception as e:
+            logger.error(f"載入向量索引 {path} 失敗，將重新建立: {e}")
+            return index
+        if meta.get("model") != model_name:
+            logger.info(f"向量索引 {path} 由其他模型建立，將重新建立")
+            return index
+        if meta.get("extractor") != TextExtractor.VERSION:
+            logger.info(f"向量索引 {path} 由其他版本的擷取器建立，將重新建立")
+            return index
+
+        index.embeddings = embeddings
+        index._assignments = assignments
+        index._alive = np.ones(len(embeddings), dtype=bool)
+        index.size = index.live_count = len(embeddings)
+        index.centroids = centroids
+        index.metadata = meta["metadata"]
+        index.files = meta["files"]
+        index.trained_size = meta["trained_size"]
+        return index
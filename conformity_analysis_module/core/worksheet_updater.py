@@ -1,37 +1,63 @@
 import os
-import json
 import re
 import shutil
 import openpyxl
-import tkinter as tk
-from tkinter import filedialog
 from conformity_analysis_module.utils.docx_section_extractor import DocxSectionExtractor
+from conformity_analysis_module.core.results_store import iter_analysis_results
 from conformity_analysis_module.utils.logger import logger
 from conformity_analysis_module.config import Config
 
 class WorksheetUpdater:
     @staticmethod
-    def update_worksheet():
-        analysis_file = Config.ANALYSIS_OUTPUT
-        template_file = Config.WORKSHEET_FILE
-        print(analysis_file)
+    def ask_save_path():
+        """讓使用者選擇存檔位置（只在 GUI 流程使用，tkinter 延遲匯入）"""
+        import tkinter as tk
+        from tkinter import filedialog
+        root = tk.Tk()
+        root.withdraw()  # 隱藏 Tkinter 視窗
+        save_path = filedialog.asksaveasfilename(
+            title="選擇儲存 Excel 檔案",
+            defaultextension=".xlsx",
+            filetypes=[("Excel files", "*.xlsx")],
+            initialfile="IEC62443_2_4d_filled.xlsx"
+        )
+        root.destroy()
+        return save_path
+
+    @staticmethod
+    def update_worksheet(analysis_file=None, save_path=None, template_file=None):
+        """
+        以分析結果填寫 Worksheet。未指定 save_path 時跳出存檔對話框；
+        命令列等無人值守的流程應直接指定 save_path。回傳 (是否成功, 訊息)。
+        """
+        analysis_file = analysis_file or Config.ANALYSIS_OUTPUT
+        template_file = template_file or Config.WORKSHEET_FILE
+        analysis_name = os.path.basename(analysis_file)
         if not os.path.exists(analysis_file):
-            return False, "analysis_results.json 不存在，請先執行分析"
+            return False, f"{analysis_name} 不存在，請先執行分析"
         if not os.path.exists(template_file):
             print(template_file)
             return False, "找不到模板檔案 IEC62443_2_4d_2024-worksheet.xlsx"
 
+        def normalize_req(r):
+            return re.sub(r"\s+", "", str(r).upper())
+
+        # 逐筆串流讀取分析結果，不需一次載入整個檔案
+        results_by_requirement = {}
         try:
-            with open(analysis_file, 'r', encoding='utf-8') as f:
-                analysis_results = json.load(f)
+            for entry in iter_analysis_results(analysis_file):
+                req = normalize_req(entry.get("requirement", ""))
+                if req:
+                    results_by_requirement.setdefault(req, []).append(entry)
         except Exception as e:
             logger.error(f"讀取 {analysis_file} 時發生錯誤: {e}")
-            return False, "讀取 analysis_results.json 時發生錯誤"
+            return False, f"讀取 {analysis_name} 時發生錯誤"
 
         # 複製模板檔案到臨時位置
         temp_dir = os.path.join(Config.ROOT_DIR, "temp")
         os.makedirs(temp_dir, exist_ok=True)
-        temp_file = os.path.join(temp_dir, "IEC62443_2_4d_filled.xlsx")
+        # 以行程編號區分暫存檔，避免多個批次工作同時執行時互相覆寫
+        temp_file = os.path.join(temp_dir, f"IEC62443_2_4d_filled_{os.getpid()}.xlsx")
         shutil.copy(template_file, temp_file)
 
         try:
@@ -47,15 +73,7 @@ class WorksheetUpdater:
 
             id_col, stmt_col, evi_col = (header[h] for h in required_headers)
 
-            def normalize_req(r):
-                return re.sub(r"\s+", "", str(r).upper())
-
-            results_by_requirement = {}
-            for entry in analysis_results:
-                req = normalize_req(entry.get("requirement", ""))
-                if req:
-                    results_by_requirement.setdefault(req, []).append(entry)
-
+            extractors = {}
             grouped_by_source = {}
             for req, entries in results_by_requirement.items():
                 source_order = []
@@ -82,7 +100,9 @@ class WorksheetUpdater:
                         section_str = ""
                         if src.lower().endswith('.docx'):
                             try:
-                                extractor = DocxSectionExtractor(src)
+                                if src not in extractors:
+                                    extractors[src] = DocxSectionExtractor(src)
+                                extractor = extractors[src]
                                 section_str = extractor.get_section_number(snippet)
                             except Exception as e:
                                 logger.error(f"取得 section 編號失敗，檔案 {src}: {e}")
@@ -96,15 +116,8 @@ class WorksheetUpdater:
                     filenames = [os.path.splitext(os.path.basename(e["source_file"]))[0] for e in evidence_entries]
                     ws.cell(row=row, column=evi_col, value="\n\n".join(filenames))
 
-            # 讓使用者選擇存檔位置
-            root = tk.Tk()
-            root.withdraw()  # 隱藏 Tkinter 視窗
-            save_path = filedialog.asksaveasfilename(
-                title="選擇儲存 Excel 檔案",
-                defaultextension=".xlsx",
-                filetypes=[("Excel files", "*.xlsx")],
-                initialfile="IEC62443_2_4d_filled.xlsx"
-            )
+            if save_path is None:
+                save_path = WorksheetUpdater.ask_save_path()
 
             if save_path:
                 wb.save(save_path)
@@ -117,3 +130,6 @@ class WorksheetUpdater:
         except Exception as e:
             logger.error(f"更新 Worksheet 時發生錯誤: {e}")
             return False, "更新 Worksheet 時發生錯誤"
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
@@ -1,4 +1,6 @@
 # gui/__init__.py
 from .main_window import ConformityAnalysisWindow
+from .model_warmup import ModelWarmupWorker
+from .analysis_worker import AnalysisWorker
 
-__all__ = ['ConformityAnalysisWindow']
\ No newline at end of file
+__all__ = ['ConformityAnalysisWindow', 'ModelWarmupWorker', 'AnalysisWorker']
\ No newline at end of file
@@ -0,0 +1,83 @@
+# gui/analysis_worker.py
+import os
+import time
+from PyQt6.QtCore import QObject, pyqtSignal
+from conformity_analysis_module.core.analyzer import Analyzer
+from conformity_analysis_module.config import Config
+
+class AnalysisWorker(QObject):
+    """
+    在背景執行緒執行 Analyzer.analyze，逐檔回報進度與預估剩餘時間。
+    cancel_analysis() 只設定旗標，分析會在處理下一個檔案前停止，已完成檔案的結果仍會寫入並回傳。
+    指定 client（ServiceClient）時改由常駐分析服務執行，取回的結果寫入 Config.ANALYSIS_OUTPUT。
+    """
+    progress_update = pyqtSignal(int, int, float, str)  # (已完成檔案數, 總檔案數, 預估剩餘秒數（未知為 -1）, 檔案路徑)
+    analysis_finished = pyqtSignal(list, bool)  # (結果, 是否被取消)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, analyzer, folder, requirements, client=None, **options):
+        super().__init__()
+        self.analyzer = analyzer
+        self.client = client
+        self.folder = folder
+        self.requirements = requirements
+        self.options = options
+        self.cancel_analysis_flag = False
+        self.total_files = 0
+        self.current_progress = 0
+        self.baseline = None  # 第一次回報時的 (時間, 已完成檔案數, 已完成位元組)，續跑時已完成的檔案不計入吞吐量
+
+    def start_analysis(self):
+        if self.client is not None:
+            self.start_service_analysis()
+            return
+        try:
+            results = self.analyzer.analyze(self.folder, self.requirements, progress=self.on_progress,
+                                            cancel=self.is_cancelled, **self.options)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+            return
+        self.analysis_finished.emit(results, bool(self.analyzer.last_stats.get("cancelled")))
+
+    def start_service_analysis(self):
+        def on_job(job):
+            progress = job["progress"]
+            if job["state"] == "running" and progress["total"]:
+                self.on_progress(progress["file"], progress["done"], progress["total"],
+                                 progress["done_bytes"], progress["total_bytes"])
+
+        try:
+            job, results = self.client.analyze(os.path.abspath(self.folder), list(self.requirements),
+                                               on_progress=on_job, cancel=self.is_cancelled, **self.options)
+            Analyzer.write_results(Config.ANALYSIS_OUTPUT, results)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+            return
+        self.analysis_finished.emit(results, job["state"] == "cancelled")
+
+    def cancel_analysis(self):
+        self.cancel_analysis_flag = True
+
+    def is_cancelled(self):
+        return self.cancel_analysis_flag
+
+    def on_progress(self, file_path, done, total, done_bytes, total_bytes):
+        now = time.perf_counter()
+        if self.baseline is None:
+            self.baseline = (now, done, done_bytes)
+        self.total_files = total
+        self.current_progress = done
+        self.progress_update.emit(done, total, self.estimate_remaining(now, done, total, done_bytes, total_bytes),
+                                  file_path)
+
+    def estimate_remaining(self, now, done, total, done_bytes, total_bytes):
+        """依目前為止的吞吐量（有檔案大小時以位元組/秒，否則以檔案/秒）估算剩餘秒數"""
+        start, start_done, start_bytes = self.baseline
+        elapsed = now - start
+        if done >= total:
+            return 0.0
+        if elapsed <= 0 or done <= start_done:
+            return -1.0
+        if total_bytes > 0 and done_bytes > start_bytes:
+            return (total_bytes - done_bytes) / ((done_bytes - start_bytes) / elapsed)
+        return (total - done) / ((done - start_done) / elapsed)
@@ -1,9 +1,14 @@
 # gui/main_window.py
 import re
-from PyQt6.QtWidgets import QMainWindow, QVBoxLayout, QPushButton, QFileDialog, QListWidget, QLabel, QTextEdit, QWidget, QListWidgetItem
+from PyQt6.QtCore import QThread, pyqtSlot
+from PyQt6.QtWidgets import QMainWindow, QVBoxLayout, QPushButton, QFileDialog, QListWidget, QLabel, QTextEdit, QWidget, QListWidgetItem, QProgressBar
 from conformity_analysis_module.core.analyzer import Analyzer
 from conformity_analysis_module.core.worksheet_updater import WorksheetUpdater
 from conformity_analysis_module.core.requirements_loader import RequirementsLoader
+from conformity_analysis_module.gui.model_warmup import ModelWarmupWorker
+from conformity_analysis_module.gui.analysis_worker import AnalysisWorker
+from conformity_analysis_module.service.client import ServiceClient
+from conformity_analysis_module.config import Config
 from conformity_analysis_module.utils.logger import logger
 
 class ConformityAnalysisWindow(QMainWindow):
@@ -14,7 +19,15 @@ class ConformityAnalysisWindow(QMainWindow):
         self.requirements = RequirementsLoader.load()
         self.folder_path = None
         self.analyzer = Analyzer()
+        self.warmup_thread = None
+        self.warmup_worker = None
+        self.analysis_thread = None
+        self.analysis_worker = None
+        # 常駐分析服務可連線時（於背景載入模型前檢查），分析與查詢交給服務，不在本機載入模型
+        self.service_client = ServiceClient() if Config.USE_ANALYSIS_SERVICE else None
+        self.service = None
         self.init_ui()
+        self.start_model_warmup()
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -33,10 +46,32 @@ class ConformityAnalysisWindow(QMainWindow):
             self.requirements_list.addItem(QListWidgetItem(key))
         layout.addWidget(self.requirements_list)
 
+        self.model_status_label = QLabel("模型載入中...", self)
+        layout.addWidget(self.model_status_label)
+
+        # 預先載入失敗時顯示，可重新在背景載入
+        self.retry_model_button = QPushButton("重新載入模型", self)
+        self.retry_model_button.clicked.connect(self.start_model_warmup)
+        self.retry_model_button.setVisible(False)
+        layout.addWidget(self.retry_model_button)
+
         self.analyze_button = QPushButton("開始分析", self)
         self.analyze_button.clicked.connect(self.analyze)
         layout.addWidget(self.analyze_button)
 
+        self.cancel_button = QPushButton("取消分析", self)
+        self.cancel_button.clicked.connect(self.cancel_analysis)
+        self.cancel_button.setEnabled(False)
+        layout.addWidget(self.cancel_button)
+
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+
+        self.query_index_button = QPushButton("快速查詢 (索引)", self)
+        self.query_index_button.clicked.connect(self.query_index)
+        layout.addWidget(self.query_index_button)
+
         self.fill_worksheet_button = QPushButton("填入 Worksheet", self)
         self.fill_worksheet_button.clicked.connect(self.fill_worksheet)
         layout.addWidget(self.fill_worksheet_button)
@@ -49,22 +84,181 @@ class ConformityAnalysisWindow(QMainWindow):
         container.setLayout(layout)
         self.setCentralWidget(container)
 
+    def start_model_warmup(self):
+        """在背景執行緒載入模型，載入完成前停用需要模型的按鈕"""
+        self.analyze_button.setEnabled(False)
+        self.query_index_button.setEnabled(False)
+        self.retry_model_button.setVisible(False)
+        self.model_status_label.setText("模型載入中...")
+
+        self.warmup_thread = QThread()
+        self.warmup_worker = ModelWarmupWorker(self.analyzer, self.service_client)
+        self.warmup_worker.moveToThread(self.warmup_thread)
+        self.warmup_thread.started.connect(self.warmup_worker.run)
+        self.warmup_worker.model_ready.connect(self.on_model_ready)
+        self.warmup_worker.service_ready.connect(self.on_service_ready)
+        self.warmup_worker.error_occurred.connect(self.on_model_error)
+        self.warmup_thread.start()
+
+    def stop_model_warmup(self):
+        if self.warmup_thread:
+            self.warmup_thread.quit()
+            self.warmup_thread.wait()
+            self.warmup_thread.deleteLater()
+            self.warmup_worker.deleteLater()
+        self.warmup_thread = None
+        self.warmup_worker = None
+
+    def on_model_ready(self):
+        self.stop_model_warmup()
+        self.model_status_label.setText("模型已就緒")
+        self.analyze_button.setEnabled(True)
+        self.query_index_button.setEnabled(True)
+
+    def on_service_ready(self):
+        self.stop_model_warmup()
+        self.service = self.service_client
+        logger.info(f"使用分析服務: {self.service.url}")
+        self.model_status_label.setText(f"使用分析服務: {self.service.url}")
+        self.analyze_button.setEnabled(True)
+        self.query_index_button.setEnabled(True)
+
+    def on_model_error(self, message):
+        self.stop_model_warmup()
+        logger.error(f"載入模型時發生錯誤: {message}")
+        self.model_status_label.setText(f"模型載入失敗: {message}（可重新載入，或直接分析時再載入）")
+        self.retry_model_button.setVisible(True)
+        # 預先載入只是為了縮短第一次分析的等待；失敗時仍允許操作，第一次使用時會再嘗試載入模型
+        self.analyze_button.setEnabled(True)
+        self.query_index_button.setEnabled(True)
+
+    def closeEvent(self, event):
+        # 等待背景載入與分析結束，避免 QThread 在執行中被回收
+        if self.analysis_worker:
+            self.analysis_worker.cancel_analysis()
+        self.stop_analysis_thread()
+        self.stop_model_warmup()
+        self.analyzer.close()
+        super().closeEvent(event)
+
     def select_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "選擇資料夾", "")
         if folder:
             self.folder_path = folder
             self.folder_label.setText(f"選擇的資料夾: {folder}")
 
+    def selected_requirements(self):
+        return {re.sub(r"\s+", "", item.text().upper()): self.requirements[item.text()] 
+                for item in self.requirements_list.selectedItems()}
+
     def analyze(self):
         if not self.folder_path or not self.requirements_list.selectedItems():
             self.result_text.setText("請選擇資料夾和至少一個條款要求")
             return
         
-        selected_requirements = {re.sub(r"\s+", "", item.text().upper()): self.requirements[item.text()] 
-                                for item in self.requirements_list.selectedItems()}
+        selected_requirements = self.selected_requirements()
         logger.info(f"選擇的條款要求: {list(selected_requirements.keys())}")
-        results = self.analyzer.analyze(self.folder_path, selected_requirements)
-        self.result_text.setText(f"分析完成！共找到 {len(results)} 筆符合結果，結果已儲存至 analysis_results.json")
+        self.set_analysis_running(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("準備分析...")
+        self.result_text.setText("分析中...")
+
+        self.analysis_thread = QThread()
+        self.analysis_worker = AnalysisWorker(self.analyzer, self.folder_path, selected_requirements, self.service)
+        self.analysis_worker.moveToThread(self.analysis_thread)
+        self.analysis_thread.started.connect(self.analysis_worker.start_analysis)
+        self.analysis_worker.progress_update.connect(self.update_progress_bar)
+        self.analysis_worker.analysis_finished.connect(self.on_analysis_finished)
+        self.analysis_worker.error_occurred.connect(self.on_analysis_error)
+        self.analysis_thread.start()
+
+    def set_analysis_running(self, running):
+        self.analyze_button.setEnabled(not running)
+        self.query_index_button.setEnabled(not running)
+        self.fill_worksheet_button.setEnabled(not running)
+        self.select_folder_button.setEnabled(not running)
+        self.retry_model_button.setEnabled(not running)
+        self.cancel_button.setEnabled(running)
+
+    def cancel_analysis(self):
+        if self.analysis_worker:
+            # 分析會在處理下一個檔案前停止，完成後由 on_analysis_finished 收尾
+            self.analysis_worker.cancel_analysis()
+            self.cancel_button.setEnabled(False)
+            self.progress_bar.setFormat("正在取消...")
+
+    def stop_analysis_thread(self):
+        if self.analysis_thread:
+            self.analysis_thread.quit()
+            self.analysis_thread.wait()
+            self.analysis_thread.deleteLater()
+            self.analysis_worker.deleteLater()
+        self.analysis_thread = None
+        self.analysis_worker = None
+
+    @staticmethod
+    def format_eta(seconds):
+        if seconds < 0:
+            return "估算中"
+        minutes, seconds = divmod(int(seconds + 0.5), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+    @pyqtSlot(int, int, float, str)
+    def update_progress_bar(self, done, total, eta, file_path):
+        if total <= 0:
+            self.progress_bar.setValue(100)
+            self.progress_bar.setFormat("沒有需要分析的檔案")
+            return
+        if self.analysis_worker and self.analysis_worker.cancel_analysis_flag:
+            return
+        self.progress_bar.setValue(int(done / total * 100))
+        self.progress_bar.setFormat(f"正在分析... ({done}/{total})，剩餘 {self.format_eta(eta)}")
+
+    @pyqtSlot(list, bool)
+    def on_analysis_finished(self, results, cancelled):
+        self.stop_analysis_thread()
+        self.set_analysis_running(False)
+        if cancelled:
+            self.progress_bar.setFormat("分析已取消")
+            self.result_text.setText(f"分析已取消，保留已完成檔案的 {len(results)} 筆結果（已儲存至 analysis_results.jsonl），"
+                                     f"再次分析時只會處理尚未完成的檔案")
+        else:
+            self.progress_bar.setValue(100)
+            self.progress_bar.setFormat("分析完成")
+            self.result_text.setText(f"分析完成！共找到 {len(results)} 筆符合結果，結果已儲存至 analysis_results.jsonl")
+
+    @pyqtSlot(str)
+    def on_analysis_error(self, message):
+        self.stop_analysis_thread()
+        self.set_analysis_running(False)
+        logger.error(f"分析時發生錯誤: {message}")
+        self.progress_bar.setFormat("分析失敗")
+        self.result_text.setText(f"分析時發生錯誤: {message}")
+
+    def query_index(self):
+        """以先前分析建立的向量索引查詢所選條款，不重新掃描資料夾"""
+        if not self.requirements_list.selectedItems():
+            self.result_text.setText("請選擇至少一個條款要求")
+            return
+
+        selected_requirements = self.selected_requirements()
+        logger.info(f"索引查詢條款要求: {list(selected_requirements.keys())}")
+        if self.service is not None:
+            try:
+                results = self.service.query(list(selected_requirements), self.folder_path)
+                Analyzer.write_results(Config.QUERY_OUTPUT, results)
+            except Exception as e:
+                logger.error(f"分析服務查詢時發生錯誤: {e}")
+                self.result_text.setText(f"分析服務查詢時發生錯誤: {e}")
+                return
+        else:
+            results = self.analyzer.query_index(selected_requirements, self.folder_path)
+        if not results:
+            self.result_text.setText("索引中沒有結果，請先對資料夾執行一次完整分析")
+            return
+        self.result_text.setText(f"索引查詢完成！共找到 {len(results)} 筆結果，結果已儲存至 index_query_results.jsonl"
+                                 f"（不影響分析結果與工作表填寫）")
 
     def fill_worksheet(self):
         success, message = WorksheetUpdater.update_worksheet()
@@ -0,0 +1,27 @@
+# gui/model_warmup.py
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class ModelWarmupWorker(QObject):
+    """
+    在背景執行緒載入 Analyzer 的模型與條款向量庫，完成後發出 model_ready。
+    指定 client（ServiceClient）時先檢查常駐分析服務，可連線時發出 service_ready 而不載入模型。
+    """
+    model_ready = pyqtSignal()
+    service_ready = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, analyzer, client=None):
+        super().__init__()
+        self.analyzer = analyzer
+        self.client = client
+
+    def run(self):
+        if self.client is not None and self.client.is_available():
+            self.service_ready.emit()
+            return
+        try:
+            self.analyzer.warm_up()
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+            return
+        self.model_ready.emit()
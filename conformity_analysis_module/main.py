@@ -1,6 +1,7 @@
 # conformity_analysis_module/main.py
 import sys
 import os
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from conformity_analysis_module.gui.main_window import ConformityAnalysisWindow
 
@@ -25,5 +26,6 @@ class ConformityAnalysis:
 
 # 僅在獨立執行時啟動
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包後的擷取子行程需要
     app = ConformityAnalysis()
     app.run()
\ No newline at end of file
@@ -0,0 +1,6 @@
+# service/__init__.py
+from .client import ServiceClient, ServiceError
+from .server import AnalysisService
+from .auth import load_token
+
+__all__ = ['ServiceClient', 'ServiceError', 'AnalysisService', 'load_token']
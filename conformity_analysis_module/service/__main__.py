@@ -0,0 +1,8 @@
+# service/__main__.py
+import sys
+import multiprocessing
+from conformity_analysis_module.service.server import main
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
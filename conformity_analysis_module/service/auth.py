@@ -0,0 +1,49 @@
+# service/auth.py
+"""
+分析服務的存取控制：每個安裝各自產生一組隨機權杖，存放在只有目前使用者可讀寫的檔案（Config.SERVICE_TOKEN_FILE），
+服務與同一安裝的用戶端都從該檔案讀取；請求需以 TOKEN_HEADER 帶上權杖，Host 標頭必須是本機位址。
+"""
+import os
+import hmac
+import secrets
+from conformity_analysis_module.config import Config
+
+TOKEN_HEADER = "X-Service-Token"
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+def load_token(create=False, path=None):
+    """讀取權杖；檔案不存在（或為空）且 create 為 True 時產生新權杖並以 0600 權限寫入，否則回傳 None"""
+    path = path or Config.SERVICE_TOKEN_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            token = f.read().strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    if not create:
+        return None
+
+    token = secrets.token_urlsafe(32)
+    Config.ensure_dir(os.path.dirname(os.path.abspath(path)))
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    os.replace(temp_path, path)
+    return token
+
+def token_matches(expected, supplied):
+    """以固定時間比較權杖"""
+    return bool(expected) and hmac.compare_digest(expected.encode("utf-8"), (supplied or "").encode("utf-8"))
+
+def host_name(host_header):
+    """Host 標頭去掉連接埠後的主機名稱（IPv6 位址去掉方括號）"""
+    host = (host_header or "").strip().lower()
+    if host.startswith("["):
+        return host[1:].split("]", 1)[0]
+    return host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+
+def host_allowed(host_header, allowed_hosts=LOCAL_HOSTS):
+    """Host 標頭必須是允許的主機名稱，避免網頁以 DNS rebinding 透過瀏覽器存取本機服務"""
+    return host_name(host_header) in allowed_hosts
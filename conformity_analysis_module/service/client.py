@@ -0,0 +1,93 @@
+# service/client.py
+import json
+import time
+import urllib.error
+import urllib.request
+from conformity_analysis_module.config import Config
+from conformity_analysis_module.service.auth import TOKEN_HEADER, load_token
+
+class ServiceError(Exception):
+    """分析服務無法連線或回傳錯誤"""
+
+class ServiceClient:
+    """常駐分析服務（service/server.py）的 HTTP 用戶端，只使用標準函式庫；token 未指定時讀取本安裝的權杖檔"""
+    def __init__(self, url=None, timeout=10, token=None):
+        self.url = (url or f"http://{Config.SERVICE_HOST}:{Config.SERVICE_PORT}").rstrip("/")
+        self.timeout = timeout
+        self.token = token or load_token()
+
+    def _request(self, method, path, payload=None, timeout=None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8') if payload is not None else None
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        request = urllib.request.Request(f"{self.url}{path}", data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8')).get("error", str(e))
+            except Exception:
+                message = str(e)
+            raise ServiceError(message) from e
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            raise ServiceError(f"無法連線到分析服務 {self.url}: {e}") from e
+
+    def is_available(self, timeout=1):
+        try:
+            return self._request("GET", "/health", timeout=timeout).get("status") == "ok"
+        except ServiceError:
+            return False
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def submit(self, job_type="analyze", **params):
+        """送出工作，回傳工作狀態（含 id）"""
+        return self._request("POST", "/jobs", dict(params, type=job_type))
+
+    def status(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def jobs(self):
+        return self._request("GET", "/jobs")
+
+    def results(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}/results", timeout=max(self.timeout, 120))
+
+    def cancel(self, job_id):
+        return self._request("POST", f"/jobs/{job_id}/cancel")
+
+    def wait(self, job_id, poll=0.5, on_progress=None, cancel=None):
+        """
+        等待工作結束並回傳最終狀態。on_progress(狀態) 在每次輪詢後呼叫；
+        cancel() 回傳 True 時向服務送出取消要求（只送一次），並繼續等待工作結束。
+        """
+        cancel_sent = False
+        while True:
+            job = self.status(job_id)
+            if on_progress is not None:
+                on_progress(job)
+            if job["state"] not in ("queued", "running"):
+                return job
+            if cancel is not None and not cancel_sent and cancel():
+                self.cancel(job_id)
+                cancel_sent = True
+            time.sleep(poll)
+
+    def analyze(self, folder, requirements=None, on_progress=None, cancel=None, **params):
+        """送出分析工作並等待完成，回傳 (最終狀態, 結果)"""
+        job = self.submit("analyze", folder=folder, requirements=requirements, **params)
+        job = self.wait(job["id"], on_progress=on_progress, cancel=cancel)
+        if job["state"] == "failed":
+            raise ServiceError(job["error"])
+        return job, self.results(job["id"])
+
+    def query(self, requirements=None, folder=None, top_k=None, **params):
+        """以服務端的語料向量索引查詢，回傳結果"""
+        job = self.submit("query", folder=folder, requirements=requirements, top_k=top_k, **params)
+        job = self.wait(job["id"], poll=0.1)
+        if job["state"] == "failed":
+            raise ServiceError(job["error"])
+        return self.results(job["id"])
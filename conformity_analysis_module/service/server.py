@@ -0,0 +1,389 @@
+# service/server.py
+"""
+常駐的本機分析服務：模型、條款向量庫與快取只載入一次，GUI 與命令列工具以 HTTP 送出分析或查詢工作。
+python -m conformity_analysis_module.service [--port 8765] [--workers 2] [--model <模型路徑>] [--int8]
+
+每個請求都需以 X-Service-Token 標頭帶上本安裝的權杖（見 service/auth.py，服務啟動時自動產生），
+Host 標頭必須是本機位址，POST 的內容必須是 application/json。結果檔只寫在 Config.SERVICE_OUTPUT_DIR 之下，
+用戶端以 /jobs/<id>/results 取得結果後自行寫入本機檔案。
+
+API（JSON）：
+  GET  /health                服務狀態
+  POST /jobs                  送出工作 {"type": "analyze" | "query" | "prefiltered", ...參數}，回傳 {"id"}；
+                              output_path 為相對於 Config.SERVICE_OUTPUT_DIR 的路徑，未指定時依資料夾決定
+  GET  /jobs                  所有工作的狀態
+  GET  /jobs/<id>             工作狀態與進度
+  GET  /jobs/<id>/results     工作結果
+  POST /jobs/<id>/cancel      取消等待中或執行中的工作
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from conformity_analysis_module.config import Config
+from conformity_analysis_module.core.analyzer import Analyzer
+from conformity_analysis_module.core.extraction_pool import ExtractionPool
+from conformity_analysis_module.core.requirement_bank import RequirementBank
+from conformity_analysis_module.core.requirements_loader import RequirementsLoader
+from conformity_analysis_module.core.results_store import iter_analysis_results
+from conformity_analysis_module.service.auth import TOKEN_HEADER, LOCAL_HOSTS, load_token, token_matches, host_allowed
+from conformity_analysis_module.utils.logger import logger
+
+class Job:
+    """一個分析或查詢工作：參數、狀態（queued/running/done/failed/cancelled）、進度與結果摘要"""
+    def __init__(self, job_type, params):
+        self.id = uuid.uuid4().hex[:12]
+        self.type = job_type
+        self.params = params
+        self.state = "queued"
+        self.progress = {"done": 0, "total": 0, "done_bytes": 0, "total_bytes": 0, "file": ""}
+        self.output_path = None
+        self.result_count = None
+        self.results = None  # 查詢工作的結果保留在記憶體；分析工作由 output_path 讀取
+        self.stats = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_flag = False
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "type": self.type,
+            "state": self.state,
+            "params": self.params,
+            "progress": self.progress,
+            "output_path": self.output_path,
+            "result_count": self.result_count,
+            "stats": self.stats,
+            "error": self.error,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished
+        }
+
+class AnalysisService:
+    """
+    工作佇列與執行緒：最多 workers 個工作同時執行，等待中的工作超過 max_queue 時拒絕新工作。
+    所有工作共用同一份已載入的模型（Analyzer.share()）與同一個擷取行程池，行程數不會隨同時執行的工作數倍增；
+    輸出到同一路徑的工作依序執行。同時執行的分析儲存語料向量索引時依序合併各自的變更（見 AnalysisRun.save_index）。
+    """
+    JOB_TYPES = ("analyze", "query", "prefiltered")
+
+    def __init__(self, model_name='models/all-MiniLM-L12-v2', quantize=None, encode_workers=None,
+                 workers=None, max_queue=None, history=None):
+        self.analyzer = Analyzer(model_name, quantize=quantize, encode_workers=encode_workers)
+        self.workers = max(1, workers or Config.SERVICE_WORKERS)
+        self.history = history or Config.SERVICE_JOB_HISTORY
+        self.pending = queue.Queue(maxsize=max(1, max_queue or Config.SERVICE_MAX_QUEUE))
+        self.jobs = OrderedDict()
+        self.requirements = {}
+        self._lock = threading.Lock()
+        self._output_locks = {}
+        self._threads = []
+        self.started = time.time()
+
+    def start(self):
+        """載入模型、條款向量庫與條款文字，再啟動工作執行緒"""
+        logger.info(f"分析服務啟動中，載入模型: {self.analyzer.model_tag}")
+        self.analyzer.warm_up()
+        self.analyzer.extract_executor = ExtractionPool.create_executor(Config.EXTRACT_WORKERS)
+        os.makedirs(Config.SERVICE_OUTPUT_DIR, mode=0o700, exist_ok=True)
+        self.requirements = {RequirementBank.normalize_key(k): v for k, v in RequirementsLoader.load().items()}
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"AnalysisServiceWorker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        for job in list(self.jobs.values()):
+            job.cancel_flag = True
+        for _ in self._threads:
+            self.pending.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.analyzer.extract_executor is not None:
+            self.analyzer.extract_executor.shutdown(cancel_futures=True)
+            self.analyzer.extract_executor = None
+        self.analyzer.close()
+
+    def health(self):
+        with self._lock:
+            states = [job.state for job in self.jobs.values()]
+        return {
+            "status": "ok",
+            "model": self.analyzer.model_tag,
+            "ready": self.analyzer.is_ready,
+            "workers": self.workers,
+            "queued": states.count("queued"),
+            "running": states.count("running"),
+            "requirements": len(self.requirements),
+            "uptime": time.time() - self.started
+        }
+
+    def select_requirements(self, keys):
+        if not keys:
+            return dict(self.requirements)
+        if isinstance(keys, str):
+            keys = keys.split(",")
+        wanted = [RequirementBank.normalize_key(k) for k in keys if str(k).strip()]
+        missing = [k for k in wanted if k not in self.requirements]
+        if missing:
+            raise ValueError(f"找不到條款: {missing}")
+        return {k: self.requirements[k] for k in wanted}
+
+    @staticmethod
+    def default_output(job_type, folder):
+        """未指定輸出路徑時，每個資料夾固定使用同一個結果檔，讓增量分析可以沿用"""
+        folder_key = hashlib.sha256(os.path.abspath(folder or "").encode('utf-8')).hexdigest()[:16]
+        name = "analysis_results.jsonl" if job_type == "analyze" else f"{job_type}_results.jsonl"
+        return os.path.join(Config.SERVICE_OUTPUT_DIR, folder_key, name)
+
+    @staticmethod
+    def resolve_output(job_type, folder, output_path=None):
+        """輸出路徑一律位於 Config.SERVICE_OUTPUT_DIR 之下：指定時視為相對於該目錄的路徑，超出該目錄時拋出 ValueError"""
+        if not output_path:
+            return AnalysisService.default_output(job_type, folder)
+        root = os.path.realpath(Config.SERVICE_OUTPUT_DIR)
+        path = os.path.realpath(os.path.join(root, str(output_path)))
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise ValueError(f"輸出路徑必須位於 {Config.SERVICE_OUTPUT_DIR} 之下: {output_path}")
+        return path
+
+    def submit(self, job_type, params):
+        """建立工作並放入佇列；參數錯誤時拋出 ValueError，佇列已滿時拋出 queue.Full"""
+        if job_type not in self.JOB_TYPES:
+            raise ValueError(f"不支援的工作類型: {job_type}")
+        folder = params.get("folder")
+        if job_type in ("analyze", "prefiltered") and (not folder or not os.path.isdir(folder)):
+            raise ValueError(f"資料夾不存在: {folder}")
+        self.select_requirements(params.get("requirements"))
+
+        job = Job(job_type, params)
+        job.output_path = self.resolve_output(job_type, folder, params.get("output_path"))
+        with self._lock:
+            self.pending.put_nowait(job)
+            self.jobs[job.id] = job
+            self._trim_history()
+        logger.info(f"分析服務收到工作 {job.id}（{job_type}）: {params}")
+        return job
+
+    def _trim_history(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.state not in ("queued", "running")]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._lock:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_flag = True
+        if job.state == "queued":
+            job.state = "cancelled"
+            job.finished = time.time()
+        return job
+
+    def results(self, job):
+        if job.results is not None:
+            return job.results
+        if job.output_path and os.path.exists(job.output_path) and job.state in ("done", "cancelled"):
+            return list(iter_analysis_results(job.output_path))
+        return []
+
+    def _output_lock(self, path):
+        with self._lock:
+            return self._output_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+    def _work(self):
+        while True:
+            job = self.pending.get()
+            if job is None:
+                return
+            if job.cancel_flag:
+                continue
+            with self._output_lock(job.output_path):
+                if job.cancel_flag:
+                    job.state = "cancelled"
+                    job.finished = time.time()
+                    continue
+                job.state = "running"
+                job.started = time.time()
+                try:
+                    self._run(job)
+                except Exception as e:
+                    logger.error(f"分析服務工作 {job.id} 失敗: {e}")
+                    job.state = "failed"
+                    job.error = str(e)
+                job.finished = time.time()
+            logger.info(f"分析服務工作 {job.id} 結束: {job.state}，{job.result_count} 筆結果，"
+                        f"耗時 {job.finished - job.started:.2f} 秒")
+
+    def _run(self, job):
+        params = job.params
+        requirements = self.select_requirements(params.get("requirements"))
+        Config.ensure_dir(os.path.dirname(os.path.abspath(job.output_path)))
+        analyzer = self.analyzer.share()
+
+        def progress(file_path, done, total, done_bytes, total_bytes):
+            job.progress = {"done": done, "total": total, "done_bytes": done_bytes, "total_bytes": total_bytes,
+                            "file": file_path}
+
+        if job.type == "analyze":
+            results = analyzer.analyze(params["folder"], requirements, params.get("threshold", 0.5),
+                                       mode=params.get("mode"), top_k=params.get("top_k"),
+                                       per_file_cap=params.get("per_file_cap"), output_path=job.output_path,
+                                       incremental=params.get("incremental"), progress=progress,
+                                       cancel=lambda: job.cancel_flag)
+            job.stats = analyzer.last_stats
+            job.state = "cancelled" if analyzer.last_stats.get("cancelled") else "done"
+        elif job.type == "query":
+            results = analyzer.query_index(requirements, params.get("folder"), params.get("top_k"), job.output_path)
+            job.results = results
+            job.state = "done"
+        else:
+            results = analyzer.analyze_prefiltered(params["folder"], requirements, params.get("threshold", 0.5),
+                                                   params.get("shortlist_size"), params.get("top_k"), job.output_path)
+            job.results = results
+            job.state = "done"
+        job.result_count = len(results)
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """將 HTTP 請求轉給 server.service（AnalysisService）"""
+    server_version = "ConformityAnalysisService/1.0"
+
+    def log_message(self, format, *args):
+        logger.info(f"分析服務請求 {self.address_string()}: {format % args}")
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def authorize(self):
+        """檢查 Host 標頭與權杖；不符合時回傳錯誤並回傳 False"""
+        if not host_allowed(self.headers.get("Host"), self.server.allowed_hosts):
+            self.send_json(403, {"error": f"不允許的 Host: {self.headers.get('Host')}"})
+            return False
+        if not token_matches(self.server.token, self.headers.get(TOKEN_HEADER)):
+            self.send_json(401, {"error": f"缺少或錯誤的 {TOKEN_HEADER}"})
+            return False
+        return True
+
+    def read_json(self):
+        """讀取 JSON 物件內容；格式錯誤時拋出 ValueError"""
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        payload = json.loads(self.rfile.read(length).decode('utf-8'))
+        if not isinstance(payload, dict):
+            raise ValueError("請求內容必須是 JSON 物件")
+        return payload
+
+    def route(self):
+        parts = [p for p in self.path.split("?")[0].split("/") if p]
+        job = self.server.service.get(parts[1]) if len(parts) >= 2 and parts[0] == "jobs" else None
+        return parts, job
+
+    def do_GET(self):
+        if not self.authorize():
+            return
+        service = self.server.service
+        parts, job = self.route()
+        if parts == ["health"]:
+            self.send_json(200, service.health())
+        elif parts == ["jobs"]:
+            self.send_json(200, service.list_jobs())
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            if job is None:
+                self.send_json(404, {"error": f"找不到工作: {parts[1]}"})
+            elif len(parts) == 2:
+                self.send_json(200, job.to_dict())
+            elif parts[2] == "results":
+                self.send_json(200, service.results(job))
+            else:
+                self.send_json(404, {"error": f"未知的路徑: {self.path}"})
+        else:
+            self.send_json(404, {"error": f"未知的路徑: {self.path}"})
+
+    def do_POST(self):
+        if not self.authorize():
+            return
+        if self.headers.get_content_type() != "application/json":
+            self.send_json(415, {"error": "請求內容必須是 application/json"})
+            return
+        service = self.server.service
+        parts, job = self.route()
+        if parts == ["jobs"]:
+            try:
+                params = self.read_json()
+                job_type = params.pop("type", "analyze")
+                job = service.submit(job_type, params)
+            except (ValueError, KeyError) as e:
+                self.send_json(400, {"error": str(e)})
+                return
+            except queue.Full:
+                self.send_json(503, {"error": "等待中的工作已達上限，請稍後再試"})
+                return
+            self.send_json(202, job.to_dict())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            if job is None:
+                self.send_json(404, {"error": f"找不到工作: {parts[1]}"})
+            else:
+                self.send_json(200, service.cancel(job.id).to_dict())
+        else:
+            self.send_json(404, {"error": f"未知的路徑: {self.path}"})
+
+def serve(service, host=None, port=None):
+    """啟動 HTTP 伺服器（阻塞直到中斷）"""
+    httpd = ThreadingHTTPServer((host or Config.SERVICE_HOST, port or Config.SERVICE_PORT), ServiceRequestHandler)
+    httpd.daemon_threads = True
+    httpd.service = service
+    httpd.token = load_token(create=True)
+    httpd.allowed_hosts = set(LOCAL_HOSTS) | {(host or Config.SERVICE_HOST).lower()}
+    logger.info(f"分析服務監聽於 http://{httpd.server_address[0]}:{httpd.server_address[1]}")
+    print(f"分析服務監聽於 http://{httpd.server_address[0]}:{httpd.server_address[1]}（Ctrl+C 結束）")
+    sys.stdout.flush()
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="常駐的本機符合性分析服務")
+    parser.add_argument("--host", default=Config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="同時執行的工作數")
+    parser.add_argument("--max-queue", type=int, default=None, help="等待中工作的上限")
+    parser.add_argument("--model", default='models/all-MiniLM-L12-v2')
+    parser.add_argument("--int8", action="store_true", help="使用動態 int8 量化模型")
+    parser.add_argument("--encode-workers", type=int, default=None, help="多行程編碼的工作行程數")
+    args = parser.parse_args(argv)
+
+    service = AnalysisService(args.model, quantize=args.int8 or None, encode_workers=args.encode_workers,
+                              workers=args.workers, max_queue=args.max_queue).start()
+    serve(service, args.host, args.port)
+    return 0
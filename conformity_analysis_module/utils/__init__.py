@@ -1,5 +1,7 @@
 # utils/__init__.py
 from .docx_section_extractor import DocxSectionExtractor
 from .logger import logger
+from .tracer import Tracer
+from .file_lock import FileLock
 
-__all__ = ['DocxSectionExtractor', 'logger']
\ No newline at end of file
+__all__ = ['DocxSectionExtractor', 'logger', 'Tracer', 'FileLock']
\ No newline at end of file
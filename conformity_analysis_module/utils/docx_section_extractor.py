@@ -2,11 +2,9 @@
 import re
 import os
 import json
-import chardet
-import pythoncom
-import win32com.client as win32
 from .logger import logger
 from conformity_analysis_module.config import Config
+from text_extraction import TextDecoder
 
 class DocxSectionExtractor:
     def __init__(self, docx_path):
@@ -25,7 +23,7 @@ class DocxSectionExtractor:
         if self.docx_path in cache:
             return cache[self.docx_path]
         else:
-            temp_txt = os.path.join(Config.ROOT_DIR, "temp_output.txt")
+            temp_txt = os.path.join(Config.ROOT_DIR, f"temp_output_{os.getpid()}.txt")
             self.docx_to_txt(self.docx_path, temp_txt)
             encoding = self.detect_encoding(temp_txt)
             with open(temp_txt, 'r', encoding=encoding, errors='replace') as f:
@@ -38,12 +36,17 @@ class DocxSectionExtractor:
             return content
 
     def detect_encoding(self, file_path):
-        with open(file_path, 'rb') as f:
-            raw_data = f.read(1024)
-        result = chardet.detect(raw_data)
-        return result.get("encoding", "utf-8")
+        return TextDecoder.file_encoding(file_path)
 
     def docx_to_txt(self, docx_path, txt_path):
+        try:
+            import pythoncom
+            import win32com.client as win32
+        except ImportError:
+            # 非 Windows 環境（例如命令列批次工作）沒有 Word 可用
+            self.docx_to_txt_without_word(docx_path, txt_path)
+            return
+
         pythoncom.CoInitialize()  # 確保 COM 物件初始化
 
         word = None
@@ -76,6 +79,15 @@ class DocxSectionExtractor:
             if created_new_instance:  
                 word.Quit()  # 只在新建 Word 進程時關閉 Word
 
+    @staticmethod
+    def docx_to_txt_without_word(docx_path, txt_path):
+        """以 python-docx 取出段落文字；Word 自動編號不會出現在文字中，只能找到手動輸入的章節編號"""
+        from docx import Document
+        logger.warning(f"無法使用 Word 轉換，改以 python-docx 讀取: {docx_path}")
+        doc = Document(docx_path)
+        with open(txt_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(p.text for p in doc.paragraphs))
+
     def get_section_number(self, target_text):
         section_stack = []
         numeric_list_stack = []
@@ -0,0 +1,57 @@
+# utils/file_lock.py
+import os
+import time
+from conformity_analysis_module.config import Config
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+class FileLock:
+    """
+    跨行程的獨占檔案鎖（Windows 以 msvcrt.locking，其他平台以 fcntl.flock），鎖在 path 旁的 .lock 檔上。
+    常駐服務與同時執行的命令列分析會寫入同一個檔案（例如語料向量索引），讀取、合併到取代需在鎖內完成。
+    with FileLock(path): ... 會阻塞直到取得鎖。
+    """
+    def __init__(self, path):
+        self.lock_path = f"{path}.lock"
+        self._fd = None
+
+    def acquire(self):
+        Config.ensure_dir(os.path.dirname(os.path.abspath(self.lock_path)))
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.name == "nt":
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if os.name == "nt":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
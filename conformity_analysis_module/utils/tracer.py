@@ -0,0 +1,117 @@
+# utils/tracer.py
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from conformity_analysis_module.config import Config
+from conformity_analysis_module.utils.logger import logger
+
+class Tracer:
+    """
+    分析流程的結構化計時紀錄。
+    每個區段（span）以一行 JSON 附加到追蹤檔（預設 log/conformity_trace.jsonl，與 conformity_analysis.log 同目錄），
+    包含執行編號、區段名稱、開始時間、耗時與處理量（檔案、位元組、片段數等）；
+    分析結束時以 summary() 彙整各區段總耗時、各格式擷取量與最耗時的檔案。
+    path 為 None 時只在記憶體中彙整，不寫檔。
+    """
+    def __init__(self, path=None, slowest=10, run_id=None):
+        self.path = path
+        self.slowest = max(0, slowest)
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.totals = {}  # 區段名稱 -> {"count", "seconds", "max_seconds", 其他數值欄位的加總}
+        self.formats = {}  # 副檔名 -> {"files", "bytes", "snippets", "seconds"}
+        self.file_seconds = {}  # 檔案 -> 擷取與評分耗時合計
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            try:
+                Config.ensure_dir(os.path.dirname(path))
+                self._file = open(path, 'a', encoding='utf-8')
+            except OSError as e:
+                logger.error(f"無法開啟追蹤檔 {path}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """量測 with 區塊的耗時；區塊內可在回傳的 dict 加入處理量欄位"""
+        start_wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.record(name, time.perf_counter() - start, start=start_wall, **attrs)
+
+    def record(self, name, seconds, start=None, **attrs):
+        """記錄一個已量測好的區段（例如在擷取子行程中量測的耗時）"""
+        event = {"run": self.run_id, "span": name,
+                 "start": round(start if start is not None else time.time() - seconds, 6),
+                 "seconds": round(seconds, 6)}
+        event.update(attrs)
+        with self._lock:
+            total = self.totals.setdefault(name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0})
+            total["count"] += 1
+            total["seconds"] += seconds
+            total["max_seconds"] = max(total["max_seconds"], seconds)
+            for key, value in attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    total[key] = total.get(key, 0) + value
+            file_path = attrs.get("file")
+            if file_path:
+                self.file_seconds[file_path] = self.file_seconds.get(file_path, 0.0) + seconds
+            if name == "extract" and file_path:
+                ext = file_path.lower().split('.')[-1]
+                fmt = self.formats.setdefault(ext, {"files": 0, "bytes": 0, "snippets": 0, "seconds": 0.0})
+                fmt["files"] += 1
+                fmt["bytes"] += attrs.get("bytes") or 0
+                fmt["snippets"] += attrs.get("snippets") or 0
+                fmt["seconds"] += seconds
+            self._write(event)
+
+    def _write(self, event):
+        if self._file is None:
+            return
+        try:
+            self._file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except (OSError, ValueError) as e:
+            logger.error(f"寫入追蹤檔時發生錯誤: {e}")
+            self._file = None
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        with self._lock:
+            spans = {name: dict(total, share=total["seconds"] / elapsed if elapsed > 0 else None)
+                     for name, total in self.totals.items()}
+            formats = {ext: dict(fmt, mb_per_second=fmt["bytes"] / 1e6 / fmt["seconds"] if fmt["seconds"] > 0 else None)
+                       for ext, fmt in self.formats.items()}
+            slowest = sorted(self.file_seconds.items(), key=lambda item: -item[1])[:self.slowest]
+        return {"run": self.run_id, "seconds": elapsed, "spans": spans, "formats": formats,
+                "slowest_files": [{"file": path, "seconds": seconds} for path, seconds in slowest]}
+
+    def finish(self):
+        """寫入並記錄本次執行的彙整，回傳 summary()"""
+        summary = self.summary()
+        self._write(dict(summary, span="summary"))
+        lines = [f"執行 {self.run_id} 各階段耗時（共 {summary['seconds']:.2f} 秒）:"]
+        for name, total in sorted(summary["spans"].items(), key=lambda item: -item[1]["seconds"]):
+            lines.append(f"  {name}: {total['count']} 次，{total['seconds']:.3f} 秒，最長 {total['max_seconds']:.3f} 秒")
+        for ext, fmt in sorted(summary["formats"].items()):
+            lines.append(f"  擷取 {ext}: {fmt['files']} 個檔案，{fmt['bytes'] / 1e6:.1f} MB，"
+                         f"{fmt['snippets']} 個片段，{fmt['seconds']:.3f} 秒")
+        for item in summary["slowest_files"]:
+            lines.append(f"  耗時檔案: {item['file']}（{item['seconds']:.3f} 秒）")
+        logger.info("\n".join(lines))
+        return summary
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -18,7 +18,6 @@ from dialogs.floating_dialog import FloatingDialog
 from widgets.draggable_value import DraggableValue
 from widgets.removable_block import RemovableBlock
 from file_search_module.ui.file_searcher import FileSearcher
-from conformity_analysis_module.gui.main_window import ConformityAnalysisWindow
 
 class ExcelEditor(QMainWindow):
     def __init__(self):
@@ -136,6 +135,8 @@ class ExcelEditor(QMainWindow):
 
     def open_conformity_analysis(self):
         """開啟 Conformity Analysis 視窗"""
+        # 延遲匯入：分析模組依賴的重量級套件只在第一次開啟時載入
+        from conformity_analysis_module.gui.main_window import ConformityAnalysisWindow
         self.conformity_dialog = ConformityAnalysisWindow()
         self.conformity_dialog.show()
 
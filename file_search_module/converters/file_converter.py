@@ -1,11 +1,9 @@
 import os
 import html
-import chardet
 import win32com.client
 import pythoncom
 import logging
-from PyPDF2 import PdfReader
-import openpyxl
+from text_extraction import TextDecoder, TextExtractor
 
 # 設定 logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -79,10 +77,7 @@ def convert_txt_to_html(txt_path, html_path):
     將 TXT 轉換為 HTML
     """
     try:
-        with open(txt_path, "rb") as f:
-            raw_data = f.read()
-        encoding = chardet.detect(raw_data).get("encoding", "utf-8")
-        text = raw_data.decode(encoding, errors="ignore")
+        text = TextDecoder.read_text(txt_path, errors="ignore")
         
         html_content = f"<html><head><meta charset='utf-8'></head><body><pre>{html.escape(text)}</pre></body></html>"
         with open(html_path, "w", encoding="utf-8") as f:
@@ -98,8 +93,7 @@ def convert_pdf_to_html(pdf_path, html_path):
     將 PDF 轉換為 HTML
     """
     try:
-        reader = PdfReader(pdf_path)
-        all_text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        all_text = "\n".join(TextExtractor.extract(pdf_path).pages())
         
         html_content = f"<html><head><meta charset='utf-8'></head><body><pre>{html.escape(all_text)}</pre></body></html>"
         with open(html_path, "w", encoding="utf-8") as f:
@@ -115,13 +109,12 @@ def convert_xlsx_to_html(xlsx_path, html_path):
     將 XLSX 轉換為 HTML
     """
     try:
-        wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
         all_text = []
 
-        for sheet in wb:
-            all_text.append(f"<h2>Sheet: {sheet.title}</h2>")
-            for row in sheet.iter_rows(values_only=True):
-                row_text = " | ".join(str(cell) for cell in row if cell is not None)
+        for title, rows in TextExtractor.extract(xlsx_path).sheets():
+            all_text.append(f"<h2>Sheet: {html.escape(title)}</h2>")
+            for row in rows:
+                row_text = " | ".join(row)
                 all_text.append(f"<p>{html.escape(row_text)}</p>")
 
         html_content = f"<html><head><meta charset='utf-8'></head><body>{''.join(all_text)}</body></html>"
@@ -1,16 +1,14 @@
 import os
 import re
-import chardet
-import docx
-import openpyxl
-from PyPDF2 import PdfReader
 from PyQt6.QtCore import QObject, pyqtSignal
+from text_extraction import ExtractionCancelled, TextDecoder, TextExtractor
 
 class SearchWorker(QObject):
     progress_update = pyqtSignal(int)
     search_finished = pyqtSignal(str)
     error_occurred = pyqtSignal(str, str)
     file_matches_found = pyqtSignal(str, list)  # (檔案路徑, [符合的行])
+    page_progress = pyqtSignal(str, int, int)  # (檔案路徑, 已擷取頁數, 總頁數)，大型 PDF 擷取中使用
     
     def __init__(self, folder, keyword):
         super().__init__()
@@ -71,11 +69,7 @@ class SearchWorker(QObject):
     
     def process_text_file(self, file_path, keyword):
         try:
-            with open(file_path, "rb") as f:
-                raw_data = f.read()
-            result = chardet.detect(raw_data)
-            detected_encoding = result["encoding"] or "utf-8"
-            text = raw_data.decode(detected_encoding, errors="replace")
+            text = TextDecoder.read_text(file_path)
         except Exception as e:
             self.error_occurred.emit("錯誤", f"無法讀取文字檔 {file_path}: {e}")
             return
@@ -89,50 +83,24 @@ class SearchWorker(QObject):
             self.file_matches_found.emit(file_path, matches)
     
     def process_pdf_file(self, file_path, keyword):
-        lines = []
-        try:
-            reader = PdfReader(file_path)
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    lines.extend(text.split('\n'))
-        except Exception as e:
-            self.error_occurred.emit("錯誤", f"無法處理 PDF {file_path}: {e}")
-            return
-        
-        matches = []
-        for line in lines:
-            if re.search(re.escape(keyword), line, re.IGNORECASE):
-                matches.append(line.strip())
-        if matches:
-            self.file_matches_found.emit(file_path, matches)
+        self.process_extracted_file(file_path, keyword, "PDF")
     
     def process_docx_file(self, file_path, keyword):
-        try:
-            doc = docx.Document(file_path)
-            lines = [para.text for para in doc.paragraphs]
-        except Exception as e:
-            self.error_occurred.emit("錯誤", f"無法處理 Word 文件 {file_path}: {e}")
-            return
-        
-        matches = []
-        for line in lines:
-            if re.search(re.escape(keyword), line, re.IGNORECASE):
-                matches.append(line.strip())
-        if matches:
-            self.file_matches_found.emit(file_path, matches)
+        self.process_extracted_file(file_path, keyword, "Word 文件")
     
     def process_xlsx_file(self, file_path, keyword):
-        lines = []
+        self.process_extracted_file(file_path, keyword, "Excel 文件")
+    
+    def process_extracted_file(self, file_path, keyword, label):
+        # 由共用擷取層讀取（已分析或搜尋過的檔案直接使用擷取快取，不再解析）
         try:
-            wb = openpyxl.load_workbook(file_path, read_only=True)
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                for row in ws.iter_rows(values_only=True):
-                    row_text = " ".join(str(cell) for cell in row if cell is not None)
-                    lines.append(row_text)
+            lines = TextExtractor.lines(file_path,
+                                        progress=lambda done, total: self.page_progress.emit(file_path, done, total),
+                                        cancel=lambda: self.cancel_search_flag)
+        except ExtractionCancelled:
+            return  # 已完成的頁面留在頁面快取，下次搜尋只擷取其餘頁面
         except Exception as e:
-            self.error_occurred.emit("錯誤", f"無法處理 Excel 文件 {file_path}: {e}")
+            self.error_occurred.emit("錯誤", f"無法處理 {label} {file_path}: {e}")
             return
         
         matches = []
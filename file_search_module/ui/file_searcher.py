@@ -1,3 +1,4 @@
+import os
 from PyQt6.QtCore import Qt, pyqtSlot, QThread
 from PyQt6.QtGui import QFont, QAction
 from PyQt6.QtWidgets import (
@@ -222,6 +223,7 @@ class FileSearcher(QMainWindow):
         
         self.worker_thread.started.connect(self.search_worker.start_search)
         self.search_worker.progress_update.connect(self.update_progress_bar)
+        self.search_worker.page_progress.connect(self.update_page_progress)
         self.search_worker.search_finished.connect(self.on_search_finished)
         self.search_worker.error_occurred.connect(self.show_error_message)
         self.search_worker.file_matches_found.connect(
@@ -255,6 +257,15 @@ class FileSearcher(QMainWindow):
             self.progress_bar.setValue(100)
             self.progress_bar.setFormat("找不到可搜尋的檔案！")
     
+    @pyqtSlot(str, int, int)
+    def update_page_progress(self, file_path, done, pages):
+        # 大型 PDF 擷取時顯示頁數進度，避免進度條在同一個檔案上看似停住
+        if self.search_worker and pages > 0 and done < pages:
+            value = self.search_worker.current_progress
+            total = self.search_worker.total_files
+            self.progress_bar.setFormat(
+                f"正在搜尋... ({value}/{total}) {os.path.basename(file_path)} 第 {done}/{pages} 頁")
+
     @pyqtSlot(str)
     def on_search_finished(self, message):
         self.progress_bar.setFormat(message)
@@ -1,11 +1,11 @@
 import os
 import re
 import sys
-import chardet
 from PyQt6.QtCore import QUrl, QTimer
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QMessageBox
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebEngineCore import QWebEnginePage
+from text_extraction import TextDecoder
 
 class HtmlViewer(QWidget):
     def __init__(self, html_file: str, search_keyword: str = ""):
@@ -79,7 +79,7 @@ class HtmlViewer(QWidget):
         if m:
             encoding = m.group(1).decode('ascii', errors='ignore').strip().lower()
         else:
-            encoding = chardet.detect(raw_data)["encoding"]
+            encoding = TextDecoder.file_encoding(html_file, raw_data)
         encoding = encoding or "utf-8"
         try:
             html_content = raw_data.decode(encoding, errors="ignore")
@@ -1,5 +1,6 @@
 # main.py
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from editors.excel_editor import ExcelEditor
 
@@ -10,4 +11,5 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包後的擷取子行程需要
     main()
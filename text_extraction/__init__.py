@@ -0,0 +1,13 @@
+# text_extraction/__init__.py
+# 共用的文件文字擷取層：conformity_analysis_module、file_search_module 與 utils 皆由此讀取 docx/xlsx/pdf 文字
+# （純文字檔則以 TextDecoder 判斷編碼），
+# 擷取結果以 (路徑, 大小, 修改時間, 內容雜湊) 快取在磁碟上，同一份文件只需解析一次。
+from .document import ExtractedDocument
+from .cache import ExtractionCache, file_hash
+from .pdf import ExtractionCancelled, PdfPageExtractor
+from .extractor import TextExtractor
+from .decoding import TextDecoder
+from .config import ExtractionConfig
+
+__all__ = ['ExtractedDocument', 'ExtractionCache', 'file_hash', 'TextExtractor', 'ExtractionConfig',
+           'ExtractionCancelled', 'PdfPageExtractor', 'TextDecoder']
@@ -0,0 +1,124 @@
+# text_extraction/cache.py
+import os
+import json
+import hashlib
+import shutil
+import logging
+import threading
+from text_extraction.document import ExtractedDocument
+
+logger = logging.getLogger("TextExtraction")
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """檔案內容的 SHA-256（與 conformity_analysis_module 的向量快取使用相同的雜湊）"""
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+class ExtractionCache:
+    """
+    擷取文字的磁碟快取，分兩層：
+    paths/ 以檔案路徑為鍵，記錄 (大小, 修改時間 ns, 內容雜湊)，大小與修改時間未變時不需讀取檔案即可命中；
+    documents/ 以 (內容雜湊, 擷取版本) 為鍵保存擷取結果，搬移、複製或只更新修改時間的檔案也能共用；
+    pages/ 保存 PDF 擷取途中已完成的頁面區間，整份文件寫入 documents/ 後即刪除（有頁面擷取失敗時不寫入整份文件，保留已完成的頁面）。
+    寫入先寫暫存檔再 os.replace，多個行程或執行緒同時寫入不會留下不完整的項目。
+    """
+    def __init__(self, cache_dir, version):
+        self.cache_dir = cache_dir
+        self.version = version
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _path_entry(self, file_path):
+        key = self._key(os.path.abspath(file_path))
+        return os.path.join(self.cache_dir, "paths", key[:2], f"{key}.json")
+
+    def _document_entry(self, content_hash):
+        key = self._key(f"{self.version}\0{content_hash}")
+        return os.path.join(self.cache_dir, "documents", key[:2], f"{key}.json")
+
+    def _pages_dir(self, content_hash):
+        key = self._key(f"{self.version}\0{content_hash}")
+        return os.path.join(self.cache_dir, "pages", key[:2], key)
+
+    @staticmethod
+    def _read_json(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"讀取擷取快取 {path} 失敗，將重新擷取: {e}")
+            return None
+
+    @staticmethod
+    def _write_json(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"寫入擷取快取 {path} 失敗: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def lookup_hash(self, file_path, stat):
+        """大小與修改時間與上次相同時回傳記錄的內容雜湊，否則回傳 None"""
+        entry = self._read_json(self._path_entry(file_path))
+        if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+            return entry.get("hash")
+        return None
+
+    def remember(self, file_path, stat, content_hash):
+        self._write_json(self._path_entry(file_path), {
+            "path": os.path.abspath(file_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": content_hash
+        })
+
+    def load(self, content_hash, file_format):
+        data = self._read_json(self._document_entry(content_hash))
+        if not data or data.get("hash") != content_hash or data.get("format") != file_format:
+            return None
+        try:
+            return ExtractedDocument.from_dict(data)
+        except (KeyError, TypeError) as e:
+            logger.warning(f"擷取快取項目格式錯誤，將重新擷取: {e}")
+            return None
+
+    def store(self, content_hash, document):
+        self._write_json(self._document_entry(content_hash), dict(document.to_dict(), hash=content_hash))
+
+    def load_pages(self, content_hash):
+        """先前擷取中斷時已完成的頁面 {頁索引: 行}"""
+        pages_dir = self._pages_dir(content_hash)
+        if not os.path.isdir(pages_dir):
+            return {}
+        pages = {}
+        for name in sorted(os.listdir(pages_dir)):
+            if not name.endswith(".json"):
+                continue
+            data = self._read_json(os.path.join(pages_dir, name))
+            if data and data.get("hash") == content_hash:
+                pages.update((int(index), lines) for index, lines in data.get("pages", {}).items())
+        return pages
+
+    def store_pages(self, content_hash, pages):
+        """寫入一段連續頁面的擷取結果"""
+        start, stop = min(pages), max(pages) + 1
+        self._write_json(os.path.join(self._pages_dir(content_hash), f"{start}-{stop}.json"), {
+            "hash": content_hash,
+            "pages": {str(index): lines for index, lines in pages.items()}
+        })
+
+    def discard_pages(self, content_hash):
+        shutil.rmtree(self._pages_dir(content_hash), ignore_errors=True)
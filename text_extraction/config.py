@@ -0,0 +1,20 @@
+# text_extraction/config.py
+import os
+
+class ExtractionConfig:
+    ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+    # 擷取文字快取：路徑索引（大小、修改時間、內容雜湊）與以內容雜湊為鍵的擷取結果
+    CACHE_ENABLED = True
+    CACHE_DIR = os.path.join(ROOT_DIR, "cache", "extracted_text")
+
+    # PDF 分頁擷取：頁數達 PDF_PARALLEL_MIN_PAGES 時，每 PDF_PAGES_PER_TASK 頁為一個工作交給 PDF_WORKERS 個行程平行擷取；
+    # 完成的頁面先寫入頁面快取，中斷或取消後重新開啟同一份 PDF 只擷取缺少的頁面
+    PDF_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+    PDF_PAGES_PER_TASK = 16
+    PDF_PARALLEL_MIN_PAGES = 64
+
+    # 純文字解碼：BOM 與嚴格 UTF-8 都不符合時，chardet 只偵測第一個非 UTF-8 位元組附近的這麼多位元組；
+    # 偵測到的編碼依 (路徑, 大小, 修改時間) 記住，最多 DECODE_MEMO_SIZE 個檔案
+    DECODE_SAMPLE_BYTES = 64 * 1024
+    DECODE_MEMO_SIZE = 4096
@@ -0,0 +1,101 @@
+# text_extraction/decoding.py
+import os
+import codecs
+import threading
+from collections import OrderedDict
+import chardet
+from text_extraction.config import ExtractionConfig
+
+# UTF-32 LE 的 BOM 以 UTF-16 LE 的 BOM 開頭，需先比對
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16")
+)
+
+class TextDecoder:
+    """
+    純文字檔（txt、html、Word 另存的文字檔）的編碼判斷與解碼：
+    先看 BOM，再嘗試嚴格的 UTF-8，都不符合時才以 chardet 偵測一段有限的取樣，
+    偵測結果依 (路徑, 大小, 修改時間) 記住，同一個檔案再次讀取時直接解碼。
+    """
+    _memo = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _detect(raw):
+        """回傳 (編碼, 已解碼的文字或 None)；嚴格 UTF-8 成功時順便回傳文字，避免重複解碼"""
+        for bom, encoding in BOMS:
+            if raw.startswith(bom):
+                return encoding, None
+        try:
+            return "utf-8", raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            start = e.start
+        # 從第一個非 UTF-8 位元組附近取樣：檔頭若全是 ASCII，從檔頭取樣只會被判為 ascii
+        half = ExtractionConfig.DECODE_SAMPLE_BYTES // 2
+        encoding = chardet.detect(raw[max(0, start - half):start + half])["encoding"]
+        try:
+            return codecs.lookup(encoding).name, None
+        except (LookupError, TypeError):
+            return "utf-8", None
+
+    @staticmethod
+    def detect(raw):
+        return TextDecoder._detect(raw)[0]
+
+    @staticmethod
+    def _key(file_path):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+    @classmethod
+    def _remembered(cls, key):
+        with cls._lock:
+            encoding = cls._memo.get(key)
+            if encoding is not None:
+                cls._memo.move_to_end(key)
+            return encoding
+
+    @classmethod
+    def _remember(cls, key, encoding):
+        with cls._lock:
+            cls._memo[key] = encoding
+            while len(cls._memo) > ExtractionConfig.DECODE_MEMO_SIZE:
+                cls._memo.popitem(last=False)
+
+    @staticmethod
+    def decode(raw, encoding, errors="replace"):
+        try:
+            return raw.decode(encoding, errors=errors)
+        except LookupError:
+            return raw.decode("utf-8", errors=errors)
+
+    @classmethod
+    def file_encoding(cls, file_path, raw=None):
+        """檔案的編碼；raw 為呼叫端已讀入的檔案內容（未提供且未記住時才讀檔）"""
+        key = cls._key(file_path)
+        encoding = cls._remembered(key)
+        if encoding is None:
+            if raw is None:
+                with open(file_path, "rb") as f:
+                    raw = f.read()
+            encoding = cls.detect(raw)
+            cls._remember(key, encoding)
+        return encoding
+
+    @classmethod
+    def read_text(cls, file_path, errors="replace"):
+        """讀取並解碼整個檔案"""
+        key = cls._key(file_path)
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        encoding = cls._remembered(key)
+        if encoding is None:
+            encoding, text = cls._detect(raw)
+            cls._remember(key, encoding)
+            if text is not None:
+                return text
+        return cls.decode(raw, encoding, errors)
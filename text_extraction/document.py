@@ -0,0 +1,42 @@
+# text_extraction/document.py
+
+class ExtractedDocument:
+    """
+    一份文件擷取出的文字，依來源格式分成區段：
+    docx 為單一區段（每段落一行，含表格儲存格中的段落）、pdf 每頁一個區段（頁面文字依換行分行）、
+    xlsx 每個工作表一個區段（rows 為每列非空儲存格的字串，active 為作用中工作表的索引）。
+    """
+    def __init__(self, file_format, sections, active=0, failed_pages=None):
+        self.format = file_format
+        self.sections = sections  # [{"name": 區段名稱或 None, "lines": [...]} 或 {"name", "rows": [[...]]}]
+        self.active = active
+        # 擷取失敗、以空白頁代替的 PDF 頁索引；不為空時文件不完整，不寫入擷取快取
+        self.failed_pages = failed_pages or []
+
+    @staticmethod
+    def section_lines(section, separator=" "):
+        if "rows" in section:
+            return [separator.join(row) for row in section["rows"]]
+        return section["lines"]
+
+    def lines(self, separator=" "):
+        """所有區段的文字行；工作表的每列以 separator 串接儲存格"""
+        return [line for section in self.sections for line in self.section_lines(section, separator)]
+
+    def text(self, separator=" "):
+        return "\n".join(self.lines(separator))
+
+    def pages(self):
+        """每個區段（pdf 的頁面）的完整文字"""
+        return ["\n".join(self.section_lines(section)) for section in self.sections]
+
+    def sheets(self):
+        """xlsx 的 [(工作表名稱, 列)]"""
+        return [(section["name"], section.get("rows", [])) for section in self.sections]
+
+    def to_dict(self):
+        return {"format": self.format, "sections": self.sections, "active": self.active}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["format"], data["sections"], data.get("active", 0))
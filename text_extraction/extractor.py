@@ -0,0 +1,96 @@
+# text_extraction/extractor.py
+import os
+import logging
+import threading
+from text_extraction.cache import ExtractionCache, file_hash
+from text_extraction.config import ExtractionConfig
+from text_extraction.pdf import PdfPageExtractor
+from text_extraction.readers import READERS
+
+logger = logging.getLogger("TextExtraction")
+
+class TextExtractor:
+    """
+    所有模組共用的擷取入口：依副檔名選擇讀取器，結果存入 ExtractionCache。
+    同一份文件被分析、搜尋或轉換時只會解析一次；讀取失敗時拋出例外，由呼叫端決定如何回報。
+    """
+    # 讀取器輸出改變時遞增，舊的快取項目即失效
+    VERSION = 3
+    SUPPORTED_FORMATS = tuple(READERS)
+    stats = {"hits": 0, "misses": 0}
+    _cache = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def file_format(file_path):
+        return file_path.lower().rsplit('.', 1)[-1]
+
+    @classmethod
+    def supports(cls, file_path):
+        return cls.file_format(file_path) in READERS
+
+    @classmethod
+    def cache(cls):
+        if not ExtractionConfig.CACHE_ENABLED:
+            return None
+        with cls._lock:
+            if cls._cache is None or cls._cache.cache_dir != ExtractionConfig.CACHE_DIR:
+                cls._cache = ExtractionCache(ExtractionConfig.CACHE_DIR, cls.VERSION)
+            return cls._cache
+
+    @classmethod
+    def _read(cls, file_path, file_format, cache=None, content_hash=None, progress=None, cancel=None):
+        if file_format != "pdf":
+            return READERS[file_format](file_path)
+        if cache is None:
+            return PdfPageExtractor.extract(file_path, progress=progress, cancel=cancel)
+        # PDF 以頁為單位快取：上次中斷前已完成的頁面直接沿用
+        known_pages = cache.load_pages(content_hash)
+        if known_pages:
+            logger.info(f"沿用 {file_path} 已擷取的 {len(known_pages)} 頁")
+        return PdfPageExtractor.extract(file_path, known_pages,
+                                        on_pages=lambda pages: cache.store_pages(content_hash, pages),
+                                        progress=progress, cancel=cancel)
+
+    @classmethod
+    def extract(cls, file_path, content_hash=None, progress=None, cancel=None):
+        """
+        回傳 ExtractedDocument。content_hash 為呼叫端已算好的內容雜湊（可省去重新讀檔）；
+        未提供時，檔案大小與修改時間與快取記錄相同則直接沿用記錄的雜湊。
+        progress(已完成頁數, 總頁數) 與 cancel() 只對 PDF 有效，取消時拋出 ExtractionCancelled。
+        """
+        file_format = cls.file_format(file_path)
+        if file_format not in READERS:
+            raise ValueError(f"不支援的檔案格式: {file_path}")
+        cache = cls.cache()
+        if cache is None:
+            return cls._read(file_path, file_format, progress=progress, cancel=cancel)
+
+        stat = os.stat(file_path)
+        known_hash = cache.lookup_hash(file_path, stat)
+        content_hash = content_hash or known_hash or file_hash(file_path)
+        document = cache.load(content_hash, file_format)
+        if document is None:
+            cls.stats["misses"] += 1
+            document = cls._read(file_path, file_format, cache, content_hash, progress, cancel)
+            if document.failed_pages:
+                # 有頁面擷取失敗：不寫入整份文件並保留頁面快取，下次開啟時只重新擷取失敗的頁面
+                logger.warning(f"{file_path} 有 {len(document.failed_pages)} 頁擷取失敗，暫不寫入擷取快取")
+            else:
+                cache.store(content_hash, document)
+                if file_format == "pdf":
+                    cache.discard_pages(content_hash)
+        else:
+            cls.stats["hits"] += 1
+            logger.debug(f"擷取快取命中: {file_path}")
+        if known_hash != content_hash:
+            cache.remember(file_path, stat, content_hash)
+        return document
+
+    @classmethod
+    def lines(cls, file_path, content_hash=None, separator=" ", progress=None, cancel=None):
+        return cls.extract(file_path, content_hash, progress, cancel).lines(separator)
+
+    @classmethod
+    def text(cls, file_path, content_hash=None, separator=" ", progress=None, cancel=None):
+        return cls.extract(file_path, content_hash, progress, cancel).text(separator)
@@ -0,0 +1,119 @@
+# text_extraction/pdf.py
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PyPDF2 import PdfReader
+from text_extraction.config import ExtractionConfig
+from text_extraction.document import ExtractedDocument
+
+logger = logging.getLogger("TextExtraction")
+
+class ExtractionCancelled(Exception):
+    """擷取途中被呼叫端取消；已完成的頁面仍保留在頁面快取中"""
+
+def page_lines(page):
+    """頁面文字依換行分行"""
+    return (page.extract_text() or "").split('\n')
+
+def extract_pages(reader, start, stop, file_path):
+    """擷取第 [start, stop) 頁（0 起算），回傳 {頁索引: 行}；個別頁面擷取失敗時記錄後略過，不影響其他頁面"""
+    pages = {}
+    for index in range(start, stop):
+        try:
+            pages[index] = page_lines(reader.pages[index])
+        except Exception as e:
+            logger.warning(f"擷取 {file_path} 第 {index + 1} 頁失敗，略過此頁: {e}")
+    return pages
+
+_worker_reader = None  # 行程池子行程開啟的 PdfReader，同一份 PDF 的各區間共用，不必每個工作重新解析檔案結構
+_worker_path = None
+
+def _init_worker(file_path):
+    global _worker_reader, _worker_path
+    _worker_reader = PdfReader(file_path)
+    _worker_path = file_path
+
+def extract_page_range(start, stop):
+    """
+    在行程池子行程中擷取第 [start, stop) 頁（0 起算），回傳 {頁索引: 行}。
+    此函式需位於模組層級，子行程才能以 pickle 呼叫。
+    """
+    return extract_pages(_worker_reader, start, stop, _worker_path)
+
+def page_ranges(indexes, size):
+    """把已排序的頁索引切成連續、且每段最多 size 頁的 [start, stop) 區間"""
+    ranges = []
+    for index in indexes:
+        if ranges and ranges[-1][1] == index and index - ranges[-1][0] < size:
+            ranges[-1][1] = index + 1
+        else:
+            ranges.append([index, index + 1])
+    return ranges
+
+class PdfPageExtractor:
+    """
+    以頁為單位擷取 PDF：缺少的頁面切成區間，頁數多時交給行程池平行擷取（PyPDF2 為純 Python，執行緒無法加速）。
+    known_pages 為先前已擷取的頁面（來自頁面快取），只擷取其餘頁面；
+    每完成一個區間即呼叫 on_pages(該區間的頁面) 供呼叫端寫入快取，並以 progress(已完成頁數, 總頁數) 回報進度；
+    cancel() 回傳 True 時停止並拋出 ExtractionCancelled。
+    個別頁面擷取失敗時記錄後以空白頁代替（不寫入頁面快取，頁索引記錄在文件的 failed_pages）；行程池的區間失敗時（例如子行程異常結束）改在本行程逐頁重試，
+    一頁出錯不會讓整份文件失敗。
+    """
+    @staticmethod
+    def workers(page_count):
+        # 分析的擷取子行程內不再開行程池，避免行程數倍增
+        if page_count < ExtractionConfig.PDF_PARALLEL_MIN_PAGES or multiprocessing.parent_process() is not None:
+            return 1
+        return max(1, ExtractionConfig.PDF_WORKERS)
+
+    @staticmethod
+    def extract(file_path, known_pages=None, on_pages=None, progress=None, cancel=None):
+        with open(file_path, "rb") as f:
+            reader = PdfReader(f)
+            total = len(reader.pages)
+            pages = {index: lines for index, lines in (known_pages or {}).items() if index < total}
+            ranges = page_ranges([index for index in range(total) if index not in pages],
+                                 ExtractionConfig.PDF_PAGES_PER_TASK)
+
+            done = [len(pages)]  # 已處理（成功或失敗）的頁數
+
+            def completed(start, stop, result):
+                pages.update(result)
+                done[0] += stop - start
+                if on_pages is not None and result:
+                    on_pages(result)
+                if progress is not None:
+                    progress(done[0], total)
+
+            if progress is not None:
+                progress(len(pages), total)
+            workers = min(PdfPageExtractor.workers(total), len(ranges))
+            if workers <= 1:
+                for start, stop in ranges:
+                    if cancel is not None and cancel():
+                        raise ExtractionCancelled(file_path)
+                    completed(start, stop, extract_pages(reader, start, stop, file_path))
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(file_path,)) as executor:
+                    futures = {executor.submit(extract_page_range, start, stop): (start, stop) for start, stop in ranges}
+                    try:
+                        for future in as_completed(futures):
+                            start, stop = futures[future]
+                            try:
+                                result = future.result()
+                            except Exception as e:
+                                logger.warning(f"平行擷取 {file_path} 第 {start + 1}-{stop} 頁失敗，改為逐頁擷取: {e}")
+                                result = extract_pages(reader, start, stop, file_path)
+                            completed(start, stop, result)
+                            if cancel is not None and done[0] < total and cancel():
+                                raise ExtractionCancelled(file_path)
+                    finally:
+                        for future in futures:
+                            future.cancel()
+
+        failed = [index for index in range(total) if index not in pages]
+        if failed:
+            logger.warning(f"{file_path} 共 {len(failed)}/{total} 頁擷取失敗，以空白頁代替")
+        return ExtractedDocument("pdf", [{"name": str(index + 1), "lines": pages.get(index, [])}
+                                         for index in range(total)], failed_pages=failed)
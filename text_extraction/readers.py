@@ -0,0 +1,242 @@
+# text_extraction/readers.py
+import zipfile
+import posixpath
+from lxml import etree
+from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import from_excel, from_ISO8601, MAC_EPOCH, WINDOWS_EPOCH
+from text_extraction.document import ExtractedDocument
+from text_extraction.pdf import PdfPageExtractor
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_P, W_T, W_TAB, W_PTAB, W_BR, W_CR, W_HYPHEN = (
+    f"{W_NS}{tag}" for tag in ("p", "t", "tab", "ptab", "br", "cr", "noBreakHyphen"))
+W_TABLE = f"{W_NS}tbl"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+# 與 python-docx 的 Paragraph.text 相同：tab 與換行元素轉為對應字元
+W_SPECIAL = {W_TAB: "\t", W_PTAB: "\t", W_BR: "\n", W_CR: "\n", W_HYPHEN: "-"}
+RELS_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+CONTENT_TYPES_NS = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+OFFICE_RELS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+OFFICE_DOCUMENT = f"{OFFICE_RELS}/officeDocument"
+
+def _part_relationships(archive, part):
+    """part 的內部關聯 {rId: (類型, 在壓縮檔中的路徑)}；part 為空字串時讀取套件層級的 _rels/.rels"""
+    rels_path = posixpath.join(posixpath.dirname(part), "_rels", f"{posixpath.basename(part)}.rels")
+    try:
+        rels = etree.fromstring(archive.read(rels_path))
+    except (KeyError, etree.XMLSyntaxError):
+        return {}
+    relationships = {}
+    for rel in rels.iter(f"{RELS_NS}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        path = target.lstrip("/") if target.startswith("/") else \
+            posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+        relationships[rel.get("Id")] = (rel.get("Type"), path)
+    return relationships
+
+def _main_document_part(archive, content_kind, default):
+    """
+    由 _rels/.rels 找出主文件的 XML 路徑（例如 word/document.xml）；
+    與 python-docx / openpyxl 相同，主文件的內容類型不符（例如改了副檔名的檔案）時拋出 ValueError。
+    """
+    part = next((path for rel_type, path in _part_relationships(archive, "").values()
+                 if rel_type == OFFICE_DOCUMENT), default)
+    try:
+        content_types = etree.fromstring(archive.read("[Content_Types].xml"))
+    except (KeyError, etree.XMLSyntaxError):
+        return part
+    for override in content_types.iter(f"{CONTENT_TYPES_NS}Override"):
+        if override.get("PartName", "").lstrip("/") == part:
+            content_type = override.get("ContentType", "")
+            if content_kind not in content_type:
+                raise ValueError(f"{part} 的內容類型為 {content_type}，不是預期的文件格式")
+    return part
+
+def iter_docx_paragraphs(file_path):
+    """
+    以 iterparse 逐段讀取主文件 XML，依文件順序產生每個段落（含表格儲存格與文字方塊中的段落）的文字，
+    不建立 python-docx 的物件模型；處理完的元素立即釋放，記憶體用量與文件大小無關。
+    文字方塊的段落接在其錨點段落之後產生；mc:AlternateContent 只讀 mc:Choice，
+    mc:Fallback（舊版 Word 用的同一份文字方塊）略過，避免內容重複。
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open(_main_document_part(archive, "wordprocessingml", "word/document.xml")) as xml:
+            stack = []  # 巢狀段落的 (文字緩衝, 待錨點段落結束後產生的文字方塊段落)
+            fallback_depth = 0
+            for event, elem in etree.iterparse(xml, events=("start", "end"),
+                                               tag=(W_P, W_T, W_TABLE, MC_FALLBACK) + tuple(W_SPECIAL)):
+                tag = elem.tag
+                if tag == MC_FALLBACK:
+                    fallback_depth += 1 if event == "start" else -1
+                    if event == "end":
+                        elem.clear()
+                    continue
+                if fallback_depth:
+                    continue
+                if event == "start":
+                    if tag == W_P:
+                        stack.append(([], []))
+                    continue
+                if tag == W_T:
+                    if stack and elem.text:
+                        stack[-1][0].append(elem.text)
+                elif tag in W_SPECIAL:
+                    if stack:
+                        stack[-1][0].append(W_SPECIAL[tag])
+                elif tag == W_P:
+                    parts, nested = stack.pop()
+                    if stack:
+                        stack[-1][1].append("".join(parts))
+                        stack[-1][1].extend(nested)
+                    else:
+                        yield "".join(parts)
+                        yield from nested
+                if tag in (W_P, W_TABLE):
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+
+def read_docx(file_path):
+    """每個段落（含表格儲存格中的段落）一行，保留空段落，由呼叫端決定是否略過"""
+    return ExtractedDocument("docx", [{"name": None, "lines": list(iter_docx_paragraphs(file_path))}])
+
+S_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+S_SHEET, S_SI, S_T, S_R, S_ROW, S_C, S_V, S_IS = (
+    f"{S_NS}{tag}" for tag in ("sheet", "si", "t", "r", "row", "c", "v", "is"))
+WORKSHEET = f"{OFFICE_RELS}/worksheet"
+SHARED_STRINGS = f"{OFFICE_RELS}/sharedStrings"
+STYLES = f"{OFFICE_RELS}/styles"
+
+def _string_item_text(node):
+    """<si> / <is> 的純文字：一般文字加上各段格式化文字（不含注音 rPh），與 openpyxl 的 Text.content 相同"""
+    if len(node) == 1 and node[0].tag == S_T:
+        return node[0].text or ""
+    runs = [node.findtext(S_T) or ""]
+    runs.extend(run.findtext(S_T) or "" for run in node.iterchildren(S_R))
+    return "".join(runs)
+
+def _shared_strings(archive, part):
+    """一次讀入共用字串表"""
+    strings = []
+    if part is None:
+        return strings
+    with archive.open(part) as xml:
+        for _, item in etree.iterparse(xml, tag=S_SI):
+            strings.append(_string_item_text(item).replace('x005F_', ''))
+            item.clear()
+            while item.getprevious() is not None:
+                del item.getparent()[0]
+    return strings
+
+def _date_styles(archive, part):
+    """cellXfs 中數字格式為日期、時間長度的樣式索引（儲存格的 s 屬性）"""
+    date_styles, timedelta_styles = set(), set()
+    if part is None:
+        return date_styles, timedelta_styles
+    styles = etree.fromstring(archive.read(part))
+    custom = {int(fmt.get("numFmtId")): fmt.get("formatCode")
+              for fmt in styles.iterfind(f"{S_NS}numFmts/{S_NS}numFmt")}
+    for index, xf in enumerate(styles.iterfind(f"{S_NS}cellXfs/{S_NS}xf")):
+        num_fmt_id = int(xf.get("numFmtId", 0))
+        fmt = custom.get(num_fmt_id) or builtin_format_code(num_fmt_id)
+        if is_date_format(fmt):
+            date_styles.add(index)
+        if is_timedelta_format(fmt):
+            timedelta_styles.add(index)
+    return date_styles, timedelta_styles
+
+def _xlsx_workbook(archive):
+    """活頁簿層級的資訊：工作表 [(名稱, XML 路徑)]、作用中工作表索引、共用字串、日期樣式與日期基準"""
+    workbook_part = _main_document_part(archive, "spreadsheetml", "xl/workbook.xml")
+    relationships = _part_relationships(archive, workbook_part)
+    workbook = etree.fromstring(archive.read(workbook_part))
+
+    sheets, active = [], 0
+    view = workbook.find(f"{S_NS}bookViews/{S_NS}workbookView")
+    active_tab = int(view.get("activeTab", 0)) if view is not None else 0
+    for tab, sheet in enumerate(workbook.iterfind(f"{S_NS}sheets/{S_SHEET}")):
+        rel_type, path = relationships.get(sheet.get(f"{{{OFFICE_RELS}}}id"), (None, None))
+        if rel_type != WORKSHEET:
+            continue  # 圖表工作表沒有儲存格
+        if tab == active_tab:
+            active = len(sheets)
+        sheets.append((sheet.get("name"), path))
+
+    def related(rel_type):
+        return next((path for kind, path in relationships.values() if kind == rel_type), None)
+
+    properties = workbook.find(f"{S_NS}workbookPr")
+    date1904 = properties is not None and properties.get("date1904") in ("1", "true")
+    date_styles, timedelta_styles = _date_styles(archive, related(STYLES))
+    return {
+        "sheets": sheets,
+        "active": active,
+        "strings": _shared_strings(archive, related(SHARED_STRINGS)),
+        "date_styles": date_styles,
+        "timedelta_styles": timedelta_styles,
+        "epoch": MAC_EPOCH if date1904 else WINDOWS_EPOCH
+    }
+
+def _cell_value(cell, workbook):
+    """儲存格的值（公式儲存格取快取的計算結果），型別轉換規則與 openpyxl 的 data_only 讀取相同"""
+    data_type = cell.get("t", "n")
+    if data_type == "inlineStr":
+        inline = cell.find(S_IS)
+        return _string_item_text(inline) if inline is not None else None
+    # 逐一比對子元素比 findtext 的路徑查詢快，大型工作表中這是最熱的路徑
+    value = next((child.text for child in cell if child.tag == S_V), None)
+    if not value:
+        return None
+    if data_type == "n":
+        value = float(value) if "." in value or "E" in value or "e" in value else int(value)
+        style = int(cell.get("s") or 0)
+        if style in workbook["date_styles"]:
+            try:
+                value = from_excel(value, workbook["epoch"], timedelta=style in workbook["timedelta_styles"])
+            except (OverflowError, ValueError):
+                value = "#VALUE!"
+    elif data_type == "s":
+        value = workbook["strings"][int(value)]
+    elif data_type == "b":
+        value = bool(int(value))
+    elif data_type == "d":
+        value = from_ISO8601(value)
+    return value
+
+def iter_sheet_rows(archive, part, workbook):
+    """逐列串流讀取工作表 XML，產生每列非空儲存格的字串；全空的列略過，處理完的列立即釋放"""
+    with archive.open(part) as xml:
+        for _, row in etree.iterparse(xml, tag=S_ROW):
+            cells = []
+            for cell in row.iterchildren(S_C):
+                value = _cell_value(cell, workbook)
+                if value is not None:
+                    cells.append(str(value))
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+            if cells:
+                yield cells
+
+def read_xlsx(file_path):
+    """
+    每個工作表一個區段，每列保留非空儲存格的字串（公式儲存格取計算後的值）；全空的列略過。
+    直接解析 sharedStrings.xml 與各工作表 XML，不經過 openpyxl 的活頁簿物件。
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        workbook = _xlsx_workbook(archive)
+        sections = [{"name": name, "rows": list(iter_sheet_rows(archive, part, workbook))}
+                    for name, part in workbook["sheets"]]
+    return ExtractedDocument("xlsx", sections, workbook["active"])
+
+def read_pdf(file_path):
+    """每頁一個區段，頁面文字依換行分行；頁數多時分段平行擷取"""
+    return PdfPageExtractor.extract(file_path)
+
+READERS = {
+    "docx": read_docx,
+    "xlsx": read_xlsx,
+    "pdf": read_pdf
+}
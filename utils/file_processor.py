@@ -1,12 +1,11 @@
 # utils/file_processor.py
 
-from docx import Document
-from openpyxl import load_workbook
 import json
 import os
 import re
 import subprocess
 import tempfile
+from text_extraction import TextExtractor
 
 class FileProcessor:
     """處理檔案並分割中英文內容的工具類"""
@@ -155,9 +154,8 @@ class FileProcessor:
             raise FileNotFoundError(f"找不到輸入檔案：{input_path}")
 
         try:
-            doc = Document(input_path)
-            # 收集所有段落文字並以換行符連成大字串
-            text = "\n".join(para.text for para in doc.paragraphs if para.text.strip())
+            # 收集所有段落文字並以換行符連成大字串（由共用擷取層讀取，已解析過的檔案直接使用快取）
+            text = "\n".join(line for line in TextExtractor.lines(input_path) if line.strip())
 
             chinese_content, english_content = FileProcessor.split_text_advanced(text)
 
@@ -185,14 +183,10 @@ class FileProcessor:
             raise FileNotFoundError(f"找不到輸入檔案：{input_path}")
 
         try:
-            workbook = load_workbook(input_path)
-            sheet = workbook.active
-
-            text_lines = []
-            for row in sheet.iter_rows(values_only=True):
-                if any(cell is not None for cell in row):
-                    line_str = " ".join(str(cell) for cell in row if cell is not None)
-                    text_lines.append(line_str)
+            # 只處理作用中的工作表
+            document = TextExtractor.extract(input_path)
+            sheet = document.sections[document.active] if document.sections else {"rows": []}
+            text_lines = document.section_lines(sheet)
 
             text = "\n".join(text_lines)
             chinese_content, english_content = FileProcessor.split_text_advanced(text)